@@ -2,14 +2,39 @@ import json
 import os
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, 
                              QPushButton, QGroupBox, QGridLayout, QScrollArea, QSpacerItem,
-                             QSizePolicy, QToolTip)
+                             QSizePolicy, QToolTip, QTableWidget, QTableWidgetItem, QHeaderView,
+                             QStyledItemDelegate, QComboBox)
 from PyQt5.QtGui import QFont, QColor, QPalette, QIcon
 from PyQt5.QtCore import Qt, QSize
+from calc_logging import get_logger
+from drill_pipe import BASIC_FIELDS, WELL_FIELDS, CONSTANT_FIELDS, SECTION_NAMES, interval_count, interval_section
+
+logger = get_logger("data_input")
+
+class SectionDelegate(QStyledItemDelegate):
+    # Only the cell being edited gets a combo box, so long interval tables stay light.
+    def __init__(self, tab, parent=None):
+        super().__init__(parent)
+        self.tab = tab
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(self.tab.section_names)
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentText(index.data() or self.tab.section_names[0])
+
+    def setModelData(self, editor, model, index):
+        model.setData(index, editor.currentText())
 
 class DataInputTab(QWidget):
-    def __init__(self):
+    INTERVAL_HEADERS = ["Section"] + BASIC_FIELDS
+
+    def __init__(self, data_file='saved_data.json'):
         super().__init__()
-        self.data_file = 'saved_data.json'
+        self.data_file = data_file
+        self.section_names = list(SECTION_NAMES)
         self.initUI()
         self.load_saved_data()
 
@@ -25,9 +50,8 @@ class DataInputTab(QWidget):
         scroll_layout.setSpacing(20)
 
         groups = [
-            ("Basic Parameters", ["WOB", "C", "qc", "qp", "Lhw", "P", "γ", "H"]),
-            ("Well Specifications", ["Dep", "Dhw", "qhw", "dα", "n"]),
-            ("Constants", ["K1", "K2", "K3"])
+            ("Well Specifications", WELL_FIELDS),
+            ("Constants", CONSTANT_FIELDS)
         ]
 
         for title, fields in groups:
@@ -35,7 +59,8 @@ class DataInputTab(QWidget):
             scroll_layout.addWidget(group)
 
         scroll_area.setWidget(scroll_content)
-        main_layout.addWidget(scroll_area)
+        main_layout.addWidget(self.create_interval_group(), 3)
+        main_layout.addWidget(scroll_area, 2)
 
         button_layout = QHBoxLayout()
         save_button = QPushButton("Save Data")
@@ -50,6 +75,67 @@ class DataInputTab(QWidget):
 
         self.setStyleSheet(self.get_dark_theme_style())
 
+    def create_interval_group(self):
+        group = QGroupBox("Basic Parameters")
+        group.setStyleSheet(self.get_group_style())
+        layout = QVBoxLayout()
+
+        self.interval_table = QTableWidget(0, len(self.INTERVAL_HEADERS))
+        self.interval_table.setHorizontalHeaderLabels(self.INTERVAL_HEADERS)
+        self.interval_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.interval_table.setItemDelegateForColumn(0, SectionDelegate(self, self.interval_table))
+        self.interval_table.setStyleSheet(self.get_table_style())
+        self.interval_table.setToolTip("One row per drilling interval")
+        layout.addWidget(self.interval_table)
+
+        button_layout = QHBoxLayout()
+        add_button = QPushButton("Add Interval")
+        add_button.setStyleSheet(self.get_button_style())
+        add_button.clicked.connect(lambda: self.add_interval())
+        remove_button = QPushButton("Remove Interval")
+        remove_button.setStyleSheet(self.get_button_style())
+        remove_button.clicked.connect(self.remove_intervals)
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        group.setLayout(layout)
+        self.set_interval_count(len(SECTION_NAMES))
+        return group
+
+    def add_interval(self, values=None):
+        row = self.interval_table.rowCount()
+        section = self.interval_table.item(row - 1, 0).text() if row else self.section_names[0]
+        self.interval_table.insertRow(row)
+        self.interval_table.setItem(row, 0, QTableWidgetItem(section))
+        for col, field in enumerate(BASIC_FIELDS, 1):
+            self.interval_table.setItem(row, col, QTableWidgetItem(str((values or {}).get(field, ""))))
+        return row
+
+    def remove_intervals(self):
+        rows = sorted({index.row() for index in self.interval_table.selectedIndexes()}, reverse=True)
+        if not rows and self.interval_table.rowCount():
+            rows = [self.interval_table.rowCount() - 1]
+        for row in rows:
+            if self.interval_table.rowCount() > 1:
+                self.interval_table.removeRow(row)
+
+    def set_interval_count(self, count):
+        self.interval_table.setUpdatesEnabled(False)
+        self.interval_table.setRowCount(count)
+        for row in range(count):
+            self.interval_table.setItem(row, 0, QTableWidgetItem(self.section_names[min(row, len(self.section_names) - 1)]))
+            for col in range(1, len(self.INTERVAL_HEADERS)):
+                self.interval_table.setItem(row, col, QTableWidgetItem(""))
+        self.interval_table.setUpdatesEnabled(True)
+
+    def set_section_names(self, names):
+        self.section_names = list(names) or list(SECTION_NAMES)
+
+    def interval_count(self):
+        return self.interval_table.rowCount()
+
     def create_group(self, title, fields):
         group = QGroupBox(title)
         group.setStyleSheet(self.get_group_style())
@@ -63,25 +149,14 @@ class DataInputTab(QWidget):
             label.setFont(QFont("Roboto", 10))
             layout.addWidget(label, i, 0)
 
-            if title == "Basic Parameters":
-                for j in range(3):
-                    input_field = QLineEdit()
-                    input_field.setFont(QFont("Roboto", 10))
-                    input_field.setStyleSheet(self.get_input_style())
-                    input_field.setPlaceholderText(f"Enter {field} ({j+1})")
-                    tooltip_text = f"Enter the value for {field} (Instance {j+1})"
-                    input_field.setToolTip(tooltip_text)
-                    layout.addWidget(input_field, i, j+1)
-                    setattr(self, f"{field}_{j+1}", input_field)
-            else:
-                input_field = QLineEdit()
-                input_field.setFont(QFont("Roboto", 10))
-                input_field.setStyleSheet(self.get_input_style())
-                input_field.setPlaceholderText(f"Enter {field}")
-                tooltip_text = f"Enter the value for {field}"
-                input_field.setToolTip(tooltip_text)
-                layout.addWidget(input_field, i, 1)
-                setattr(self, field, input_field)
+            input_field = QLineEdit()
+            input_field.setFont(QFont("Roboto", 10))
+            input_field.setStyleSheet(self.get_input_style())
+            input_field.setPlaceholderText(f"Enter {field}")
+            tooltip_text = f"Enter the value for {field}"
+            input_field.setToolTip(tooltip_text)
+            layout.addWidget(input_field, i, 1)
+            setattr(self, field, input_field)
 
         group.setLayout(layout)
         return group
@@ -90,7 +165,7 @@ class DataInputTab(QWidget):
         data = self.get_data()
         with open(self.data_file, 'w') as f:
             json.dump(data, f)
-        print("Data saved!")
+        logger.info("Data saved", extra={'fields': {'path': self.data_file}})
 
     def load_saved_data(self):
         if os.path.exists(self.data_file):
@@ -99,19 +174,34 @@ class DataInputTab(QWidget):
             self.set_data(data)
 
     def set_data(self, data):
-        for field, value in data.items():
-            if hasattr(self, field):
-                getattr(self, field).setText(str(value))
+        count = interval_count(data)
+        if count:
+            self.set_interval_count(count)
+            self.interval_table.setUpdatesEnabled(False)
+            for row in range(count):
+                self.interval_table.item(row, 0).setText(interval_section(data, row + 1))
+                for col, field in enumerate(BASIC_FIELDS, 1):
+                    self.interval_table.item(row, col).setText(str(data.get(f"{field}_{row + 1}", "")))
+            self.interval_table.setUpdatesEnabled(True)
+        for field in WELL_FIELDS + CONSTANT_FIELDS:
+            if field in data:
+                getattr(self, field).setText(str(data[field]))
 
     def get_data(self):
+        # Same flat field_i keys as the original three-instance form, one i per row.
         data = {}
-        for field in ["WOB", "C", "qc", "qp", "Lhw", "P", "γ", "H"]:
-            for i in range(1, 4):
-                data[f"{field}_{i}"] = getattr(self, f"{field}_{i}").text()
-        
-        for field in ["K1", "K2", "K3", "Dep", "Dhw", "qhw", "dα", "n"]:
+        for field in BASIC_FIELDS:
+            col = self.INTERVAL_HEADERS.index(field)
+            for row in range(self.interval_table.rowCount()):
+                item = self.interval_table.item(row, col)
+                data[f"{field}_{row + 1}"] = item.text() if item is not None else ""
+        for row in range(self.interval_table.rowCount()):
+            item = self.interval_table.item(row, 0)
+            data[f"Section_{row + 1}"] = item.text() if item is not None else self.section_names[0]
+
+        for field in CONSTANT_FIELDS + WELL_FIELDS:
             data[field] = getattr(self, field).text()
-        
+
         return data
 
     @staticmethod
@@ -169,6 +259,25 @@ class DataInputTab(QWidget):
             }
         """
 
+    @staticmethod
+    def get_table_style():
+        return """
+            QTableWidget {
+                background-color: #3b3b3b;
+                color: #ffffff;
+                gridline-color: #555555;
+                border: 1px solid #555555;
+                border-radius: 5px;
+            }
+            QHeaderView::section {
+                background-color: #4CAF50;
+                color: #ffffff;
+                padding: 5px;
+                border: 1px solid #555555;
+                font-weight: bold;
+            }
+        """
+
     @staticmethod
     def get_button_style():
         return """
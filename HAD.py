@@ -1,14 +1,20 @@
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QLabel
 from PyQt5.QtGui import QIcon
-import logging
 import math
+from calc_logging import setup_logging, get_logger, trace
+from records import HAD_ROW_FIELDS, sort_by_had, to_dicts
+from design_factors import DEFAULT_FACTORS
+
+logger = get_logger("had")
 
 class HADCalculator(QWidget):
     def __init__(self):
         super().__init__()
+        self.factors = DEFAULT_FACTORS
         self.initUI()
         self.setup_logging()
         self.depth = None
+        self.section_data = {}
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -20,15 +26,15 @@ class HADCalculator(QWidget):
         layout.addWidget(self.had_text)
 
     def setup_logging(self):
-        logging.basicConfig(level=logging.INFO, format='%(message)s')
+        setup_logging()
 
     def update_had_results(self, had_data, depth, section_name):
         self.depth = depth
         self.had_text.clear()
         production_data = had_data.get(list(had_data.keys())[0], [])
         
-        if production_data and section_name == "Production Section":
-            sorted_data = sorted(production_data, key=lambda x: x['had'], reverse=True)
+        if len(production_data) and section_name == "Production Section":
+            sorted_data = to_dicts(sort_by_had(production_data), HAD_ROW_FIELDS)
             
             if len(sorted_data) >= 3:
                 l_values = self.calculate_l_values(sorted_data, depth)
@@ -37,19 +43,12 @@ class HADCalculator(QWidget):
                 if len(sorted_data) > 3 and 'l4' in l_values:
                     sorted_data[3]['l_value'] = l_values['l4']
             
+            self.section_data[section_name] = sorted_data
             self._log_section_data(section_name, sorted_data)
             self.format_and_display_had_section(section_name, sorted_data)
 
     def _log_section_data(self, section_name, sorted_data):
-        logging.info(f"\n{section_name}")
-        logging.info("-" * 90)
-        logging.info(f"{'Row':<5}{'HAD':<10}{'External Pressure':<20}{'Metal Type':<15}{'Tensile Strength':<20}{'Unit Weight':<15}{'L Value':<10}")
-        logging.info("-" * 90)
-        for i, data in enumerate(sorted_data, 1):
-            l_value = data.get('l_value', '')
-            l_value_str = f"{l_value:.2f}" if l_value != '' else ''
-            logging.info(f"{i:<5}{data['had']:<10.2f}{data['external_pressure']:<20}{data['metal_type']:<15}{data['tensile_strength']:<20}{data['unit_weight']:<15}{l_value_str:<10}")
-        logging.info("-" * 90)
+        trace(logger, "HAD section", section=section_name, depth=self.depth, rows=sorted_data)
 
     def format_and_display_had_section(self, section_name, data_list):
         section_html = self._generate_section_html(section_name, data_list)
@@ -138,7 +137,7 @@ class HADCalculator(QWidget):
 
     def _calculate_y1_z1(self, l1, depth, had_row_2, tensile_strength_row_2, unit_weight_row_1):
         y1 = (depth - l1) / had_row_2
-        z1 = (l1 * unit_weight_row_1 * 1.488) / (tensile_strength_row_2 * 1000)
+        z1 = (l1 * unit_weight_row_1 * self.factors.weight_factor) / (tensile_strength_row_2 * 1000)
         return y1, z1
 
     def _find_best_l2(self, depth, l1, had_row_3, tensile_strength_row_3, unit_weight_row_1, unit_weight_row_2):
@@ -159,11 +158,12 @@ class HADCalculator(QWidget):
 
     def _calculate_y2_z2(self, l1, l2, depth, had_row_3, tensile_strength_row_3, unit_weight_row_1, unit_weight_row_2):
         y2 = (depth - (l1 + l2)) / had_row_3
-        z2 = (l2 * unit_weight_row_1 + l2 * unit_weight_row_2) * 1.488 / (tensile_strength_row_3 * 1000)
+        z2 = (l2 * unit_weight_row_1 + l2 * unit_weight_row_2) * self.factors.weight_factor / (tensile_strength_row_3 * 1000)
         return y2, z2
 
     def _calculate_l3(self, l1, l2, tensile_strength_row_3, unit_weight_row_1, unit_weight_row_2, unit_weight_row_3):
-        return ((tensile_strength_row_3 * 1000 / 1.75) - (l1 * unit_weight_row_1 * 1.488 + l2 * unit_weight_row_2 * 1.488)) / (unit_weight_row_3 * 1.488)
+        w, t = self.factors.weight_factor, self.factors.tension_factor
+        return ((tensile_strength_row_3 * 1000 / t) - (l1 * unit_weight_row_1 * w + l2 * unit_weight_row_2 * w)) / (unit_weight_row_3 * w)
 
     def _get_next_row_data(self, data_list):
         if len(data_list) > 3:
@@ -171,7 +171,8 @@ class HADCalculator(QWidget):
         return None, None
 
     def _calculate_l4(self, l1, l2, l3, tensile_strength_row_4, unit_weight_row_1, unit_weight_row_2, unit_weight_row_3, unit_weight_row_4):
-        return ((tensile_strength_row_4 * 1000 / 1.75) - (l1 * unit_weight_row_1 * 1.488 + l2 * unit_weight_row_2 * 1.488 + l3 * unit_weight_row_3 * 1.488)) / (unit_weight_row_4 * 1.488)
+        w, t = self.factors.weight_factor, self.factors.tension_factor
+        return ((tensile_strength_row_4 * 1000 / t) - (l1 * unit_weight_row_1 * w + l2 * unit_weight_row_2 * w + l3 * unit_weight_row_3 * w)) / (unit_weight_row_4 * w)
 
     def get_next_row_data(self, file_path, at_head_value, metal_type):
         db_calculator = self.parent().parent().db_calculator
@@ -1,13 +1,22 @@
-import pandas as pd
+import os
+import json
 import numpy as np
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QFrame, QTextEdit, QFileDialog, QMessageBox,
-                             QScrollArea, QSplitter)
+                             QScrollArea, QSplitter, QInputDialog)
 from PyQt5.QtGui import QFont, QIcon, QFontDatabase
 from PyQt5.QtCore import Qt, QSize
-from Datainput import DataInputTab
-from math import pi, sqrt
-from casing import DbCalculator
+from drill_pipe import (ADDITIONAL_COLUMNS, acquire_formation, release_formation, evaluate_intervals,
+                        interval_count, interval_section, section_names)
+from report_export import collect_well_report, export_xlsx, export_docx
+from calc_logging import get_logger, trace
+from sensitivity import sensitivity, ranked_parameters, INPUT_LABELS, FLIP_FRACTION
+from inverse import max_input, SOLVE_FOR
+from taper import optimize_taper, MAX_SECTIONS
+from bha import bha_sweep
+from design_factors import DEFAULT_FACTORS
+
+logger = get_logger("drill_pipe")
 
 class Colors:
     PRIMARY = "#2b2b2b"
@@ -82,16 +91,28 @@ class WellDataApp(QWidget):
     }
     """ % Colors.__dict__
 
-    def __init__(self):
+    def __init__(self, casing_tab=None, data_input_tab=None, well_name="Well 1", data_file='equations_data.json'):
         super().__init__()
+        self.well_name = well_name
+        self.data_file = data_file
+        self.saved_formation_path = None
         self.drill_collar_diameters_mm = []
-        self.data_input_tab = DataInputTab()
-        self.casing_tab = DbCalculator()
+        self.data_input_tab = data_input_tab
+        self.casing_tab = casing_tab
+        self.formation = None
+        self.formation_path = None
+        self.catalog_watcher = None
+        self.factors = DEFAULT_FACTORS
         self.df = None
         self.additional_columns = []
         self.nearest_bit_sizes = []
+        self.drill_collars = {}
+        self.collar_targets = {}
+        self.collar_sections = []
         self.drill_pipe_data = {}
+        self.interval_results = []
         self.setup_ui()
+        self.load_saved_data()
         
     def setup_ui(self):
         QFontDatabase.addApplicationFont("fonts/Roboto-Bold.ttf")
@@ -112,10 +133,20 @@ class WellDataApp(QWidget):
         self.upload_file_btn = self.create_button("Upload Drill Collar Table", "icons/upload.png", self.upload_excel_file)
         self.calculate_drill_collar_btn = self.create_button("Calculate Drill Collar", "icons/drill.png", self.calculate_drill_collar)
         self.calculate_data_btn = self.create_button("Calculate Data", "icons/calculate.png", self.calculate_and_display)
+        self.sensitivity_btn = self.create_button("Sensitivity", "icons/calculate.png", self.calculate_sensitivity)
+        self.inverse_btn = self.create_button("Inverse Solve", "icons/calculate.png", self.calculate_inverse)
+        self.taper_btn = self.create_button("Tapered String", "icons/calculate.png", self.calculate_taper)
+        self.bha_btn = self.create_button("BHA Sweep", "icons/calculate.png", self.calculate_bha)
+        self.export_report_btn = self.create_button("Export Report", "icons/export.png", self.export_report)
         
         top_bar.addWidget(self.upload_file_btn)
         top_bar.addWidget(self.calculate_drill_collar_btn)
         top_bar.addWidget(self.calculate_data_btn)
+        top_bar.addWidget(self.sensitivity_btn)
+        top_bar.addWidget(self.inverse_btn)
+        top_bar.addWidget(self.taper_btn)
+        top_bar.addWidget(self.bha_btn)
+        top_bar.addWidget(self.export_report_btn)
         top_bar.addStretch()
         
         main_layout.addLayout(top_bar)
@@ -165,6 +196,7 @@ class WellDataApp(QWidget):
         if file_path:
             try:
                 self.load_drill_collar_data(file_path)
+                self.save_data()
                 QMessageBox.information(self, "Success", "Drill Collar Table loaded successfully!")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to load Excel file. Error: {e}")
@@ -172,33 +204,54 @@ class WellDataApp(QWidget):
             QMessageBox.warning(self, "No File Selected", "Please select an Excel file.")
 
     def load_drill_collar_data(self, file_path):
+        # Wells share one parsed FormationTable per path instead of a DataFrame each.
+        formation = acquire_formation(file_path)
+        self.release_shared_data()
+        self.formation_path = file_path
+        self.saved_formation_path = None
+        self.use_formation(formation)
+        if self.catalog_watcher is not None:
+            self.catalog_watcher.watch_formation(file_path)
+
+    def save_data(self):
+        with open(self.data_file, 'w') as f:
+            json.dump({'formation_path': self.formation_path}, f)
+
+    def load_saved_data(self):
+        # The table is only remembered here; restore_formation loads it on first use,
+        # by then usually parsed by the prefetch MainWindow started.
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'r') as f:
+                self.saved_formation_path = json.load(f).get('formation_path')
+
+    def restore_formation(self):
+        path = self.saved_formation_path
+        if self.formation is not None or not path or not os.path.exists(path):
+            return
         try:
-            self.df = pd.read_excel(file_path, sheet_name='sheet1')
-            self.df.columns = self.df.columns.str.strip()
-            self.df.rename(columns={
-                'Drill pipe Metal grade': 'Drill pipe Metal grade',
-                'Minimum tensile strength(psi)': 'Minimum tensile strength(psi)',
-                'Minimum tensile strength(mpi)': 'Minimum tensile strength(mpi)'
-            }, inplace=True)
-            
-            self.drill_collar_diameters_mm = pd.to_numeric(self.df['Drilling collars outer diameter'], errors='coerce').dropna().values
-            self.drill_collar_diameters_mm = self.drill_collar_diameters_mm.astype(float)
-            
-            self.additional_columns = [
-                'Outer diameter', 'AP', 'AIP', 'Mp', 'qp', 'b', 'γ'
-            ]
-            
-            self.df['qp'] = self.df['qp'].astype(float)
-            self.df['γ'] = self.df['γ'].astype(float)
-            
-            self.drill_pipe_data = {
-                'Drill pipe Metal grade': self.df['Drill pipe Metal grade'].unique().tolist(),
-                'Minimum tensile strength(psi)': self.df['Minimum tensile strength(psi)'].unique().tolist(),
-                'Minimum tensile strength(mpi)': self.df['Minimum tensile strength(mpi)'].unique().tolist()
-            }
-            
-        except Exception as e:
-            raise Exception(f"Error loading drill collar data: {e}")
+            self.load_drill_collar_data(path)
+        except Exception:
+            # Left unloaded, so the usual "upload an Excel file" message shows.
+            self.saved_formation_path = None
+
+    def use_formation(self, formation):
+        self.formation = formation
+        self.df = formation.df
+        self.drill_collar_diameters_mm = formation.drill_collar_diameters_mm
+        self.additional_columns = list(ADDITIONAL_COLUMNS)
+        self.drill_pipe_data = formation.drill_pipe_data
+
+    def swap_formation(self, path, formation):
+        if self.formation_path is not None and os.path.abspath(self.formation_path) == path:
+            self.use_formation(formation)
+            return True
+        return False
+
+    def release_shared_data(self):
+        if self.formation_path is not None:
+            release_formation(self.formation_path)
+        self.formation = None
+        self.formation_path = None
 
     def nearest_drill_collar(self, value):
         if len(self.drill_collar_diameters_mm) == 0:
@@ -208,17 +261,18 @@ class WellDataApp(QWidget):
         return self.drill_collar_diameters_mm[idx]
     
     def calculate_drill_collar(self):
+        self.restore_formation()
         if len(self.drill_collar_diameters_mm) == 0:
             self.result_text.setHtml("<p style='color: #F44747;'>No Drill Collar Table loaded. Please upload an Excel file.</p>")
             return
         
-        initial_dcsg, at_head_values, nearest_bit_sizes, _ = self.casing_tab.get_all_dcsg_values()
+        initial_dcsg, at_head_values, nearest_bit_sizes, names = self.casing_tab.get_all_dcsg_values()
         if initial_dcsg and at_head_values and nearest_bit_sizes:
-            self.display_drill_collar_results(initial_dcsg, at_head_values, nearest_bit_sizes)
+            self.display_drill_collar_results(initial_dcsg, at_head_values, nearest_bit_sizes, names)
         else:
             self.result_text.setHtml("<p style='color: #F44747;'>Unable to retrieve Dcsg values. Please check the Casing tab.</p>")
 
-    def display_drill_collar_results(self, initial_dcsg, at_head_values, nearest_bit_sizes):
+    def display_drill_collar_results(self, initial_dcsg, at_head_values, nearest_bit_sizes, names=None):
         self.nearest_bit_sizes = nearest_bit_sizes
         html_result = """
         <style>
@@ -237,21 +291,17 @@ class WellDataApp(QWidget):
         """
         
         all_values = list(zip([initial_dcsg] + at_head_values, nearest_bit_sizes))
-        total_iterations = len(all_values)
-        
-        for i, (at_head, bit_size) in enumerate(all_values):
+        # Collars are named after the casing section they drill, so a chain cut short
+        # keeps Production/Intermediate names instead of relabelling its last collar.
+        self.collar_sections = list(names or section_names(len(all_values)))[:len(all_values)]
+        self.drill_collars = {}
+        self.collar_targets = {}
+
+        for section_name, (at_head, bit_size) in zip(self.collar_sections, all_values):
             drill_collar = 2 * float(at_head) - bit_size
             nearest_drill_collar = self.nearest_drill_collar(drill_collar)
-
-            if i == 0:
-                section_name = "Production"
-                self.drill_collar_production = nearest_drill_collar
-            elif i == total_iterations - 1:
-                section_name = "Surface"
-                self.drill_collar_surface = nearest_drill_collar
-            else:
-                section_name = "Intermediate"
-                self.drill_collar_intermediate = nearest_drill_collar
+            self.drill_collars[section_name] = nearest_drill_collar
+            self.collar_targets[section_name] = drill_collar
             
             html_result += f"""
             <tr>
@@ -265,116 +315,290 @@ class WellDataApp(QWidget):
         html_result += "</table>"
         self.result_text.setHtml(html_result)
 
-    def get_data_for_gamma(self, gamma_value):
-        if self.df is None:
-            return None
-        try:
-            gamma_value = float(gamma_value)
-            matching_rows = self.df[np.isclose(self.df['γ'], gamma_value, atol=1e-8)]
-            
-            if matching_rows.empty:
-                return None
-            
-            row = matching_rows.iloc[0]
-            return {col: row[col] for col in self.additional_columns}
-        
-        except (ValueError, IndexError):
-            return None
-
-    def find_nearest(self, array, value):
-        array = np.array(array)
-        valid = ~np.isnan(array)
-        return array[valid][np.argmin(np.abs(array[valid] - value))]
-
     def calculate_and_display(self):
         data = self.data_input_tab.get_data()
         calculation_html = "<h3>Results:</h3>"
+        self.interval_results = []
 
         try:
-            required_fields = ['WOB', 'C', 'qc', 'H', 'Lhw', 'qp', 'P', 'γ']
-            for field in required_fields:
-                for i in range(1, 4):
-                    if not data.get(f"{field}_{i}"):
-                        raise ValueError(f"Field '{field}' (Instance {i}) is empty")
-
-            for i in range(1, 4):
-                WOB = float(data[f'WOB_{i}'])
-                C = float(data[f'C_{i}'])
-                qc = float(data[f'qc_{i}'])
-                H = float(data[f'H_{i}'])
-                Lhw = float(data[f'Lhw_{i}'])
-                qp = float(data[f'qp_{i}'])
-                P = float(data[f'P_{i}'])
-                γ = float(data[f'γ_{i}'])
-                K1 = float(data['K1'])
-                K2 = float(data['K2'])
-                K3 = float(data['K3'])
-                dα = float(data['dα'])
-                Dep = float(data['Dep'])
-                Dhw = float(data['Dhw'])
-                n = float(data['n'])
-
-                additional_data = self.get_data_for_gamma(γ)
-                if additional_data:
-                    b = additional_data.get('b', 0)
-                    Mp = additional_data.get('Mp', 0)
-                else:
-                    b = float(data[f'b_{i}'])
-                    Mp = float(data[f'Mp_{i}'])
-
-                L0c = WOB / (C * qc * b)
-                Lp = H - (Lhw + L0c)
-
-                if additional_data:
-                    Ap = additional_data.get('AP', 0)
-                    Aip = additional_data.get('AIP', 0)
-                    qhw = float(data['qhw'])
-
-                    T = ((1.08 * Lp * qp + Lhw * qhw + L0c * qc) * b) / Ap
-                    Tc = T + P * (Aip / Ap)
-                    Tec = Tc * K1 * K2 * K3
-
-                    if i == 1:
-                        dec = self.drill_collar_production / 1000
-                    elif i == 2:
-                        dec = self.drill_collar_intermediate / 1000
-                    else:
-                        dec = self.drill_collar_surface / 1000
-
-                    Np = dα * γ * (Lp * Dep**2 + L0c * dec**2 + Lhw * Dhw**2) * n**1.7
-
-                    DB = self.nearest_bit_sizes[-i] / 1000
-                    NB = 3.2 * 10**-2 * (WOB**0.5) * (DB**1.75) * n
-
-                    tau = (30 * ((Np + NB) * 10**3 / (pi * n * Mp))) * 10**-6
-
-                    eq = sqrt((Tec*10**-1)**2 + 4*tau**2)
-                    C_new = eq * 1.5
-
-                    nearest_mpi = self.find_nearest(self.drill_pipe_data['Minimum tensile strength(mpi)'], C_new)
-                    metal_grade_index = self.drill_pipe_data['Minimum tensile strength(mpi)'].index(nearest_mpi)
-                    metal_grade = self.drill_pipe_data['Drill pipe Metal grade'][metal_grade_index]
-
-                    SegmaC = nearest_mpi
-
-                    numerator = ((SegmaC/1.5)**2 - 4 * tau**2) * 10**12
-                    denominator = ((7.85 - 1.5)**2) * 10**8
-                    sqrt_result = sqrt(numerator / denominator)
-                    Lmax = sqrt_result - ((L0c*qc + Lhw*qhw) / qp)
-
-                    calculation_html += f"""
-                    <h4>Instance {i}:</h4>
-                    <p><strong>Drill pipe Metal grade:</strong> {metal_grade}</p>
-                    <p><strong>Lmax:</strong> {Lmax:.2f}</p>
-                    <br>
-                    """
-
-                else:
-                    calculation_html += f"<p style='color: #F44747;'>No additional data found for the given γ value: {γ}</p>"
+            sections, collars, bit_sizes, inputs = self.interval_inputs(data)
+            count = len(sections)
+            results = evaluate_intervals(self.formation, factors=self.factors, **inputs)
+
+            for row in range(count):
+                i = row + 1
+                error = results['error'][row]
+                if error is not None and error.startswith("No additional data"):
+                    calculation_html += f"<p style='color: #F44747;'>{error}</p>"
+                    continue
+                if collars[row] is None:
+                    raise ValueError(f"No drill collar for the {sections[row]} section. Please calculate drill collars first.")
+                if bit_sizes[row] is None:
+                    raise ValueError(f"No bit size for the {sections[row]} section. Please check the Casing tab.")
+                if error == "math domain error":
+                    raise ValueError(error)
+                if error is not None:
+                    raise ZeroDivisionError(error)
+
+                metal_grade = results['metal_grade'][row]
+                Lmax = float(results['Lmax'][row])
+                self.interval_results.append({
+                    'interval': i,
+                    'section': sections[row],
+                    'H': float(results['H'][row]),
+                    'metal_grade': metal_grade,
+                    'Tec': float(results['Tec'][row]),
+                    'tau': float(results['tau'][row]),
+                    'Lmax': Lmax
+                })
+
+                calculation_html += f"""
+                <h4>Instance {i} ({sections[row]}):</h4>
+                <p><strong>Drill pipe Metal grade:</strong> {metal_grade}</p>
+                <p><strong>Lmax:</strong> {Lmax:.2f}</p>
+                <br>
+                """
 
         except ValueError as e:
             calculation_html += f"<p style='color: #F44747;'>Error in calculations: {str(e)}</p>"
         except Exception as e:
             calculation_html += f"<p style='color: #F44747;'>Unexpected error: {str(e)}</p>"
 
+        trace(logger, "drill pipe", well=self.well_name, intervals=self.interval_results)
         self.calculation_text.setHtml(calculation_html)
+
+    def calculate_sensitivity(self):
+        data = self.data_input_tab.get_data()
+        html = "<h3>Sensitivity:</h3>"
+        try:
+            sections, collars, bit_sizes, inputs = self.interval_inputs(data)
+            report = sensitivity(self.formation, inputs, factors=self.factors)
+        except ValueError as e:
+            self.calculation_text.setHtml(f"{html}<p style='color: #F44747;'>Error in calculations: {str(e)}</p>")
+            return
+
+        for row, section in enumerate(sections):
+            html += f"<h4>Instance {row + 1} ({section}):</h4>"
+            error = report['base']['error'][row]
+            if collars[row] is None:
+                error = f"No drill collar for the {section} section. Please calculate drill collars first."
+            elif bit_sizes[row] is None:
+                error = f"No bit size for the {section} section. Please check the Casing tab."
+            if error is not None:
+                html += f"<p style='color: #F44747;'>{error}</p>"
+                continue
+            html += (f"<p><strong>Drill pipe Metal grade:</strong> {report['base']['metal_grade'][row]}"
+                     f" &nbsp; <strong>Lmax:</strong> {report['base']['Lmax'][row]:.2f}</p>")
+            html += self.sensitivity_table(report, row)
+        self.calculation_text.setHtml(html)
+
+    def sensitivity_table(self, report, row):
+        cell = "style='padding: 4px; border: 1px solid #555; text-align: right;'"
+        html = f"""
+        <table style='border-collapse: collapse; width: 100%;'>
+            <tr style='background-color: {Colors.ACCENT};'>
+                <th>Input</th><th>Value</th><th>dLmax</th><th>dTec</th><th>dτ</th><th>Elasticity</th>
+                <th>Grade at ±{FLIP_FRACTION:.0%}</th>
+            </tr>
+        """
+        for name in ranked_parameters(report, row):
+            derivative = report['derivative'][name]
+            lower, upper = (grades[row] for grades in report['flip_grades'][name])
+            flip = report['grade_flip'][name][row]
+            grade_style = "color: #F44747; font-weight: bold;" if flip else ""
+            html += f"""
+            <tr>
+                <td style='padding: 4px; border: 1px solid #555;'>{INPUT_LABELS.get(name, name)}</td>
+                <td {cell}>{report['value'][name][row]:.6g}</td>
+                <td {cell}>{derivative['Lmax'][row]:.4g}</td>
+                <td {cell}>{derivative['Tec'][row]:.4g}</td>
+                <td {cell}>{derivative['tau'][row]:.4g}</td>
+                <td {cell}>{report['elasticity'][name][row]:.3f}</td>
+                <td style='padding: 4px; border: 1px solid #555; text-align: center; {grade_style}'>{lower} / {upper}</td>
+            </tr>
+            """
+        return html + "</table>"
+
+    def calculate_inverse(self, variable=None):
+        if not variable:
+            variable, ok = QInputDialog.getItem(self, "Inverse Solve", "Largest value of:", SOLVE_FOR, 0, False)
+            if not ok:
+                return
+        data = self.data_input_tab.get_data()
+        html = f"<h3>Maximum {variable} for Lmax ≥ H, C_new ≤ SegmaC and Lp ≥ 0:</h3>"
+        try:
+            sections, collars, bit_sizes, inputs = self.interval_inputs(data)
+            result = max_input(self.formation, inputs, variable, factors=self.factors)
+        except ValueError as e:
+            self.calculation_text.setHtml(f"{html}<p style='color: #F44747;'>Error in calculations: {str(e)}</p>")
+            return
+
+        cell = "style='padding: 4px; border: 1px solid #555; text-align: right;'"
+        for row, section in enumerate(sections):
+            html += (f"<h4>Instance {row + 1} ({section}), H = {result['target'][row]:.2f}, "
+                     f"{variable} ≤ {result['upper_bound']:.0f}:</h4>")
+            if collars[row] is None or bit_sizes[row] is None:
+                html += f"<p style='color: #F44747;'>No drill collar or bit size for the {section} section.</p>"
+                continue
+            html += f"""
+            <table style='border-collapse: collapse; width: 100%;'>
+                <tr style='background-color: {Colors.ACCENT};'>
+                    <th>Grade</th><th>Max {variable}</th><th>Lmax</th><th>C_new</th><th>Lp</th><th>Status</th><th>Limited By</th>
+                </tr>
+            """
+            for col, grade in enumerate(result['grades']):
+                status = result['status'][row][col]
+                status_style = "" if status == "ok" else "color: #F44747;"
+                html += f"""
+                <tr>
+                    <td style='padding: 4px; border: 1px solid #555;'>{grade}</td>
+                    <td {cell}>{result['value'][row][col]:.2f}</td>
+                    <td {cell}>{result['Lmax'][row][col]:.2f}</td>
+                    <td {cell}>{result['C_new'][row][col]:.2f}</td>
+                    <td {cell}>{result['Lp'][row][col]:.2f}</td>
+                    <td style='padding: 4px; border: 1px solid #555; {status_style}'>{status}</td>
+                    <td style='padding: 4px; border: 1px solid #555;'>{result['binding'][row][col] or ""}</td>
+                </tr>
+                """
+            html += "</table>"
+        self.calculation_text.setHtml(html)
+
+    def calculate_taper(self):
+        data = self.data_input_tab.get_data()
+        html = "<h3>Lightest Tapered Drill Pipe String:</h3>"
+        try:
+            sections, collars, bit_sizes, inputs = self.interval_inputs(data)
+            results = optimize_taper(self.formation, inputs, factors=self.factors)
+        except ValueError as e:
+            self.calculation_text.setHtml(f"{html}<p style='color: #F44747;'>Error in calculations: {str(e)}</p>")
+            return
+
+        cell = "style='padding: 4px; border: 1px solid #555; text-align: right;'"
+        for row, (section, result) in enumerate(zip(sections, results)):
+            html += f"<h4>Instance {row + 1} ({section}), drill pipe length = {result['Lp']:.2f} m:</h4>"
+            if collars[row] is None or bit_sizes[row] is None:
+                html += f"<p style='color: #F44747;'>No drill collar or bit size for the {section} section.</p>"
+                continue
+            if result['error']:
+                html += f"<p style='color: #F44747;'>{result['error']}</p>"
+                continue
+            if result['weight'] is None:
+                html += f"<p style='color: #F44747;'>No combination of up to {MAX_SECTIONS} sections carries the load ({result['stacks']} tried).</p>"
+                continue
+            if not result['sections']:
+                html += "<p>The collars and heavy-weight pipe reach H; no drill pipe is needed.</p>"
+                continue
+            html += f"""
+            <table style='border-collapse: collapse; width: 100%;'>
+                <tr style='background-color: {Colors.ACCENT};'>
+                    <th>Section</th><th>Pipe</th><th>qp (kg/m)</th><th>Grade</th><th>Length (m)</th>
+                    <th>C_new at top</th><th>Strength</th>
+                </tr>
+            """
+            for number, pipe in enumerate(result['sections'], 1):
+                html += f"""
+                <tr>
+                    <td style='padding: 4px; border: 1px solid #555;'>{number}</td>
+                    <td style='padding: 4px; border: 1px solid #555;'>{pipe['size']}</td>
+                    <td {cell}>{pipe['qp']:.2f}</td>
+                    <td style='padding: 4px; border: 1px solid #555;'>{pipe['grade']}</td>
+                    <td {cell}>{pipe['length']:.2f}</td>
+                    <td {cell}>{pipe['top_C_new']:.2f}</td>
+                    <td {cell}>{pipe['strength']:.2f}</td>
+                </tr>
+                """
+            html += "</table>"
+            html += (f"<p>String weight: {result['weight']:.2f} kg, "
+                     f"{result['feasible_stacks']} of {result['stacks']} combinations feasible. "
+                     "Section 1 sits on the heavy-weight pipe.</p>")
+        self.calculation_text.setHtml(html)
+
+    def calculate_bha(self):
+        data = self.data_input_tab.get_data()
+        html = "<h3>BHA Design Sweep over the Drill Collar Table:</h3>"
+        try:
+            sections, collars, bit_sizes, inputs = self.interval_inputs(data)
+            targets = [self.collar_targets.get(section, np.nan) for section in sections]
+            sweep = bha_sweep(self.formation, inputs, targets=targets, factors=self.factors)
+        except ValueError as e:
+            self.calculation_text.setHtml(f"{html}<p style='color: #F44747;'>Error in calculations: {str(e)}</p>")
+            return
+
+        cell = "style='padding: 4px; border: 1px solid #555; text-align: right;'"
+        for row, section in enumerate(sections):
+            html += f"<h4>Instance {row + 1} ({section}):</h4>"
+            if collars[row] is None or bit_sizes[row] is None:
+                html += f"<p style='color: #F44747;'>No drill collar or bit size for the {section} section.</p>"
+                continue
+            html += (f"<p>Collar OD from {targets[row]:.2f} mm up to the {bit_sizes[row]:.2f} mm bit; "
+                     f"{int(sweep['feasible'][row].sum())} of {len(sweep['diameters'])} collars feasible. "
+                     "* marks the collar picked on the Drill Collar panel.</p>")
+            html += f"""
+            <table style='border-collapse: collapse; width: 100%;'>
+                <tr style='background-color: {Colors.ACCENT};'>
+                    <th>Collar OD (mm)</th><th>qc</th><th>L0c</th><th>Neutral point</th><th>BHA length</th>
+                    <th>BHA weight</th><th>Np</th><th>tau</th><th>Lmax</th><th>Lmax - Lp</th><th>Grade</th>
+                </tr>
+            """
+            for col in sweep['ranking'][row]:
+                style = "" if sweep['feasible'][row][col] else "color: #808080;"
+                marker = " *" if sweep['selected'][row][col] else ""
+                values = [sweep[key][row][col] for key in ('qc', 'L0c', 'neutral_point', 'bha_length', 'bha_weight',
+                                                           'Np', 'tau', 'Lmax', 'margin')]
+                grade = sweep['error'][row][col] or sweep['metal_grade'][row][col]
+                html += f"<tr style='{style}'><td style='padding: 4px; border: 1px solid #555;'>{sweep['diameters'][col]:.1f}{marker}</td>"
+                html += "".join(f"<td {cell}>{value:.2f}</td>" for value in values)
+                html += f"<td style='padding: 4px; border: 1px solid #555;'>{grade}</td></tr>"
+            html += "</table>"
+        self.calculation_text.setHtml(html)
+
+    def interval_inputs(self, data):
+        # evaluate_intervals keyword arguments for every interval on the Data Input tab.
+        self.restore_formation()
+        required_fields = ['WOB', 'C', 'qc', 'H', 'Lhw', 'qp', 'P', 'γ']
+        count = interval_count(data)
+        for field in required_fields:
+            for i in range(1, count + 1):
+                if not data.get(f"{field}_{i}"):
+                    raise ValueError(f"Field '{field}' (Instance {i}) is empty")
+        if self.formation is None:
+            raise ValueError("No Drill Collar Table loaded. Please upload an Excel file.")
+
+        inputs = {field: [float(data[f'{field}_{i}']) for i in range(1, count + 1)] for field in required_fields}
+        inputs.update({field: float(data[field]) for field in ['K1', 'K2', 'K3', 'dα', 'Dep', 'Dhw', 'qhw', 'n']})
+        sections = [interval_section(data, i) for i in range(1, count + 1)]
+        collars = [self.drill_collar_for(section) for section in sections]
+        bit_sizes = [self.bit_size_for(section) for section in sections]
+        inputs['dec'] = [np.nan if value is None else value / 1000 for value in collars]
+        inputs['DB'] = [np.nan if value is None else value / 1000 for value in bit_sizes]
+        return sections, collars, bit_sizes, inputs
+
+    def drill_collar_for(self, section):
+        return self.drill_collars.get(section)
+
+    def bit_size_for(self, section):
+        # Intervals keep the pairing of the original three instances: the k-th
+        # section drills with nearest_bit_sizes[-k].
+        if section not in self.collar_sections:
+            return None
+        position = self.collar_sections.index(section) + 1
+        if position > len(self.nearest_bit_sizes):
+            return None
+        return self.nearest_bit_sizes[-position]
+
+    def export_report(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Report", "", "Excel Files (*.xlsx);;Word Files (*.docx)")
+        if not file_path:
+            return
+
+        report = collect_well_report(self.well_name, self.casing_tab, self)
+        try:
+            if file_path.lower().endswith('.docx'):
+                export_docx(file_path, [report])
+            else:
+                if not file_path.lower().endswith('.xlsx'):
+                    file_path += '.xlsx'
+                export_xlsx(file_path, [report])
+            QMessageBox.information(self, "Success", f"Report exported to {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export report. Error: {e}")
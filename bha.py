@@ -0,0 +1,81 @@
+import numpy as np
+from drill_pipe import evaluate_intervals
+from design_factors import DEFAULT_FACTORS
+
+# Collar bore (2 13/16 in) for the steel weight of collars with no entered qc.
+COLLAR_BORE = 0.0714
+
+
+def collar_weights(qc, dec, diameters, bore=COLLAR_BORE, factors=DEFAULT_FACTORS):
+    # qc is entered for the selected collar; the other diameters scale it by the
+    # outer diameter squared, the steel density cancelling out. Intervals without
+    # a selected collar get the steel weight of a collar with the standard bore,
+    # from the profile's steel factor (t/m3).
+    diameters = np.asarray(diameters, dtype=float)[None, :]
+    qc, dec = np.asarray(qc, dtype=float)[:, None], np.asarray(dec, dtype=float)[:, None]
+    steel = factors.steel_factor * 1000 * np.pi / 4 * (diameters**2 - bore**2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = qc * (diameters / dec)**2
+    return np.where(np.isfinite(scaled), scaled, steel)
+
+
+def bha_sweep(table, inputs, diameters=None, targets=None, factors=DEFAULT_FACTORS):
+    # Every collar diameter of the table (mm) against every interval in one
+    # evaluate_intervals call, rows ordered (interval, diameter). inputs are the
+    # evaluate_intervals keyword arguments of the selected collars; targets are the
+    # 2 * at_head - bit size values (mm) the collars were picked from.
+    count = len(np.atleast_1d(inputs['WOB']))
+    diameters = np.array(table.drill_collar_diameters_mm if diameters is None else diameters, dtype=float)
+    columns = {name: np.broadcast_to(np.asarray(value, dtype=float), (count,)) for name, value in inputs.items()}
+    shape = (count, len(diameters))
+
+    qc = collar_weights(columns['qc'], columns['dec'], diameters / 1000, factors=factors)
+    batch = {name: np.repeat(column, len(diameters)) for name, column in columns.items()}
+    batch['dec'] = np.tile(diameters / 1000, count)
+    batch['qc'] = qc.ravel()
+    results = evaluate_intervals(table, factors=factors, **batch)
+
+    def grid(key):
+        return np.asarray(results[key], dtype=float).reshape(shape)
+
+    error = np.array([error is not None for error in results['error']]).reshape(shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        L0c, Lp, Lmax = grid('L0c'), grid('Lp'), grid('Lmax')
+        # The collars above WOB / (qc * b) hang in tension.
+        neutral_point = columns['C'][:, None] * L0c
+        bha_weight = L0c * qc + columns['Lhw'][:, None] * columns['qhw'][:, None]
+        margin = Lmax - Lp
+        fits = diameters[None, :] < columns['DB'][:, None] * 1000
+        if targets is None:
+            stiff = np.ones(shape, dtype=bool)
+        else:
+            # The collar picked from the target is allowed even if it is the nearest one below.
+            smallest = np.fmin(np.asarray(targets, dtype=float), columns['dec'] * 1000)
+            stiff = diameters[None, :] >= smallest[:, None] - 1e-6
+        feasible = ~error & fits & stiff & (Lp > 0) & (margin >= 0)
+
+    selected = np.abs(diameters[None, :] - columns['dec'][:, None] * 1000) < 1e-6
+    # Feasible collars first, the largest Lmax - Lp margin leading.
+    order = np.lexsort((-np.where(np.isfinite(margin), margin, -np.inf), ~feasible), axis=1)
+    return {
+        'diameters': diameters,
+        'qc': qc,
+        'L0c': L0c,
+        'Lhw': np.broadcast_to(columns['Lhw'][:, None], shape),
+        'neutral_point': neutral_point,
+        'bha_length': L0c + columns['Lhw'][:, None],
+        'bha_weight': bha_weight,
+        'Lp': Lp,
+        'Np': grid('Np'),
+        'tau': grid('tau'),
+        'C_new': grid('C_new'),
+        'Lmax': Lmax,
+        'margin': margin,
+        'metal_grade': np.array(results['metal_grade'], dtype=object).reshape(shape),
+        'error': np.array(results['error'], dtype=object).reshape(shape),
+        'fits': fits,
+        'stiff': stiff,
+        'feasible': feasible,
+        'selected': selected,
+        'ranking': order
+    }
@@ -0,0 +1,85 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOGGER_NAME = "welldata"
+# Stage traces are DEBUG records; at the default level they are dropped by the
+# isEnabledFor check before any record is built.
+DEFAULT_LEVEL = "WARNING"
+
+_listener = None
+_queue_handler = None
+_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    # The queue never leaves this process, so the record goes on as it is and the
+    # message and JSON are formatted on the listener thread, not by the caller.
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=None, path=None, stream=None):
+    # Level and destination default to WELLDATA_LOG_LEVEL and WELLDATA_LOG_FILE;
+    # without a file, records go to stderr. Safe to call more than once.
+    global _listener, _queue_handler, _registered
+    logger = logging.getLogger(LOGGER_NAME)
+    level = str(level or os.environ.get("WELLDATA_LOG_LEVEL") or DEFAULT_LEVEL).upper()
+    logger.setLevel(level if isinstance(logging.getLevelName(level), int) else DEFAULT_LEVEL)
+    if _listener is None:
+        path = path or os.environ.get("WELLDATA_LOG_FILE")
+        handler = logging.FileHandler(path) if path else logging.StreamHandler(stream or sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        records = queue.SimpleQueue()
+        _listener = QueueListener(records, handler)
+        _listener.start()
+        _queue_handler = DeferredQueueHandler(records)
+        logger.addHandler(_queue_handler)
+        logger.propagate = False
+        if not _registered:
+            atexit.register(stop_logging)
+            _registered = True
+    return logger
+
+
+def stop_logging():
+    # Drains the queue and detaches it, so nothing queues up unread afterwards;
+    # until the next setup_logging only Python's last-resort handler prints warnings.
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+def get_logger(stage):
+    return logging.getLogger(f"{LOGGER_NAME}.{stage}")
+
+
+def trace(logger, message, **fields):
+    # One JSON record per calculation stage. fields are kept by reference and only
+    # serialised by the listener, so pass values that are final.
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, extra={'fields': fields})
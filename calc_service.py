@@ -0,0 +1,392 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import time
+import urllib.request
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from calc_logging import setup_logging
+from catalog import load_catalog
+from drill_pipe import load_formation, calculate_interval
+from grade_sweep import evaluate_grade
+from records import to_dicts
+from shared_catalog import SharedTables, attach
+
+HOST = "127.0.0.1"
+ENDPOINTS = {
+    '/casing-chain': 'casing_chain',
+    '/had': 'had',
+    '/drill-pipe': 'drill_pipe'
+}
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+# Largest request body read; a drill-pipe batch of a few thousand intervals fits.
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+_worker_state = {}
+
+
+def _init_worker(manifest):
+    _worker_state['catalog'], _worker_state['formation'] = attach(manifest)
+
+
+def run_batch(kind, payloads):
+    # Runs in a pool worker; every payload gets its own (ok, result) pair so one bad
+    # request never fails the rest of its batch.
+    handler = BATCH_HANDLERS[kind]
+    results = []
+    for payload in payloads:
+        try:
+            results.append((True, handler(payload)))
+        except Exception as e:
+            results.append((False, str(e)))
+    return results
+
+
+def casing_chain(payload):
+    catalog = _require('catalog')
+    at_head = catalog.at_head_for_dcsg(payload['dcsg'])
+    if at_head is None:
+        raise ValueError(f"No matching Dcsg amount ({payload['dcsg']}) found in the catalog.")
+    sections = catalog.chain_graph().resolve(at_head, payload['multipliers'])
+    for section in sections:
+        section['at_body'] = catalog.at_body_for(section['at_head'])
+    return {'sections': sections}
+
+
+def had(payload):
+    catalog = _require('catalog')
+    result = evaluate_grade(catalog, payload.get('section', "Production Section"), float(payload['at_head']),
+                            float(payload['depth']), payload['metal_type'])
+    if 'candidates' in result:
+        result['candidates'] = to_dicts(result['candidates'])
+    for key, value in result.items():
+        if isinstance(value, float) and abs(value) == float('inf'):
+            result[key] = None
+    return result
+
+
+def drill_pipe(payload):
+    formation = _require('formation')
+    common = payload.get('common', {})
+    results = []
+    for interval in payload['intervals']:
+        params = {key: float(value) for key, value in dict(common, **interval).items()}
+        result = calculate_interval(formation, **params)
+        result['SegmaC'] = float(result['SegmaC'])
+        results.append(result)
+    return {'intervals': results}
+
+
+BATCH_HANDLERS = {
+    'casing_chain': casing_chain,
+    'had': had,
+    'drill_pipe': drill_pipe
+}
+
+
+def _require(name):
+    value = _worker_state.get(name)
+    if value is None:
+        raise ValueError(f"The service was started without a {name} table.")
+    return value
+
+
+class RequestError(ValueError):
+    # A request that cannot be read; answered with status and the connection closed.
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class Metrics:
+    def __init__(self, window=1000):
+        self.started = time.time()
+        self.requests = {}
+        self.errors = {}
+        self.latencies = {}
+        self.batches = 0
+        self.batched_requests = 0
+        self.window = window
+
+    def record(self, endpoint, seconds, ok):
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        self.latencies.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+
+    def snapshot(self, queue_depth, in_flight):
+        latency = {}
+        for endpoint, values in self.latencies.items():
+            ordered = sorted(values)
+            latency[endpoint] = {
+                'p50_ms': ordered[len(ordered) // 2] * 1000,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+                'max_ms': ordered[-1] * 1000
+            }
+        return {
+            'uptime_s': time.time() - self.started,
+            'requests': self.requests,
+            'errors': self.errors,
+            'latency': latency,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_requests / self.batches if self.batches else 0,
+            'queue_depth': queue_depth,
+            'in_flight_batches': in_flight
+        }
+
+
+class CalculationService:
+    def __init__(self, casing_path=None, formation_path=None, workers=None,
+                 batch_size=32, batch_window=0.005, max_in_flight=None, max_body=MAX_BODY_BYTES):
+        self.casing_path = casing_path
+        self.formation_path = formation_path
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_in_flight = max_in_flight
+        self.max_body = max_body
+        self.metrics = Metrics()
+        self.queues = {}
+        self.in_flight = 0
+        self.executor = None
+        self.shared = None
+        self.server = None
+        self._limit = None
+        self._batchers = []
+        self._running = set()
+
+    async def start(self, port=0):
+        # Parse once here; workers map the parsed columns from shared memory.
+        self.shared = SharedTables(load_catalog(self.casing_path) if self.casing_path else None,
+                                   load_formation(self.formation_path) if self.formation_path else None)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.shared.manifest,))
+        self._limit = asyncio.Semaphore(self.max_in_flight or self.workers or os.cpu_count() or 1)
+        for kind in BATCH_HANDLERS:
+            self.queues[kind] = asyncio.Queue()
+            self._batchers.append(asyncio.create_task(self._batch_loop(kind)))
+        self.server = await asyncio.start_server(self._handle_connection, HOST, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        # Batches still running are cancelled and answered before the pool goes, and
+        # the pool is shut down off the event loop since that waits for the workers.
+        if self.server is not None:
+            self.server.close()
+        tasks = self._batchers + list(self._running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._batchers = []
+        for queue in self.queues.values():
+            _reject([queue.get_nowait() for _ in range(queue.qsize())])
+        if self.executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self.executor.shutdown, wait=True, cancel_futures=True))
+            self.executor = None
+        if self.server is not None:
+            await self.server.wait_closed()
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+
+    async def submit(self, kind, payload):
+        future = asyncio.get_running_loop().create_future()
+        await self.queues[kind].put((payload, future))
+        return await future
+
+    async def _batch_loop(self, kind):
+        queue = self.queues[kind]
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = loop.time() + self.batch_window
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._limit.acquire()
+                task = asyncio.create_task(self._run(kind, batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                batch = []
+        except asyncio.CancelledError:
+            _reject(batch)
+            raise
+
+    async def _run(self, kind, batch):
+        self.in_flight += 1
+        self.metrics.batches += 1
+        self.metrics.batched_requests += len(batch)
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, run_batch, kind, [payload for payload, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result((False, str(e)))
+        except asyncio.CancelledError:
+            _reject(batch)
+            raise
+        finally:
+            self.in_flight -= 1
+            self._limit.release()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, response = await self._dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                self._write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ValueError as e:
+            # The rest of the stream cannot be framed after a malformed request.
+            try:
+                self._write_response(writer, getattr(e, 'status', 400), {'error': str(e)}, False)
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        parts = request_line.decode('latin-1').split(' ', 2)
+        if len(parts) != 3:
+            raise RequestError("Malformed request line")
+        method, path, _ = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise RequestError("Invalid Content-Length") from None
+        if length < 0:
+            raise RequestError("Invalid Content-Length")
+        if length > self.max_body:
+            raise RequestError(f"Request body over {self.max_body} bytes", 413)
+        body = await reader.readexactly(length) if length else b''
+        return method, path, headers, body
+
+    async def _dispatch(self, method, path, body):
+        if path == '/health':
+            return 200, {'status': 'ok', 'casing': self.casing_path, 'formation': self.formation_path}
+        if path == '/metrics':
+            return 200, self.metrics.snapshot(sum(q.qsize() for q in self.queues.values()), self.in_flight)
+        kind = ENDPOINTS.get(path)
+        if kind is None:
+            return 404, {'error': f"Unknown endpoint {path}"}
+        if method != 'POST':
+            return 405, {'error': "Use POST"}
+
+        started = time.perf_counter()
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError as e:
+            self.metrics.record(path, time.perf_counter() - started, False)
+            return 400, {'error': f"Invalid JSON: {e}"}
+        ok, result = await self.submit(kind, payload)
+        self.metrics.record(path, time.perf_counter() - started, ok)
+        return (200, result) if ok else (400, {'error': result})
+
+    def _write_response(self, writer, status, response, keep_alive):
+        body = json.dumps(response, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+
+
+def _reject(batch):
+    for _, future in batch:
+        if not future.done():
+            future.set_result((False, "The service is stopping"))
+
+
+class ServiceClient:
+    def __init__(self, base_url="http://127.0.0.1:8765", timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def health(self):
+        return self._request('/health')
+
+    def metrics(self):
+        return self._request('/metrics')
+
+    def casing_chain(self, dcsg, multipliers):
+        return self._request('/casing-chain', {'dcsg': str(dcsg), 'multipliers': list(multipliers)})
+
+    def had(self, at_head, metal_type, depth):
+        return self._request('/had', {'at_head': at_head, 'metal_type': metal_type, 'depth': depth})
+
+    def drill_pipe(self, intervals, common=None):
+        return self._request('/drill-pipe', {'intervals': intervals, 'common': common or {}})
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data,
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+
+async def serve(args):
+    service = CalculationService(args.casing, args.formation, args.workers, args.batch_size,
+                                 args.batch_window / 1000, args.max_in_flight, args.max_body)
+    port = await service.start(args.port)
+    print(f"Serving on http://{HOST}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local calculation service for casing, HAD and drill-pipe requests.")
+    parser.add_argument("--casing", default="FinalCasingTable.xlsx", help="Casing table (.xlsx)")
+    parser.add_argument("--formation", default="Formation design.xlsx", help="Drill collar / formation table (.xlsx)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batch-window", type=float, default=5.0, help="Milliseconds to wait while filling a batch")
+    parser.add_argument("--max-body", type=int, default=MAX_BODY_BYTES, help="Largest request body in bytes")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Concurrent batches (default: one per worker)")
+    args = parser.parse_args()
+    setup_logging()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
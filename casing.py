@@ -2,22 +2,41 @@ import json
 import os
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                              QLabel, QLineEdit, QTextEdit, QFileDialog, QMessageBox,
-                             QGroupBox, QStatusBar, QComboBox, QGridLayout, QTabWidget)
+                             QGroupBox, QStatusBar, QComboBox, QGridLayout, QTabWidget,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
 from PyQt5.QtGui import QIcon
 from PyQt5.QtCore import Qt
-from docx import Document
-import openpyxl
+import numpy as np
 from HAD import HADCalculator
+from calc_logging import get_logger, trace
+from catalog import acquire_catalog, release_catalog, source_key, supported_source
+from had_engine import METAL_TYPES
+from grade_sweep import evaluate_all_grades
+from drill_pipe import SECTION_NAMES, section_names
+from design_factors import DEFAULT_FACTORS, DesignFactors
+from well_engine import production_safety
+
+logger = get_logger("casing")
 
 class DbCalculator(QWidget):
-    def __init__(self):
+    GRADE_TABLE_HEADERS = ["Section", "Rank", "Front", "Metal Type", "Feasible", "HAD", "HAD Margin",
+                           "String Weight (kg)", "Tensile SF", "Rows"]
+    MAX_SECTIONS = 10
+
+    def __init__(self, data_file='casing_data.json'):
         super().__init__()
-        self.data_file = 'casing_data.json'
+        self.data_file = data_file
+        self.catalog = None
+        self.catalog_path = None
+        self.catalog_watcher = None
+        self.factors = DEFAULT_FACTORS
         self.had_data = {}
         self.had_calculator = HADCalculator()
         self.calculated_values = []
         self.first_at_head_value = None
         self.additional_info = []
+        self.section_results = []
+        self.safety = None
         self.initUI()
         self.load_saved_data()
 
@@ -27,8 +46,10 @@ class DbCalculator(QWidget):
         self.tab_widget = QTabWidget()
         input_tab = QWidget()
         results_tab = QWidget()
+        grades_tab = QWidget()
         self.tab_widget.addTab(input_tab, "Input")
         self.tab_widget.addTab(results_tab, "Results")
+        self.tab_widget.addTab(grades_tab, "Grade Comparison")
         
         input_layout = QVBoxLayout(input_tab)
         input_layout.addWidget(self.create_file_group())
@@ -39,6 +60,11 @@ class DbCalculator(QWidget):
         calculate_button.setIcon(QIcon("icons/calculate.png"))
         calculate_button.clicked.connect(self.extract_and_display)
         input_layout.addWidget(calculate_button)
+
+        evaluate_grades_button = QPushButton("Evaluate All Grades")
+        evaluate_grades_button.setIcon(QIcon("icons/compare.png"))
+        evaluate_grades_button.clicked.connect(self.evaluate_all_grades)
+        input_layout.addWidget(evaluate_grades_button)
         
         results_layout = QHBoxLayout(results_tab)
         results_left_layout = QVBoxLayout()
@@ -53,6 +79,13 @@ class DbCalculator(QWidget):
 
         results_layout.addLayout(results_left_layout)
         results_layout.addLayout(results_right_layout)
+
+        grades_layout = QVBoxLayout(grades_tab)
+        self.grade_table = QTableWidget(0, len(self.GRADE_TABLE_HEADERS))
+        self.grade_table.setHorizontalHeaderLabels(self.GRADE_TABLE_HEADERS)
+        self.grade_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.grade_table.setSortingEnabled(True)
+        grades_layout.addWidget(self.grade_table)
         
         main_layout.addWidget(self.tab_widget)
 
@@ -85,7 +118,7 @@ class DbCalculator(QWidget):
             QPushButton:hover {
                 background-color: #45a049;
             }
-            QLineEdit, QTextEdit, QComboBox {
+            QLineEdit, QTextEdit, QComboBox, QTableWidget {
                 background-color: #3b3b3b;
                 border: 1px solid #555555;
                 border-radius: 3px;
@@ -150,207 +183,115 @@ class DbCalculator(QWidget):
 
     def create_section_group(self):
         section_group = QGroupBox("Section Parameters")
-        section_layout = QGridLayout()
+        self.section_layout = QGridLayout()
         self.section_inputs = []
-        for i, section in enumerate(["Surface", "Intermediate", "Production"]):
-            section_layout.addWidget(QLabel(f"{section} Section:"), i*3, 0, 1, 4)
-            section_layout.addWidget(QLabel("Multiplier:"), i*3+1, 0)
-            multiplier_entry = QLineEdit()
-            section_layout.addWidget(multiplier_entry, i*3+1, 1)
-            section_layout.addWidget(QLabel("Metal Type:"), i*3+1, 2)
-            metal_type_combo = QComboBox()
-            metal_type_combo.addItems(['K-55', 'L-80', 'N-80', 'P-110', 'Q-125', 'T-95', 'C-90'])
-            section_layout.addWidget(metal_type_combo, i*3+1, 3)
-            section_layout.addWidget(QLabel("Depth:"), i*3+2, 0)
-            depth_entry = QLineEdit()
-            section_layout.addWidget(depth_entry, i*3+2, 1)
-            self.section_inputs.append((multiplier_entry, metal_type_combo, depth_entry))
-        section_group.setLayout(section_layout)
+        self.section_rows = []
+        self.section_cache = {}
+        self.update_section_rows(len(SECTION_NAMES))
+        self.iterations_entry.textChanged.connect(self.on_iterations_changed)
+        section_group.setLayout(self.section_layout)
         return section_group
 
+    def on_iterations_changed(self, text):
+        try:
+            self.update_section_rows(int(text))
+        except ValueError:
+            return
+
+    def update_section_rows(self, count):
+        # Rows follow the number of iterations; values of removed rows are kept so
+        # shrinking and growing the program again does not lose them.
+        count = max(1, min(count, self.MAX_SECTIONS))
+        while len(self.section_inputs) > count:
+            i = len(self.section_inputs) - 1
+            multiplier_entry, metal_type_combo, depth_entry = self.section_inputs.pop()
+            self.section_cache[i] = (multiplier_entry.text(), metal_type_combo.currentText(), depth_entry.text())
+            for widget in self.section_rows.pop():
+                self.section_layout.removeWidget(widget)
+                widget.deleteLater()
+        while len(self.section_inputs) < count:
+            self.add_section_row(len(self.section_inputs))
+
+        for row, name in zip(self.section_rows, section_names(count)):
+            row[0].setText(f"{name} Section:")
+        data_input_tab = getattr(self, 'data_input_tab', None)
+        if data_input_tab is not None:
+            data_input_tab.set_section_names(section_names(count))
+
+    def add_section_row(self, i):
+        title_label = QLabel()
+        multiplier_label = QLabel("Multiplier:")
+        multiplier_entry = QLineEdit()
+        metal_type_label = QLabel("Metal Type:")
+        metal_type_combo = QComboBox()
+        metal_type_combo.addItems(METAL_TYPES)
+        depth_label = QLabel("Depth:")
+        depth_entry = QLineEdit()
+        self.section_layout.addWidget(title_label, i*3, 0, 1, 4)
+        self.section_layout.addWidget(multiplier_label, i*3+1, 0)
+        self.section_layout.addWidget(multiplier_entry, i*3+1, 1)
+        self.section_layout.addWidget(metal_type_label, i*3+1, 2)
+        self.section_layout.addWidget(metal_type_combo, i*3+1, 3)
+        self.section_layout.addWidget(depth_label, i*3+2, 0)
+        self.section_layout.addWidget(depth_entry, i*3+2, 1)
+        if i in self.section_cache:
+            multiplier, metal_type, depth = self.section_cache.pop(i)
+            multiplier_entry.setText(multiplier)
+            metal_type_combo.setCurrentText(metal_type)
+            depth_entry.setText(depth)
+        self.section_inputs.append((multiplier_entry, metal_type_combo, depth_entry))
+        self.section_rows.append((title_label, multiplier_label, multiplier_entry, metal_type_label,
+                                  metal_type_combo, depth_label, depth_entry))
+
     def select_file(self):
-        file_path, _ = QFileDialog.getOpenFileName(
-            self, "Select File", "", "Word and Excel files (*.docx *.xlsx);;All files (*.*)"
+        # Several vendor tables can be selected at once; they are merged in order.
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Select Files", "", "Word and Excel files (*.docx *.xlsx);;All files (*.*)"
         )
-        if file_path:
-            self.file_entry.setText(file_path)
+        if file_paths:
+            self.file_entry.setText(";".join(file_paths))
+
+    def catalog_for(self, file_path):
+        # The workbook is parsed once per path and shared by every open well.
+        path = source_key(file_path)
+        if self.catalog_path != path:
+            self.release_shared_data()
+            self.catalog = acquire_catalog(file_path)
+            self.catalog_path = path
+            if self.catalog_watcher is not None:
+                self.catalog_watcher.watch_catalog(file_path)
+        return self.catalog
+
+    def swap_catalog(self, path, catalog):
+        # Called when the workbook behind this tab was re-read on disk.
+        if self.catalog_path == path:
+            self.catalog = catalog
+            return True
+        return False
+
+    def release_shared_data(self):
+        if self.catalog_path is not None:
+            release_catalog(self.catalog_path)
+        self.catalog = None
+        self.catalog_path = None
 
     def find_at_body_value(self, file_path, at_head_value):
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-        at_head_col = None
-        at_body_col = None
-        
-        for row in sheet.iter_rows(values_only=True):
-            row_text = [str(cell).strip().lower() if cell is not None else "" for cell in row]
-            if "at head" in row_text:
-                at_head_col = row_text.index("at head")
-            if "at body" in row_text:
-                at_body_col = row_text.index("at body")
-            if at_head_col is not None and at_body_col is not None:
-                break
-                
-        if at_head_col is None or at_body_col is None:
-            return None
-                
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            try:
-                row_at_head = float(row[at_head_col])
-                if abs(row_at_head - float(at_head_value)) < 0.01:
-                    at_body_value = str(row[at_body_col])
-                    if ' ' in at_body_value:
-                        at_body_value = at_body_value.split()[-1]
-                    return at_body_value
-            except (ValueError, TypeError):
-                continue
-        return None
-
-    def extract_values_from_docx(self, file_path, dcsg_amount):
-        doc = Document(file_path)
-        tables = doc.tables
-        if not tables:
-            QMessageBox.information(self, "Info", "No tables found in the document.")
-            return None
-        for table in tables:
-            header_row = None
-            at_head_index = None
-            at_body_index = None
-            for row in table.rows:
-                row_text = [cell.text.strip() for cell in row.cells]
-                if "At head" in row_text and "At body" in row_text:
-                    header_row = row_text
-                    at_head_index = header_row.index("At head")
-                    at_body_index = header_row.index("At body")
-                    break
-            if header_row:
-                for row in table.rows[1:]:
-                    row_text = [cell.text.strip() for cell in row.cells]
-                    if row_text[at_body_index] == dcsg_amount:
-                        try:
-                            return float(row_text[at_head_index])
-                        except ValueError:
-                            continue
-        QMessageBox.information(self, "Info", f"No matching Dcsg amount ({dcsg_amount}) found in the document.")
-        return None
-
-    def extract_values_from_xlsx(self, file_path, dcsg_amount):
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-        at_head_col = None
-        at_body_col = None
-        for row in sheet.iter_rows(values_only=True):
-            row_text = [str(cell).strip() if cell is not None else "" for cell in row]
-            if at_head_col is None or at_body_col is None:
-                if "At head" in row_text:
-                    at_head_col = row_text.index("At head")
-                if "At body" in row_text:
-                    at_body_col = row_text.index("At body")
-            elif at_head_col is not None and at_body_col is not None:
-                if row_text[at_body_col] == dcsg_amount:
-                    try:
-                        return float(row_text[at_head_col])
-                    except ValueError:
-                        continue
-        QMessageBox.information(self, "Info", f"No matching Dcsg amount ({dcsg_amount}) found in the document.")
-        return None
+        return self.catalog_for(file_path).at_body_for(at_head_value)
+
+    def extract_values_from_catalog(self, file_path, dcsg_amount):
+        at_head_value = self.catalog_for(file_path).at_head_for_dcsg(dcsg_amount)
+        if at_head_value is None:
+            QMessageBox.information(self, "Info", f"No matching Dcsg amount ({dcsg_amount}) found in the document.")
+        return at_head_value
 
     def find_nearest_bit_size_and_internal_diameter(self, file_path, db_value):
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-        bit_size_col = None
-        internal_diameter_col = None
-        bit_size_variations = ["bit size", "bitsize", "bit_size"]
-        internal_diameter_variations = ["internal diameter"]
-        for row in sheet.iter_rows(values_only=True):
-            row_text = [str(cell).strip().lower() if cell is not None else "" for cell in row]
-            if bit_size_col is None:
-                for i, cell in enumerate(row_text):
-                    if any(variation in cell for variation in bit_size_variations):
-                        bit_size_col = i
-                    if any(variation in cell for variation in internal_diameter_variations):
-                        internal_diameter_col = i
-            if bit_size_col is not None and internal_diameter_col is not None:
-                break
-        if bit_size_col is None or internal_diameter_col is None:
-            return None, None
-        bit_sizes = []
-        internal_diameters = []
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            try:
-                bit_size = float(row[bit_size_col])
-                internal_diameter = float(row[internal_diameter_col])
-                bit_sizes.append(bit_size)
-                internal_diameters.append(internal_diameter)
-            except (ValueError, TypeError):
-                continue
-        if bit_sizes:
-            nearest_bit_size = min(bit_sizes, key=lambda x: abs(x - db_value))
-            nearest_index = bit_sizes.index(nearest_bit_size)
-            return nearest_bit_size, internal_diameters[nearest_index]
-        return None, None
+        return self.catalog_for(file_path).nearest_bit_size(db_value)
 
     def find_reference_from_xlsx(self, file_path, internal_diameter_value):
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-        at_head_col = None
-        internal_diameter_col = None
-        for row in sheet.iter_rows(values_only=True):
-            row_text = [str(cell).strip().lower() if cell is not None else "" for cell in row]
-            if "at head" in row_text:
-                at_head_col = row_text.index("at head")
-            if "internal diameter" in row_text:
-                internal_diameter_col = row_text.index("internal diameter")
-            if at_head_col is not None and internal_diameter_col is not None:
-                break
-        if at_head_col is None or internal_diameter_col is None:
-            return f"Internal Diameter: {internal_diameter_value}, At head: Columns not found", None
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            try:
-                row_internal_diameter = float(row[internal_diameter_col])
-                if abs(row_internal_diameter - internal_diameter_value) < 0.01:
-                    at_head_value = row[at_head_col]
-                    return f"Internal Diameter: {row_internal_diameter}, At head (Dcsg): {at_head_value}", at_head_value
-            except (ValueError, TypeError):
-                continue
-        return f"Internal Diameter: {internal_diameter_value}, At head: Not found", None
+        return self.catalog_for(file_path).reference_at_head(internal_diameter_value)
 
     def extract_additional_info(self, file_path, at_head_value, metal_type):
-        workbook = openpyxl.load_workbook(file_path)
-        sheet = workbook.active
-        at_head_col = None
-        external_pressure_col = None
-        metal_type_col = None
-        tensile_strength_col = None
-        unit_weight_col = None
-        for row in sheet.iter_rows(values_only=True):
-            row_text = [str(cell).strip().lower() if cell is not None else "" for cell in row]
-            if "at head" in row_text:
-                at_head_col = row_text.index("at head")
-            if "external pressure mpa" in row_text:
-                external_pressure_col = row_text.index("external pressure mpa")
-            if "metal type" in row_text:
-                metal_type_col = row_text.index("metal type")
-            if "tensile strength at body tonf" in row_text:
-                tensile_strength_col = row_text.index("tensile strength at body tonf")
-            if "unit weight length lbs/ft" in row_text:
-                unit_weight_col = row_text.index("unit weight length lbs/ft")
-            if all(col is not None for col in [at_head_col, external_pressure_col, metal_type_col, tensile_strength_col, unit_weight_col]):
-                break
-        if any(col is None for col in [at_head_col, external_pressure_col,metal_type_col, tensile_strength_col, unit_weight_col]):
-            return []
-        matching_rows = []
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            try:
-                row_at_head = float(row[at_head_col])
-                row_metal_type = str(row[metal_type_col]).strip()
-                if abs(row_at_head - float(at_head_value)) < 0.01 and row_metal_type == metal_type:
-                    external_pressure = row[external_pressure_col]
-                    tensile_strength = row[tensile_strength_col]
-                    unit_weight = row[unit_weight_col]
-                    matching_rows.append((row_at_head, external_pressure, row_metal_type, tensile_strength, unit_weight))
-            except (ValueError, TypeError):
-                continue
-        return matching_rows
+        return self.catalog_for(file_path).matching_records(at_head_value, metal_type, self.factors)
 
     def display_results(self, iteration, section, multiplier, metal_type, dcsg, db_value, nearest_bit_size, internal_diameter):
         at_body_value = self.find_at_body_value(self.file_entry.text(), dcsg)
@@ -401,43 +342,46 @@ class DbCalculator(QWidget):
         
         self.result_text.setHtml(current_html)
 
+        self.section_results.append({
+            'section': section,
+            'multiplier': multiplier,
+            'metal_type': metal_type,
+            'dcsg': dcsg,
+            'at_body': at_body_value,
+            'nearest_bit_size': nearest_bit_size,
+            'internal_diameter': internal_diameter
+        })
+
     def calculate_had(self, depth, matching_rows, section_name):
         if section_name != "Production Section":
             return False
         
-        s_values = {
-            'K-55': 1.05,
-            'L-80': 1.08,
-            'N-80': 1.08,
-            'P-110': 1.125,
-            'Q-125': 1.125,
-            'T-95': 1.125,
-            'C-90': 1.125
-        }
-        for row in matching_rows:
-            at_head, external_pressure, metal_type, tensile_strength, unit_weight = row
-            s = s_values.get(metal_type, 1.08)
-            ep = float(external_pressure)
-            had = (100 * ep) / (s * 1.08)
-            self.display_had_results(at_head, external_pressure, metal_type, had, depth, tensile_strength, unit_weight, section_name)
-            if had >= depth:
-                return True
-        return False
+        if not len(matching_rows):
+            return False
 
-    def display_had_results(self, at_head, external_pressure, metal_type, had, depth, tensile_strength, unit_weight, section_name):
-        at_head_key = round(at_head, 2)
-        if at_head_key not in self.had_data:
-            self.had_data[at_head_key] = []
-        self.had_data[at_head_key].append({
-            'had': had,
-            'external_pressure': external_pressure,
-            'metal_type': metal_type,
-            'tensile_strength': tensile_strength,
-            'unit_weight': unit_weight
-        })
-        if had >= depth:
+        reaching = np.flatnonzero(matching_rows['had'] >= depth)
+        last = reaching[0] if reaching.size else len(matching_rows) - 1
+        self.display_had_results(matching_rows[:last + 1], depth, section_name, bool(reaching.size))
+        return bool(reaching.size)
+
+    def display_had_results(self, records, depth, section_name, reached):
+        # Candidates stay typed records until the HAD tab formats them.
+        at_head_key = round(float(records['at_head'][0]), 2)
+        if at_head_key in self.had_data:
+            records = np.concatenate([self.had_data[at_head_key], records])
+        self.had_data[at_head_key] = records
+        if reached:
             self.had_calculator.update_had_results(self.had_data, depth, section_name)
 
+    def display_safety(self, file_path, at_head_value, metal_type, depth):
+        self.safety = production_safety(self.catalog_for(file_path), at_head_value, metal_type, depth, self.factors)
+        if self.safety is None:
+            return
+        checks = [f"{label} {self.safety[key]['min']:.2f} at {self.safety[key]['depth']:.0f} m"
+                  for key, label in (('tension_sf', "tension"), ('collapse_sf', "collapse"), ('burst_sf', "burst"))
+                  if self.safety[key]['min'] is not None]
+        self.result_text.append("Production string minimum safety factors: " + ", ".join(checks))
+
     def extract_and_display(self):
         file_path = self.file_entry.text()
         initial_dcsg_amount = self.dcsg_entry.text()
@@ -455,7 +399,10 @@ class DbCalculator(QWidget):
 
         self.result_text.clear()
         self.had_calculator.had_text.clear()
+        self.had_calculator.section_data.clear()
         self.had_data.clear()
+        self.section_results = []
+        self.safety = None
 
         try:
             dcsg_amount = initial_dcsg_amount
@@ -465,25 +412,25 @@ class DbCalculator(QWidget):
             next_dcsg = None
             self.additional_info = []
 
-            for i in range(min(iterations, 3)):
+            section_count = min(iterations, len(self.section_inputs))
+            names = section_names(section_count)
+            for i in range(section_count):
                 try:
                     multiplier = float(self.section_inputs[i][0].text())
                 except ValueError:
-                    QMessageBox.critical(self, "Error", f"Please enter a valid multiplier for {['Production', 'Intermediate', 'Surface'][i]} section.")
+                    QMessageBox.critical(self, "Error", f"Please enter a valid multiplier for {names[i]} section.")
                     return
 
                 metal_type = self.section_inputs[i][1].currentText()
                 try:
                     depth = float(self.section_inputs[i][2].text())
                 except ValueError:
-                    QMessageBox.critical(self, "Error", f"Please enter a valid depth for {['Production', 'Intermediate', 'Surface'][i]} section.")
+                    QMessageBox.critical(self, "Error", f"Please enter a valid depth for {names[i]} section.")
                     return
 
                 if i == 0:
-                    if file_path.lower().endswith('.docx'):
-                        at_head_value = self.extract_values_from_docx(file_path, dcsg_amount)
-                    elif file_path.lower().endswith('.xlsx'):
-                        at_head_value = self.extract_values_from_xlsx(file_path, dcsg_amount)
+                    if supported_source(file_path):
+                        at_head_value = self.extract_values_from_catalog(file_path, dcsg_amount)
                     else:
                         QMessageBox.critical(self, "Error", "Unsupported file format.")
                         return
@@ -502,7 +449,7 @@ class DbCalculator(QWidget):
                     if nearest_bit_size is not None and internal_diameter is not None:
                         self.display_results(
                             i+1,
-                            ['Production', 'Intermediate', 'Surface'][i],
+                            names[i],
                             multiplier,
                             metal_type,
                             dcsg_amount,
@@ -517,13 +464,14 @@ class DbCalculator(QWidget):
                         matching_rows = self.extract_additional_info(file_path, at_head_value, metal_type)
                         self.additional_info.extend(matching_rows)
                         
-                        section_name = ['Production', 'Intermediate', 'Surface'][i] + " Section"
+                        section_name = names[i] + " Section"
                         if section_name == "Production Section":
                             if not self.calculate_had(depth, matching_rows, section_name):
                                 self.result_text.append(f"Could not find a suitable HAD value for the given depth in {section_name}.")
                                 break
+                            self.display_safety(file_path, at_head_value, metal_type, depth)
 
-                        if i < min(iterations, 3) - 1:
+                        if i < section_count - 1:
                             if new_at_head_value is not None:
                                 at_head_value = new_at_head_value
                                 dcsg_amount = str(new_at_head_value)
@@ -544,9 +492,72 @@ class DbCalculator(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
 
+        trace(logger, "casing", source=file_path, initial_dcsg=initial_dcsg_amount,
+              calculated_values=self.calculated_values, sections=self.section_results)
         self.status_bar.showMessage("Calculation completed")
         self.tab_widget.setCurrentIndex(1)
 
+    def evaluate_all_grades(self):
+        file_path = self.file_entry.text()
+        if not supported_source(file_path):
+            QMessageBox.critical(self, "Error", "Please select an .xlsx or .docx casing table first.")
+            return
+        sections = []
+        chain = [value for value in self.calculated_values if value[1] is not None]
+        names = section_names(len(self.section_inputs))
+        for i, (at_head, _, _) in enumerate(chain[:len(self.section_inputs)]):
+            try:
+                depth = float(self.section_inputs[i][2].text())
+            except ValueError:
+                QMessageBox.critical(self, "Error", f"Please enter a valid depth for {names[i]} section.")
+                return
+            sections.append((names[i], float(at_head), depth))
+        if not sections:
+            QMessageBox.critical(self, "Error", "Please run Calculate first to build the casing chain.")
+            return
+
+        try:
+            results = evaluate_all_grades(self.catalog_for(file_path), sections, factors=self.factors)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"An error occurred: {str(e)}")
+            return
+
+        self.display_grade_results(results)
+        self.status_bar.showMessage(f"Evaluated {len(results)} section/grade combinations")
+        self.tab_widget.setCurrentIndex(2)
+
+    def display_grade_results(self, results):
+        self.grade_table.setSortingEnabled(False)
+        self.grade_table.setRowCount(len(results))
+        for row, result in enumerate(results):
+            values = [
+                result['section'],
+                result['rank'],
+                result['front'],
+                result['metal_type'],
+                "Yes" if result['feasible'] else "No",
+                result['had'],
+                result['had_margin'],
+                result['string_weight'],
+                result['tensile_margin'],
+                result['rows']
+            ]
+            for col, value in enumerate(values):
+                self.grade_table.setItem(row, col, self._table_item(value))
+        self.grade_table.setSortingEnabled(True)
+        self.grade_table.sortByColumn(1, Qt.AscendingOrder)
+
+    def _table_item(self, value):
+        item = QTableWidgetItem()
+        if isinstance(value, float) and abs(value) != float('inf'):
+            item.setData(Qt.DisplayRole, round(value, 2))
+        elif isinstance(value, int):
+            item.setData(Qt.DisplayRole, value)
+        else:
+            item.setText("-" if value is None or isinstance(value, float) else str(value))
+        item.setTextAlignment(Qt.AlignCenter)
+        return item
+
     def save_data(self):
         data = {
             'file_path': self.file_entry.text(),
@@ -559,12 +570,17 @@ class DbCalculator(QWidget):
                     'depth': input[2].text()
                 }
                 for input in self.section_inputs
-            ]
+            ],
+            'design_factors': self.factors.path
         }
         with open(self.data_file, 'w') as f:
             json.dump(data, f)
         self.status_bar.showMessage("Data saved successfully", 3000)
 
+    def use_factors(self, factors):
+        self.factors = factors
+        self.had_calculator.factors = factors
+
     def load_saved_data(self):
         if os.path.exists(self.data_file):
             with open(self.data_file, 'r') as f:
@@ -572,6 +588,11 @@ class DbCalculator(QWidget):
             self.file_entry.setText(data.get('file_path', ''))
             self.dcsg_entry.setText(data.get('initial_dcsg', ''))
             self.iterations_entry.setText(data.get('iterations', ''))
+            if data.get('design_factors'):
+                try:
+                    self.use_factors(DesignFactors.load(data['design_factors']))
+                except (OSError, ValueError) as e:
+                    self.status_bar.showMessage(f"Could not load design factors: {e}", 5000)
             
             section_inputs = data.get('section_inputs', [])
             for i, input_data in enumerate(section_inputs):
@@ -579,9 +600,12 @@ class DbCalculator(QWidget):
                     self.section_inputs[i][0].setText(input_data.get('multiplier', ''))
                     self.section_inputs[i][1].setCurrentText(input_data.get('metal_type', 'K-55'))
                     self.section_inputs[i][2].setText(input_data.get('depth', ''))
+                else:
+                    self.section_cache[i] = (input_data.get('multiplier', ''), input_data.get('metal_type', 'K-55'),
+                                             input_data.get('depth', ''))
 
     def get_all_dcsg_values(self):
         initial_dcsg = self.dcsg_entry.text()
         at_head_values = [value[0] for value in self.calculated_values if value[0] is not None]
         nearest_bit_sizes = [value[2] for value in self.calculated_values if value[2] is not None]
-        return initial_dcsg, at_head_values, nearest_bit_sizes, None
+        return initial_dcsg, at_head_values, nearest_bit_sizes, section_names(len(self.section_inputs))
@@ -0,0 +1,339 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import openpyxl
+from docx import Document
+from chain_graph import ChainGraph
+from had_engine import HadIndex
+from design_factors import DEFAULT_FACTORS
+
+HEADER_NAMES = {
+    'at_head': "at head",
+    'at_body': "at body",
+    'external_pressure': "external pressure mpa",
+    'internal_pressure': "internal pressure mpa",
+    'metal_type': "metal type",
+    'tensile_strength': "tensile strength at body tonf",
+    'unit_weight': "unit weight length lbs/ft",
+    'internal_diameter': "internal diameter"
+}
+BIT_SIZE_VARIATIONS = ["bit size", "bitsize", "bit_size"]
+NUMERIC_COLUMNS = ['at_head', 'external_pressure', 'internal_pressure', 'tensile_strength',
+                   'unit_weight', 'internal_diameter', 'bit_size']
+TEXT_COLUMNS = ['metal_type', 'at_body_text', 'at_body_raw', 'source']
+SOURCE_EXTENSIONS = ('.xlsx', '.docx')
+
+
+class CasingCatalog:
+    def __init__(self, path, columns):
+        self.path = path
+        self.columns = columns
+        self.row_count = len(columns['at_head'])
+        self.at_head = columns['at_head']
+        self.external_pressure = columns['external_pressure']
+        self.internal_pressure = columns['internal_pressure']
+        self.tensile_strength = columns['tensile_strength']
+        self.unit_weight = columns['unit_weight']
+        self.internal_diameter = columns['internal_diameter']
+        self.bit_size = columns['bit_size']
+        self.metal_type = columns['metal_type']
+        self.at_body_text = columns['at_body_text']
+        self.at_body_raw = columns['at_body_raw']
+        self.source = columns.get('source', np.full(self.row_count, path))
+
+        self._bit_rows = np.flatnonzero(~np.isnan(self.bit_size) & ~np.isnan(self.internal_diameter))
+        self._diameter_rows = np.flatnonzero(~np.isnan(self.internal_diameter))
+        self._chain_graph = None
+        self.had_index = HadIndex(self)
+        self.had = self.had_index.had
+        self._had_indexes = {DEFAULT_FACTORS.had_key(): self.had_index}
+
+    @classmethod
+    def from_xlsx(cls, path):
+        workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = [tuple(row) for row in workbook.active.iter_rows(values_only=True)]
+        finally:
+            workbook.close()
+        return cls(path, parse_rows(rows, path))
+
+    @classmethod
+    def from_docx(cls, path):
+        rows = []
+        for table in Document(path).tables:
+            rows.extend(tuple(cell.text for cell in row.cells) for row in table.rows)
+        return cls(path, parse_rows(rows, path))
+
+    @classmethod
+    def from_file(cls, path):
+        if path.lower().endswith('.docx'):
+            return cls.from_docx(path)
+        return cls.from_xlsx(path)
+
+    def at_head_for_dcsg(self, dcsg_amount):
+        matches = np.flatnonzero((self.at_body_text == str(dcsg_amount)) & ~np.isnan(self.at_head))
+        if matches.size == 0:
+            return None
+        return float(self.at_head[matches[0]])
+
+    def chain_graph(self):
+        if self._chain_graph is None:
+            self._chain_graph = ChainGraph(self)
+        return self._chain_graph
+
+    def dcsg_candidates(self):
+        candidates = []
+        for text, at_head in zip(self.at_body_text, self.at_head):
+            if text and not np.isnan(at_head) and text not in candidates:
+                candidates.append(str(text))
+        return candidates
+
+    def at_body_for(self, at_head_value):
+        matches = np.flatnonzero(np.abs(self.at_head - float(at_head_value)) < 0.01)
+        if matches.size == 0:
+            return None
+        at_body_value = str(self.at_body_raw[matches[0]])
+        if ' ' in at_body_value:
+            at_body_value = at_body_value.split()[-1]
+        return at_body_value
+
+    def nearest_bit_size(self, db_value):
+        if self._bit_rows.size == 0:
+            return None, None
+        row = self._bit_rows[np.argmin(np.abs(self.bit_size[self._bit_rows] - db_value))]
+        return float(self.bit_size[row]), float(self.internal_diameter[row])
+
+    def reference_at_head(self, internal_diameter_value):
+        diameters = self.internal_diameter[self._diameter_rows]
+        matches = self._diameter_rows[np.abs(diameters - internal_diameter_value) < 0.01]
+        if matches.size == 0:
+            return f"Internal Diameter: {internal_diameter_value}, At head: Not found", None
+        row = matches[0]
+        at_head_value = None if np.isnan(self.at_head[row]) else float(self.at_head[row])
+        return f"Internal Diameter: {float(self.internal_diameter[row])}, At head (Dcsg): {at_head_value}", at_head_value
+
+    def matching_row_indices(self, at_head_value, metal_type):
+        mask = (np.abs(self.at_head - float(at_head_value)) < 0.01) & (self.metal_type == metal_type)
+        return np.flatnonzero(mask)
+
+    def had_index_for(self, factors=None):
+        # HAD depends on the design factors, so every profile gets its own index,
+        # built once from the parsed columns.
+        if factors is None:
+            return self.had_index
+        key = factors.had_key()
+        if key not in self._had_indexes:
+            self._had_indexes[key] = HadIndex(self, factors)
+        return self._had_indexes[key]
+
+    def matching_records(self, at_head_value, metal_type, factors=None):
+        return self.had_index_for(factors).records[self.matching_row_indices(at_head_value, metal_type)]
+
+    def matching_rows(self, at_head_value, metal_type):
+        return [
+            (float(self.at_head[row]), float(self.external_pressure[row]), str(self.metal_type[row]),
+             float(self.tensile_strength[row]), float(self.unit_weight[row]))
+            for row in self.matching_row_indices(at_head_value, metal_type)
+        ]
+
+
+def parse_rows(rows, source=""):
+    header_columns = find_header_columns(rows)
+    data_rows = rows[1:]
+    columns = {}
+    for name in NUMERIC_COLUMNS:
+        col = header_columns.get(name)
+        columns[name] = np.array([_to_float(_cell(row, col)) for row in data_rows], dtype=float)
+
+    metal_col = header_columns.get('metal_type')
+    columns['metal_type'] = np.array([str(_cell(row, metal_col)).strip() for row in data_rows])
+
+    at_body_col = header_columns.get('at_body')
+    at_body_cells = [_cell(row, at_body_col) for row in data_rows]
+    columns['at_body_text'] = np.array([str(cell).strip() if cell is not None else "" for cell in at_body_cells])
+    columns['at_body_raw'] = np.array([str(cell) for cell in at_body_cells])
+    columns['source'] = np.full(len(data_rows), str(source))
+    return columns
+
+
+def find_header_columns(rows):
+    header_columns = {}
+    for row in rows:
+        row_text = [normalize_header(cell) for cell in row]
+        for name, header in HEADER_NAMES.items():
+            if name not in header_columns and header in row_text:
+                header_columns[name] = row_text.index(header)
+        if 'bit_size' not in header_columns:
+            for i, cell in enumerate(row_text):
+                if any(variation in cell for variation in BIT_SIZE_VARIATIONS):
+                    header_columns['bit_size'] = i
+        if len(header_columns) == len(HEADER_NAMES) + 1:
+            break
+    return header_columns
+
+
+def normalize_header(cell):
+    # "Bit Size " and "Unit  Weight Length Lbs/ft" match however the vendor spaced them.
+    return " ".join(str(cell).split()).lower() if cell is not None else ""
+
+
+def merge_columns(parts):
+    # Sources in priority order. A row that an earlier source already has is dropped
+    # so first-match lookups keep answering from that source; repeats inside one
+    # table stay, since the HAD scan walks every row of a table.
+    seen = set()
+    kept = []
+    for part in parts:
+        numeric = np.column_stack([part[name] for name in NUMERIC_COLUMNS])
+        has_data = ~np.all(np.isnan(numeric), axis=1) | (part['at_body_text'] != "")
+        keys = [(tuple(None if np.isnan(value) else value for value in numeric[row].tolist()),
+                 str(part['metal_type'][row]), str(part['at_body_text'][row]))
+                for row in range(len(numeric))]
+        keep = np.array([row for row in range(len(keys)) if not (has_data[row] and keys[row] in seen)], dtype=int)
+        seen.update(keys[row] for row in keep if has_data[row])
+        kept.append({name: values[keep] for name, values in part.items()})
+    return {name: np.concatenate([part[name] for part in kept]) for name in parts[0]}
+
+
+class CatalogFederation:
+    # Several vendor tables served as one CasingCatalog. Each source is parsed on its
+    # own and only re-parsed when its file changes; the merged indexes are rebuilt
+    # from the cached columns.
+    def __init__(self, paths):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.sources = {}
+        self.catalog = None
+        self.refresh()
+
+    def refresh(self):
+        changed = []
+        for path in self.paths:
+            stamp = _file_stamp(path)
+            cached = self.sources.get(path)
+            if cached is None or cached[0] != stamp:
+                self.sources[path] = (stamp, CasingCatalog.from_file(path).columns)
+                changed.append(path)
+        if changed or self.catalog is None:
+            self.catalog = CasingCatalog(";".join(self.paths),
+                                         merge_columns([self.sources[path][1] for path in self.paths]))
+        return changed
+
+
+def split_sources(path):
+    return [part.strip() for part in str(path).split(';') if part.strip()]
+
+
+def supported_source(path):
+    sources = split_sources(path)
+    return bool(sources) and all(source.lower().endswith(SOURCE_EXTENSIONS) for source in sources)
+
+
+def source_key(path):
+    return ";".join(os.path.abspath(source) for source in split_sources(path))
+
+
+def _file_stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _cell(row, col):
+    if col is None or col >= len(row):
+        return None
+    return row[col]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+_catalogs = {}
+_federations = {}
+_references = {}
+_pending = {}
+_prefetch_executor = None
+
+
+def parse_catalog(path):
+    # The catalog of a (possibly ";"-joined) path and its federation, if any.
+    sources = split_sources(path)
+    if len(sources) > 1:
+        federation = CatalogFederation(sources)
+        return federation.catalog, federation
+    return CasingCatalog.from_file(sources[0]), None
+
+
+def prefetch_catalog(path):
+    # Parses and indexes the catalog on a background thread; the first load_catalog
+    # of the path takes the result, waiting only if it is not finished yet.
+    global _prefetch_executor
+    key = source_key(path)
+    if key in _catalogs or key in _pending:
+        return _pending.get(key)
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-prefetch")
+    _pending[key] = _prefetch_executor.submit(parse_catalog, path)
+    return _pending[key]
+
+
+def load_catalog(path):
+    # path may list several sources separated by ";", merged in that order.
+    key = source_key(path)
+    catalog = _catalogs.get(key)
+    future = _pending.pop(key, None)
+    if catalog is None:
+        federation = None
+        if future is not None:
+            try:
+                catalog, federation = future.result()
+            except Exception:
+                # Parsed again below, so the error reaches the caller as before.
+                catalog = None
+        if catalog is None:
+            catalog, federation = parse_catalog(path)
+        if federation is not None:
+            _federations[key] = federation
+        _catalogs[key] = catalog
+    return catalog
+
+
+def refresh_catalog(path):
+    # Re-reads only the sources that changed and returns the (possibly new) catalog.
+    # The new catalog replaces the registered one in a single assignment, and only
+    # while some well still holds the path.
+    key = source_key(path)
+    federation = _federations.get(key)
+    if federation is not None:
+        federation.refresh()
+        catalog = federation.catalog
+    else:
+        catalog = CasingCatalog.from_file(split_sources(path)[0])
+    if key in _catalogs:
+        _catalogs[key] = catalog
+    return catalog
+
+
+def acquire_catalog(path):
+    # Every open well holds one reference; the parsed columns and indexes are shared.
+    catalog = load_catalog(path)
+    key = source_key(path)
+    _references[key] = _references.get(key, 0) + 1
+    return catalog
+
+
+def release_catalog(path):
+    key = source_key(path)
+    count = _references.get(key, 0) - 1
+    if count > 0:
+        _references[key] = count
+        return
+    _references.pop(key, None)
+    _catalogs.pop(key, None)
+    _federations.pop(key, None)
+
+
+def catalog_references():
+    return dict(_references)
@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from catalog import refresh_catalog, source_key, split_sources, catalog_references
+from drill_pipe import refresh_formation, formation_references
+
+# Excel writes a temporary file and renames it over the workbook, which shows up as
+# several change events in a row; they are collected for this long before reloading.
+SETTLE_MS = 500
+# Backstop for drives where QFileSystemWatcher misses changes.
+POLL_MS = 2000
+
+
+class CatalogWatcher(QObject):
+    # Watches the casing and formation workbooks that open wells hold. A changed file
+    # is re-parsed on a worker thread while the wells keep using the tables they have;
+    # the new tables are handed over through the signals on the GUI thread.
+    catalogReloaded = pyqtSignal(str, object)
+    formationReloaded = pyqtSignal(str, object)
+    reloadFailed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.tables = {}
+        self.stamps = {}
+        self.pending = set()
+
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(SETTLE_MS)
+        self.settle_timer.timeout.connect(self.reload_pending)
+
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_MS)
+        self.poll_timer.timeout.connect(self.poll)
+        self.poll_timer.start()
+
+    def watch_catalog(self, path):
+        key = source_key(path)
+        for source in split_sources(key):
+            self.add_file(source, ('catalog', key))
+
+    def watch_formation(self, path):
+        key = os.path.abspath(path)
+        self.add_file(key, ('formation', key))
+
+    def add_file(self, path, table):
+        self.tables.setdefault(path, set()).add(table)
+        if path not in self.stamps:
+            self.stamps[path] = _file_stamp(path)
+            if self.stamps[path] is not None:
+                self.watcher.addPath(path)
+
+    def on_file_changed(self, path):
+        self.pending.add(path)
+        self.settle_timer.start()
+
+    def poll(self):
+        for path, stamp in self.stamps.items():
+            if _file_stamp(path) != stamp and path not in self.pending:
+                self.on_file_changed(path)
+
+    def reload_pending(self):
+        self.drop_released()
+        tables = set()
+        for path in list(self.pending):
+            if path not in self.tables:
+                self.pending.discard(path)
+                continue
+            stamp = _file_stamp(path)
+            if stamp is None:
+                # Still mid-save; the file is back by the next round.
+                continue
+            self.pending.discard(path)
+            self.stamps[path] = stamp
+            if path not in self.watcher.files():
+                self.watcher.addPath(path)
+            tables.update(self.tables[path])
+        for kind, key in tables:
+            self.executor.submit(self.reload, kind, key)
+        if self.pending:
+            self.settle_timer.start()
+
+    def reload(self, kind, key):
+        # Worker thread. The registry swap happens inside refresh_*; the signals are
+        # queued to the GUI thread, where the wells pick up the new table.
+        try:
+            if kind == 'catalog':
+                self.catalogReloaded.emit(key, refresh_catalog(key))
+            else:
+                self.formationReloaded.emit(key, refresh_formation(key))
+        except Exception as e:
+            self.reloadFailed.emit(key, str(e))
+
+    def drop_released(self):
+        # Tables no well holds any more stop being watched.
+        held = {('catalog', key) for key in catalog_references()}
+        held |= {('formation', key) for key in formation_references()}
+        for path in list(self.tables):
+            self.tables[path] &= held
+            if not self.tables[path]:
+                del self.tables[path]
+                self.stamps.pop(path, None)
+                if path in self.watcher.files():
+                    self.watcher.removePath(path)
+
+    def stop(self):
+        self.poll_timer.stop()
+        self.settle_timer.stop()
+        self.executor.shutdown(wait=True)
+
+
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
@@ -0,0 +1,95 @@
+import numpy as np
+
+
+class ChainGraph:
+    # Every distinct at-head in the catalog is a state. For a given multiplier the
+    # casing chain step (nearest bit size -> internal diameter -> next at-head)
+    # only depends on the state, so it is tabulated once and then resolved by
+    # indexing.
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.at_heads = np.unique(catalog.at_head[~np.isnan(catalog.at_head)])
+        self._tables = {}
+
+    def state_of(self, at_head_value):
+        if at_head_value is None:
+            return -1
+        matches = np.flatnonzero(np.abs(self.at_heads - float(at_head_value)) < 0.01)
+        return int(matches[0]) if matches.size else -1
+
+    def table(self, multiplier):
+        multiplier = float(multiplier)
+        table = self._tables.get(multiplier)
+        if table is None:
+            table = self._build_table(multiplier)
+            self._tables[multiplier] = table
+        return table
+
+    def _build_table(self, multiplier):
+        catalog = self.catalog
+        db_values = self.at_heads * multiplier
+        state_count = len(self.at_heads)
+        bit_rows = catalog._bit_rows
+        if bit_rows.size == 0:
+            return {
+                'db_value': db_values,
+                'bit_size': np.full(state_count, np.nan),
+                'internal_diameter': np.full(state_count, np.nan),
+                'next_state': np.full(state_count, -1)
+            }
+
+        distances = np.abs(catalog.bit_size[bit_rows][None, :] - db_values[:, None])
+        rows = bit_rows[np.argmin(distances, axis=1)]
+        internal_diameters = catalog.internal_diameter[rows]
+        return {
+            'db_value': db_values,
+            'bit_size': catalog.bit_size[rows],
+            'internal_diameter': internal_diameters,
+            'next_state': self._reference_states(internal_diameters)
+        }
+
+    def _reference_states(self, internal_diameters):
+        catalog = self.catalog
+        diameter_rows = catalog._diameter_rows
+        next_states = np.full(len(internal_diameters), -1)
+        if diameter_rows.size == 0:
+            return next_states
+        matches = np.abs(catalog.internal_diameter[diameter_rows][None, :] - internal_diameters[:, None]) < 0.01
+        found = matches.any(axis=1)
+        reference_at_heads = catalog.at_head[diameter_rows[np.argmax(matches, axis=1)]]
+        for i in np.flatnonzero(found & ~np.isnan(reference_at_heads)):
+            next_states[i] = self.state_of(reference_at_heads[i])
+        return next_states
+
+    def resolve(self, at_head_value, multipliers):
+        sections = []
+        state = self.state_of(at_head_value)
+        for multiplier in multipliers:
+            if state < 0:
+                break
+            table = self.table(multiplier)
+            if np.isnan(table['bit_size'][state]):
+                break
+            next_state = int(table['next_state'][state])
+            sections.append({
+                'at_head': float(self.at_heads[state]),
+                'db_value': float(table['db_value'][state]),
+                'nearest_bit_size': float(table['bit_size'][state]),
+                'internal_diameter': float(table['internal_diameter'][state]),
+                'next_at_head': float(self.at_heads[next_state]) if next_state >= 0 else None
+            })
+            state = next_state
+        return sections
+
+    def resolve_all(self, multipliers, start_states=None):
+        # Chains for many starting states at once: an (n_starts, n_sections + 1)
+        # array of state indices, -1 once the chain breaks.
+        if start_states is None:
+            start_states = np.arange(len(self.at_heads))
+        states = np.full((len(start_states), len(multipliers) + 1), -1)
+        states[:, 0] = start_states
+        for i, multiplier in enumerate(multipliers):
+            current = states[:, i]
+            alive = current >= 0
+            states[alive, i + 1] = self.table(multiplier)['next_state'][current[alive]]
+        return states
@@ -0,0 +1,97 @@
+import numpy as np
+from had_engine import evaluate_string, string_sections
+from records import field
+from design_factors import DEFAULT_FACTORS
+
+# Loads follow the HAD convention: 1 MPa of collapse load per 100 m of depth.
+PRESSURE_GRADIENT = 0.01
+
+
+def biaxial_factor(z):
+    # Collapse reduction under axial tension, from the ellipse y**2 + z**2 + y*z = 1
+    # that calculate_l_values solves for.
+    z = np.clip(z, 0.0, 1.0)
+    return (-z + np.sqrt(4 - 3 * z**2)) / 2
+
+
+def depth_profile(sections, depth, dz=1.0, pressure_gradient=PRESSURE_GRADIENT, gas_gradient=0.0,
+                  factors=DEFAULT_FACTORS):
+    # sections run from the shoe upwards as (row, length) pairs, as string_sections
+    # returns them. Depths past the designed string come back as NaN with section -1.
+    lengths = np.array([length for _, length in sections], dtype=float)
+    keep = lengths > 0
+    rows = [row for (row, _), k in zip(sections, keep) if k]
+    lengths = lengths[keep]
+
+    unit_weight = np.array([float(row['unit_weight']) for row in rows]) * factors.weight_factor
+    tensile = np.array([float(row['tensile_strength']) for row in rows]) * 1000
+    external = np.array([float(row['external_pressure']) for row in rows])
+    internal = np.array([float(field(row, 'internal_pressure')) for row in rows])
+
+    bottoms = depth - np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    tops = bottoms - lengths
+    weight_below = np.concatenate(([0.0], np.cumsum(unit_weight * lengths)[:-1]))
+
+    z = np.arange(0.0, depth + dz / 2, dz)
+    z[-1] = min(z[-1], depth)
+    # Tops decrease from the shoe upwards; a point belongs to the first section whose
+    # top is at or above it, so at a joint the lower section is the one loaded.
+    order = np.searchsorted(-tops, -z, side='left')
+    covered = order < len(tops)
+    section = np.where(covered, order, -1)
+    index = np.clip(section, 0, None)
+
+    tension = np.full(len(z), np.nan)
+    tension_capacity = np.full(len(z), np.nan)
+    collapse_rating = np.full(len(z), np.nan)
+    burst_rating = np.full(len(z), np.nan)
+    if len(rows):
+        tension[covered] = (weight_below[index] + unit_weight[index] * (bottoms[index] - z))[covered]
+        tension_capacity[covered] = tensile[index][covered]
+        collapse_rating[covered] = external[index][covered]
+        burst_rating[covered] = internal[index][covered]
+
+    collapse_load = z * pressure_gradient
+    burst_load = depth * pressure_gradient - gas_gradient * (depth - z)
+    collapse_resistance = collapse_rating * biaxial_factor(tension / tension_capacity)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        profile = {
+            'depth': z,
+            'section': section,
+            'tension': tension,
+            'tension_capacity': tension_capacity,
+            'tension_sf': tension_capacity / tension,
+            'collapse_load': collapse_load,
+            'collapse_resistance': collapse_resistance,
+            'collapse_sf': collapse_resistance / collapse_load,
+            'burst_load': burst_load,
+            'burst_resistance': burst_rating,
+            'burst_sf': burst_rating / burst_load
+        }
+    return profile
+
+
+def string_profile(catalog, at_head, metal_type, depth, dz=1.0, factors=DEFAULT_FACTORS, **loads):
+    # Profile of the string evaluate_string designs for one (at head, grade) pair.
+    candidates, reached = catalog.had_index_for(factors).candidate_records(at_head, metal_type, depth)
+    string = evaluate_string(candidates, reached, depth, factors)
+    if string is None or not reached:
+        return None
+    sections = string_sections(string['candidates'], string['l_values'], depth)
+    return depth_profile(sections, depth, dz, factors=factors, **loads)
+
+
+def safety_summary(profile):
+    summary = {}
+    for name in ('tension_sf', 'collapse_sf', 'burst_sf'):
+        values = profile[name]
+        valid = np.flatnonzero(np.isfinite(values))
+        if valid.size == 0:
+            summary[name] = {'min': None, 'depth': None}
+            continue
+        lowest = valid[np.argmin(values[valid])]
+        summary[name] = {'min': float(values[lowest]), 'depth': float(profile['depth'][lowest])}
+    covered = profile['depth'][profile['section'] >= 0]
+    summary['string_top'] = float(covered.min()) if covered.size else None
+    return summary
@@ -0,0 +1,109 @@
+import json
+import argparse
+
+# Profiles are JSON files; "format" is the layout of the file, "version" the
+# company's own revision of its factors.
+PROFILE_FORMAT = 1
+DEFAULT_PROFILE = {
+    'format': PROFILE_FORMAT,
+    'name': "Default",
+    'version': "1",
+    'had': {
+        # HAD = 100 * external pressure / (s * divisor), s per metal type.
+        's_values': {
+            'K-55': 1.05,
+            'L-80': 1.08,
+            'N-80': 1.08,
+            'P-110': 1.125,
+            'Q-125': 1.125,
+            'T-95': 1.125,
+            'C-90': 1.125
+        },
+        'default_s': 1.08,
+        'divisor': 1.08
+    },
+    'casing': {
+        # lbs/ft to kg/m style weight factor and the tensile design factor of the L values.
+        'weight_factor': 1.488,
+        'tension_factor': 1.75
+    },
+    'drill_pipe': {
+        'pipe_weight_factor': 1.08,
+        'safety_factor': 1.5,
+        'steel_factor': 7.85,
+        'mud_factor': 1.5
+    }
+}
+
+
+class DesignFactors:
+    # One design-factor profile. Groups and keys a profile leaves out keep their
+    # defaults, so a company's file only lists the factors it changes.
+    def __init__(self, profile=None, path=None):
+        self.path = path
+        merged = json.loads(json.dumps(DEFAULT_PROFILE))
+        for key, value in (profile or {}).items():
+            if key not in merged:
+                raise ValueError(f"Unknown design factor group '{key}'")
+            if not isinstance(merged[key], dict):
+                merged[key] = value
+                continue
+            for name, factor in value.items():
+                if name not in merged[key]:
+                    raise ValueError(f"Unknown design factor '{key}.{name}'")
+                if name == 's_values':
+                    merged[key][name].update({grade: float(s) for grade, s in factor.items()})
+                else:
+                    merged[key][name] = float(factor)
+        if merged['format'] != PROFILE_FORMAT:
+            raise ValueError(f"Design factor profile format {merged['format']} is not supported")
+        self.profile = merged
+
+        self.name = merged['name']
+        self.version = str(merged['version'])
+        self.s_values = merged['had']['s_values']
+        self.default_s = merged['had']['default_s']
+        self.had_divisor = merged['had']['divisor']
+        self.weight_factor = merged['casing']['weight_factor']
+        self.tension_factor = merged['casing']['tension_factor']
+        self.pipe_weight_factor = merged['drill_pipe']['pipe_weight_factor']
+        self.safety_factor = merged['drill_pipe']['safety_factor']
+        self.steel_factor = merged['drill_pipe']['steel_factor']
+        self.mud_factor = merged['drill_pipe']['mud_factor']
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f), path)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.profile, f, indent=2)
+        self.path = path
+
+    def s_value(self, metal_type):
+        return self.s_values.get(metal_type, self.default_s)
+
+    def had_key(self):
+        # HAD values only depend on these, so profiles that share them share an index.
+        return (tuple(sorted(self.s_values.items())), self.default_s, self.had_divisor)
+
+    def label(self):
+        return f"{self.name} v{self.version}"
+
+
+DEFAULT_FACTORS = DesignFactors()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the default design-factor profile to edit per project.")
+    parser.add_argument("path", help="Profile to write (.json)")
+    parser.add_argument("--name", default=DEFAULT_PROFILE['name'])
+    args = parser.parse_args()
+    factors = DesignFactors({'name': args.name})
+    factors.save(args.path)
+    print(f"Wrote {factors.label()} to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
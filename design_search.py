@@ -0,0 +1,161 @@
+import argparse
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from catalog import load_catalog
+from had_engine import METAL_TYPES
+from grade_sweep import evaluate_grade, pareto_front
+from shared_catalog import SharedTables, attach
+from drill_pipe import section_names
+
+_worker_catalog = None
+
+
+def _init_worker(manifest):
+    global _worker_catalog
+    _worker_catalog, _ = attach(manifest)
+
+
+def search_designs(catalog_path, depths, multiplier_options, grade_options=None,
+                   dcsg_values=None, max_workers=None):
+    if grade_options is None:
+        grade_options = [METAL_TYPES] * len(depths)
+    catalog = load_catalog(catalog_path)
+    if dcsg_values is None:
+        dcsg_values = catalog.dcsg_candidates()
+
+    stats = {'dcsg_values': len(dcsg_values), 'combinations': 0, 'designs': 0, 'pruned': 0}
+    front = []
+    started = time.perf_counter()
+    with SharedTables(catalog) as shared, \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(shared.manifest,)) as executor:
+        jobs = [(dcsg, depths, multiplier_options, grade_options) for dcsg in dcsg_values]
+        for designs, job_stats in executor.map(_search_job, jobs, chunksize=4):
+            front = pareto_front(front + designs)
+            for key in ('combinations', 'designs', 'pruned'):
+                stats[key] += job_stats[key]
+    stats['seconds'] = time.perf_counter() - started
+    front.sort(key=lambda design: design['string_weight'])
+    return front, stats
+
+
+def _search_job(job):
+    return search_from_dcsg(_worker_catalog, *job)
+
+
+def search_from_dcsg(catalog, dcsg, depths, multiplier_options, grade_options):
+    section_count = len(depths)
+    stats = {'combinations': _combination_count(multiplier_options, grade_options), 'designs': 0, 'pruned': 0}
+    at_head = catalog.at_head_for_dcsg(dcsg)
+    if at_head is None:
+        stats['pruned'] = stats['combinations']
+        return [], stats
+
+    graph = catalog.chain_graph()
+    tables = [[graph.table(multiplier) for multiplier in multipliers] for multipliers in multiplier_options]
+    names = section_names(section_count)
+    evaluations = {}
+    designs = []
+
+    def evaluate(section_index, state, metal_type):
+        key = (section_index, state, metal_type)
+        if key not in evaluations:
+            evaluations[key] = evaluate_grade(catalog, names[section_index],
+                                              float(graph.at_heads[state]), depths[section_index], metal_type)
+        return evaluations[key]
+
+    def extend(section_index, state, chosen):
+        remaining = _combination_count(multiplier_options[section_index:], grade_options[section_index:])
+        feasible = [evaluate(section_index, state, metal_type) for metal_type in grade_options[section_index]]
+        feasible = [result for result in feasible if result['feasible']]
+        if not feasible:
+            stats['pruned'] += remaining
+            return
+
+        last_section = section_index == section_count - 1
+        per_multiplier = remaining // len(multiplier_options[section_index])
+        for multiplier, table in zip(multiplier_options[section_index], tables[section_index]):
+            next_state = table['next_state'][state]
+            if np.isnan(table['bit_size'][state]) or (next_state < 0 and not last_section):
+                stats['pruned'] += per_multiplier
+                continue
+
+            stats['pruned'] += per_multiplier // len(grade_options[section_index]) * (len(grade_options[section_index]) - len(feasible))
+            for result in feasible:
+                section = {
+                    'at_head': float(graph.at_heads[state]),
+                    'multiplier': multiplier,
+                    'metal_type': result['metal_type'],
+                    'nearest_bit_size': float(table['bit_size'][state]),
+                    'internal_diameter': float(table['internal_diameter'][state]),
+                    'string_weight': result['string_weight'],
+                    'had_margin': result['had_margin'],
+                    'tensile_margin': result['tensile_margin']
+                }
+                if last_section:
+                    designs.append(_make_design(dcsg, chosen + [section]))
+                else:
+                    extend(section_index + 1, int(next_state), chosen + [section])
+
+    extend(0, graph.state_of(at_head), [])
+    stats['designs'] = len(designs)
+    return pareto_front(designs), stats
+
+
+def _combination_count(multiplier_options, grade_options):
+    count = 1
+    for multipliers, grades in zip(multiplier_options, grade_options):
+        count *= len(multipliers) * len(grades)
+    return count
+
+
+def _make_design(dcsg, sections):
+    return {
+        'dcsg': dcsg,
+        'sections': sections,
+        'string_weight': sum(section['string_weight'] for section in sections),
+        'had_margin': min(section['had_margin'] for section in sections),
+        'tensile_margin': min(section['tensile_margin'] for section in sections)
+    }
+
+
+def parse_options(text, count, cast=str):
+    options = [cast(value) for value in text.split(',') if value.strip()]
+    return [options] * count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search casing designs over initial Dcsg, multipliers and grades.")
+    parser.add_argument("catalog", help="Casing table (.xlsx)")
+    parser.add_argument("--depths", type=float, nargs='+', required=True,
+                        help="Depth per section, production first")
+    parser.add_argument("--multipliers", action='append',
+                        help="Comma separated multipliers; give once for all sections or once per section")
+    parser.add_argument("--grades", default=",".join(METAL_TYPES), help="Comma separated metal types")
+    parser.add_argument("--dcsg", help="Comma separated initial Dcsg values (default: every At body value)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    section_count = len(args.depths)
+    multipliers = args.multipliers or ["1.05,1.1,1.15,1.2,1.25,1.3,1.35,1.4"]
+    if len(multipliers) == 1:
+        multiplier_options = parse_options(multipliers[0], section_count, float)
+    else:
+        multiplier_options = [parse_options(text, 1, float)[0] for text in multipliers]
+    grade_options = parse_options(args.grades, section_count)
+    dcsg_values = args.dcsg.split(',') if args.dcsg else None
+
+    front, stats = search_designs(args.catalog, args.depths, multiplier_options, grade_options,
+                                  dcsg_values, args.workers)
+    print(f"Searched {stats['combinations']} combinations from {stats['dcsg_values']} Dcsg values "
+          f"in {stats['seconds']:.2f} s ({stats['pruned']} pruned, {stats['designs']} feasible)")
+    print(f"{'Dcsg':<10}{'Weight (kg)':<15}{'HAD Margin':<13}{'Tensile SF':<12}Sections")
+    for design in front[:args.top]:
+        sections = ", ".join(f"{s['metal_type']} x{s['multiplier']}" for s in design['sections'])
+        print(f"{design['dcsg']:<10}{design['string_weight']:<15.1f}{design['had_margin']:<13.1f}"
+              f"{design['tensile_margin']:<12.2f}{sections}")
+
+
+if __name__ == "__main__":
+    main()
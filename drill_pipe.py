@@ -0,0 +1,303 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+from math import pi, sqrt
+from design_factors import DEFAULT_FACTORS
+
+ADDITIONAL_COLUMNS = ['Outer diameter', 'AP', 'AIP', 'Mp', 'qp', 'b', 'γ']
+BASIC_FIELDS = ['WOB', 'C', 'qc', 'qp', 'Lhw', 'P', 'γ', 'H']
+WELL_FIELDS = ['Dep', 'Dhw', 'qhw', 'dα', 'n']
+CONSTANT_FIELDS = ['K1', 'K2', 'K3']
+SECTION_NAMES = ['Production', 'Intermediate', 'Surface']
+
+
+class FormationTable:
+    def __init__(self, df, path=None):
+        self.path = path
+        self.df = df
+        self.drill_collar_diameters_mm = pd.to_numeric(df['Drilling collars outer diameter'], errors='coerce').dropna().values.astype(float)
+        self.drill_pipe_data = {
+            'Drill pipe Metal grade': df['Drill pipe Metal grade'].unique().tolist(),
+            'Minimum tensile strength(psi)': df['Minimum tensile strength(psi)'].unique().tolist(),
+            'Minimum tensile strength(mpi)': df['Minimum tensile strength(mpi)'].unique().tolist()
+        }
+
+    @classmethod
+    def from_xlsx(cls, path):
+        try:
+            df = pd.read_excel(path, sheet_name='sheet1')
+            df.columns = df.columns.str.strip()
+            df['qp'] = df['qp'].astype(float)
+            df['γ'] = df['γ'].astype(float)
+            return cls(df, path)
+        except Exception as e:
+            raise Exception(f"Error loading drill collar data: {e}")
+
+    def nearest_drill_collar(self, value):
+        if len(self.drill_collar_diameters_mm) == 0:
+            return None
+        idx = (np.abs(self.drill_collar_diameters_mm - value)).argmin()
+        return self.drill_collar_diameters_mm[idx]
+
+    def data_for_gamma(self, gamma_value):
+        try:
+            gamma_value = float(gamma_value)
+            matching_rows = self.df[np.isclose(self.df['γ'], gamma_value, atol=1e-8)]
+            if matching_rows.empty:
+                return None
+            row = matching_rows.iloc[0]
+            return {col: row[col] for col in ADDITIONAL_COLUMNS}
+        except (ValueError, IndexError):
+            return None
+
+    def select_grade(self, C_new):
+        strengths = self.drill_pipe_data['Minimum tensile strength(mpi)']
+        array = np.array(strengths)
+        valid = ~np.isnan(array)
+        nearest_mpi = array[valid][np.argmin(np.abs(array[valid] - C_new))]
+        metal_grade = self.drill_pipe_data['Drill pipe Metal grade'][strengths.index(nearest_mpi)]
+        return metal_grade, nearest_mpi
+
+    def grade_strengths(self):
+        # (grade, Minimum tensile strength(mpi)) pairs, paired by position as
+        # select_grade pairs them.
+        pairs = zip(self.drill_pipe_data['Drill pipe Metal grade'], self.drill_pipe_data['Minimum tensile strength(mpi)'])
+        return [(grade, float(strength)) for grade, strength in pairs if not np.isnan(strength)]
+
+    def pipe_sizes(self):
+        # Drill pipe rows of the table (AP, AIP, Mp, qp), with the outer diameter
+        # label of the group they sit in and that diameter in metres.
+        sizes = []
+        label = None
+        for _, row in self.df.iterrows():
+            if isinstance(row.get('Outer diameter'), str):
+                label = row['Outer diameter']
+            if pd.isna(row.get('AP')) or label is None:
+                continue
+            match = re.search(r'([\d.]+)\s*mm', label)
+            sizes.append({
+                'label': " ".join(label.split()),
+                'od': float(match.group(1)) / 1000 if match else np.nan,
+                'AP': float(row['AP']),
+                'AIP': float(row['AIP']),
+                'Mp': float(row['Mp']),
+                'qp': float(row['qp'])
+            })
+        return sizes
+
+    def select_grades(self, C_new):
+        strengths = np.array(self.drill_pipe_data['Minimum tensile strength(mpi)'], dtype=float)
+        valid = np.flatnonzero(~np.isnan(strengths))
+        nearest = valid[np.argmin(np.abs(strengths[valid][None, :] - np.asarray(C_new)[:, None]), axis=1)]
+        grades = self.drill_pipe_data['Drill pipe Metal grade']
+        return [grades[i] for i in nearest], strengths[nearest]
+
+
+def section_names(count):
+    # Casing sections from the shoe outwards; deeper programs get numbered
+    # intermediates and a conductor outside the surface string.
+    if count <= 2:
+        return ['Production', 'Surface'][:count]
+    if count == 3:
+        return list(SECTION_NAMES)
+    intermediates = ["Intermediate"] if count == 4 else [f"Intermediate {k}" for k in range(count - 3, 0, -1)]
+    return ['Production'] + intermediates + ['Surface', 'Conductor']
+
+
+def interval_count(data):
+    count = 0
+    while any(f"{field}_{count + 1}" in data for field in BASIC_FIELDS):
+        count += 1
+    return count
+
+
+def interval_section(data, i):
+    return data.get(f"Section_{i}") or SECTION_NAMES[min(i, len(SECTION_NAMES)) - 1]
+
+
+_formations = {}
+_references = {}
+_pending = {}
+_prefetch_executor = None
+
+
+def prefetch_formation(path):
+    # Reads the workbook on a background thread; load_formation takes the result.
+    global _prefetch_executor
+    key = os.path.abspath(path)
+    if key in _formations or key in _pending:
+        return _pending.get(key)
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="formation-prefetch")
+    _pending[key] = _prefetch_executor.submit(FormationTable.from_xlsx, path)
+    return _pending[key]
+
+
+def load_formation(path):
+    key = os.path.abspath(path)
+    formation = _formations.get(key)
+    future = _pending.pop(key, None)
+    if formation is None:
+        if future is not None:
+            try:
+                formation = future.result()
+            except Exception:
+                formation = None
+        if formation is None:
+            formation = FormationTable.from_xlsx(path)
+        _formations[key] = formation
+    return formation
+
+
+def refresh_formation(path):
+    # Parses the workbook again; the registry only takes the new table if a well
+    # still holds the path.
+    key = os.path.abspath(path)
+    formation = FormationTable.from_xlsx(path)
+    if key in _formations:
+        _formations[key] = formation
+    return formation
+
+
+def acquire_formation(path):
+    formation = load_formation(path)
+    key = os.path.abspath(path)
+    _references[key] = _references.get(key, 0) + 1
+    return formation
+
+
+def release_formation(path):
+    key = os.path.abspath(path)
+    count = _references.get(key, 0) - 1
+    if count > 0:
+        _references[key] = count
+        return
+    _references.pop(key, None)
+    _formations.pop(key, None)
+
+
+def formation_references():
+    return dict(_references)
+
+
+def calculate_interval(table, WOB, C, qc, H, Lhw, qp, P, γ, K1, K2, K3, dα, Dep, Dhw, qhw, n, dec, DB,
+                       factors=DEFAULT_FACTORS):
+    # One "Instance" of WellDataApp.calculate_and_display; dec and DB in metres.
+    additional_data = table.data_for_gamma(γ)
+    if not additional_data:
+        raise ValueError(f"No additional data found for the given γ value: {γ}")
+    b = additional_data.get('b', 0)
+    Mp = additional_data.get('Mp', 0)
+    Ap = additional_data.get('AP', 0)
+    Aip = additional_data.get('AIP', 0)
+
+    L0c = WOB / (C * qc * b)
+    Lp = H - (Lhw + L0c)
+
+    T = ((factors.pipe_weight_factor * Lp * qp + Lhw * qhw + L0c * qc) * b) / Ap
+    Tc = T + P * (Aip / Ap)
+    Tec = Tc * K1 * K2 * K3
+
+    Np = dα * γ * (Lp * Dep**2 + L0c * dec**2 + Lhw * Dhw**2) * n**1.7
+    NB = 3.2 * 10**-2 * (WOB**0.5) * (DB**1.75) * n
+    tau = (30 * ((Np + NB) * 10**3 / (pi * n * Mp))) * 10**-6
+
+    eq = sqrt((Tec*10**-1)**2 + 4*tau**2)
+    C_new = eq * factors.safety_factor
+    metal_grade, SegmaC = table.select_grade(C_new)
+
+    numerator = ((SegmaC/factors.safety_factor)**2 - 4 * tau**2) * 10**12
+    denominator = ((factors.steel_factor - factors.mud_factor)**2) * 10**8
+    Lmax = sqrt(numerator / denominator) - ((L0c*qc + Lhw*qhw) / qp)
+
+    return {
+        'metal_grade': metal_grade,
+        'H': H,
+        'L0c': L0c,
+        'Lp': Lp,
+        'Tec': Tec,
+        'tau': tau,
+        'C_new': C_new,
+        'SegmaC': SegmaC,
+        'Lmax': Lmax
+    }
+
+
+def evaluate_intervals(table, WOB, C, qc, H, Lhw, qp, P, γ, K1, K2, K3, dα, Dep, Dhw, qhw, n, dec, DB,
+                       table_gamma=None, grades=None, factors=DEFAULT_FACTORS):
+    # calculate_interval for every interval at once; per-interval inputs are arrays
+    # and the well constants scalars (or arrays of the same length). Rows that the
+    # scalar path would reject keep their message in 'error' instead of stopping the
+    # batch. table_gamma, when given, picks the formation row instead of γ; grades
+    # fixes the drill pipe grade of every row instead of selecting it from C_new.
+    WOB, C, qc, H, Lhw, qp, P, γ, dec, DB = (np.asarray(value, dtype=float)
+                                           for value in (WOB, C, qc, H, Lhw, qp, P, γ, dec, DB))
+    table_gamma = γ if table_gamma is None else np.asarray(table_gamma, dtype=float)
+    count = len(WOB)
+    b, Mp, Ap, Aip = (np.full(count, np.nan) for _ in range(4))
+    error = [None] * count
+    for gamma in np.unique(table_gamma):
+        rows = np.flatnonzero(table_gamma == gamma)
+        additional_data = table.data_for_gamma(gamma)
+        if not additional_data:
+            for row in rows:
+                error[row] = f"No additional data found for the given γ value: {float(gamma)}"
+            continue
+        b[rows] = additional_data.get('b', 0)
+        Mp[rows] = additional_data.get('Mp', 0)
+        Ap[rows] = additional_data.get('AP', 0)
+        Aip[rows] = additional_data.get('AIP', 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        L0c = WOB / (C * qc * b)
+        Lp = H - (Lhw + L0c)
+
+        T = ((factors.pipe_weight_factor * Lp * qp + Lhw * qhw + L0c * qc) * b) / Ap
+        Tc = T + P * (Aip / Ap)
+        Tec = Tc * K1 * K2 * K3
+
+        Np = dα * γ * (Lp * Dep**2 + L0c * dec**2 + Lhw * Dhw**2) * n**1.7
+        NB = 3.2 * 10**-2 * (WOB**0.5) * (DB**1.75) * n
+        tau = (30 * ((Np + NB) * 10**3 / (pi * n * Mp))) * 10**-6
+
+        eq = np.sqrt((Tec*10**-1)**2 + 4*tau**2)
+        C_new = eq * factors.safety_factor
+        if grades is None:
+            finite = np.isfinite(C_new)
+            metal_grade, SegmaC = table.select_grades(np.where(finite, C_new, 0.0))
+        else:
+            strengths = dict(table.grade_strengths())
+            metal_grade = list(grades)
+            SegmaC = np.array([strengths[grade] for grade in metal_grade], dtype=float)
+
+        numerator = ((SegmaC/factors.safety_factor)**2 - 4 * tau**2) * 10**12
+        denominator = ((factors.steel_factor - factors.mud_factor)**2) * 10**8
+        Lmax = np.sqrt(numerator / denominator) - ((L0c*qc + Lhw*qhw) / qp)
+
+    zero_division = (C * qc * b == 0) | (Ap == 0) | (n * Mp == 0) | (qp == 0)
+    for row in range(count):
+        if error[row] is not None:
+            continue
+        if zero_division[row]:
+            error[row] = "float division by zero"
+        elif numerator[row] < 0:
+            error[row] = "math domain error"
+    for row in range(count):
+        if error[row] is not None:
+            metal_grade[row] = None
+
+    return {
+        'metal_grade': metal_grade,
+        'H': H,
+        'L0c': L0c,
+        'Lp': Lp,
+        'Tec': Tec,
+        'Np': Np,
+        'tau': tau,
+        'C_new': C_new,
+        'SegmaC': SegmaC,
+        'Lmax': Lmax,
+        'error': error
+    }
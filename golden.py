@@ -0,0 +1,239 @@
+import argparse
+import io
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+
+CASING_TABLE = "FinalCasingTable.xlsx"
+FORMATION_TABLE = "Formation design.xlsx"
+GOLDEN_FILE = "golden_cases.json"
+# Deliberate departures from the legacy outputs, kept apart from the legacy goldens.
+CHANGES_FILE = "golden_changes.json"
+# The user-032 commit: the last tree whose GUI classes still ran the original
+# catalog scans and drill pipe math, and the one that recorded golden_cases.json.
+ORACLE_REVISION = "2f58a830d05bc0d813a04434f38da483b7ba1e2b"
+REL_TOLERANCE = 1e-9
+ABS_TOLERANCE = 1e-6
+
+DCSG_VALUES = ['127.0', '139.7', '168.3', '177.8', '193.7']
+MULTIPLIERS = ['1.05', '1.1', '1.11', '1.15', '1.2', '1.25', '1.3', '1.35']
+METAL_TYPES = ['K-55', 'L-80', 'N-80', 'P-110', 'Q-125', 'T-95', 'C-90']
+GAMMA_VALUES = ['1.02', '1.04', '1.06', '1.08']
+
+
+def base_case():
+    with open('casing_data.json') as f:
+        casing = json.load(f)
+    with open('saved_data.json') as f:
+        data_input = json.load(f)
+    casing['file_path'] = CASING_TABLE
+    return {'name': "saved", 'casing': casing, 'data_input': data_input}
+
+
+def build_corpus(variants, seed=0):
+    rng = random.Random(seed)
+    base = base_case()
+    cases = [base]
+    for k in range(variants):
+        casing = json.loads(json.dumps(base['casing']))
+        data_input = dict(base['data_input'])
+        casing['initial_dcsg'] = rng.choice(DCSG_VALUES)
+        depth = rng.randrange(1000, 4500, 250)
+        for section in casing['section_inputs']:
+            section['multiplier'] = rng.choice(MULTIPLIERS)
+            section['metal_type'] = rng.choice(METAL_TYPES)
+            section['depth'] = str(depth)
+            depth = max(250, depth - rng.randrange(250, 1500, 250))
+        for i in range(1, 4):
+            data_input[f'WOB_{i}'] = str(rng.randrange(8000, 24000, 1000))
+            data_input[f'H_{i}'] = str(rng.randrange(200, 3000, 50))
+            data_input[f'γ_{i}'] = rng.choice(GAMMA_VALUES)
+        data_input['n'] = str(rng.choice([60, 80, 100, 120]))
+        cases.append({'name': f"variant-{k + 1}", 'casing': casing, 'data_input': data_input})
+    return cases
+
+
+def record_legacy(variants, seed=0):
+    # Golden outputs come from the GUI classes as they were before the engines took
+    # over: ORACLE_REVISION is checked out into a temporary directory and its own
+    # golden.py records there, offscreen, so nothing later in the series can change
+    # the answers and the recording's data files never touch the working directory.
+    # The saved inputs the corpus starts from are the current ones.
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as workdir:
+        archive = subprocess.run(['git', 'archive', ORACLE_REVISION], cwd=here, capture_output=True, check=True)
+        with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+            tar.extractall(workdir)
+        for name in ('casing_data.json', 'saved_data.json'):
+            shutil.copy(name, workdir)
+        output = os.path.join(workdir, "recorded.json")
+        subprocess.run([sys.executable, "golden.py", "record", "--variants", str(variants), "--seed", str(seed),
+                        "--golden", output],
+                       cwd=workdir, check=True, env=dict(os.environ, QT_QPA_PLATFORM='offscreen'))
+        with open(output, encoding='utf-8') as f:
+            return json.load(f)['cases']
+
+
+def _casing_row(row):
+    return {key: row[key] for key in ('section', 'multiplier', 'metal_type', 'dcsg', 'at_body',
+                                      'nearest_bit_size', 'internal_diameter')}
+
+
+def _had_row(row):
+    return {key: _plain(row[key]) for key in ('had', 'external_pressure', 'metal_type', 'tensile_strength',
+                                              'unit_weight', 'l_value') if key in row}
+
+
+def _drill_pipe_row(row):
+    return {key: _plain(row[key]) for key in ('interval', 'H', 'metal_grade', 'Tec', 'tau', 'Lmax')}
+
+
+def _plain(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def run_engines(case, catalog, formation):
+    from well_engine import calculate_well
+    report = calculate_well(catalog, formation, case)
+    return {
+        'casing': [_casing_row(row) for row in report['casing']],
+        'calculated_values': [list(value) for value in report['calculated_values']],
+        'had': [_had_row(row) for row in report['had']],
+        'drill_pipe': [_drill_pipe_row(row) for row in report['drill_pipe']],
+        'messages': report['messages']
+    }
+
+
+def compare(expected, actual, path=""):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in expected or key not in actual:
+                differences.append(f"{path}.{key}: missing on one side")
+            else:
+                differences.extend(compare(expected[key], actual[key], f"{path}.{key}"))
+        return differences
+    if isinstance(expected, (list, tuple)) and isinstance(actual, (list, tuple)):
+        if len(expected) != len(actual):
+            return [f"{path}: length {len(expected)} != {len(actual)}"]
+        differences = []
+        for i, (a, b) in enumerate(zip(expected, actual)):
+            differences.extend(compare(a, b, f"{path}[{i}]"))
+        return differences
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)) \
+            and not isinstance(expected, bool) and not isinstance(actual, bool):
+        if math.isclose(expected, actual, rel_tol=REL_TOLERANCE, abs_tol=ABS_TOLERANCE):
+            return []
+        return [f"{path}: {expected} != {actual}"]
+    if expected != actual:
+        return [f"{path}: {expected!r} != {actual!r}"]
+    return []
+
+
+def load_changes(path):
+    # {case name: {output key: (request, expected value)}}; each change names the
+    # request that made it and why, and later changes win.
+    if not os.path.exists(path):
+        return {}
+    expected = {}
+    with open(path, encoding='utf-8') as f:
+        for change in json.load(f)['changes']:
+            for name, outputs in change['cases'].items():
+                for key, value in outputs.items():
+                    expected.setdefault(name, {})[key] = (change['request'], value)
+    return expected
+
+
+def check(cases, changes=None):
+    from catalog import load_catalog
+    from drill_pipe import FormationTable
+
+    started = time.perf_counter()
+    catalog = load_catalog(CASING_TABLE)
+    formation = FormationTable.from_xlsx(FORMATION_TABLE)
+    load_seconds = time.perf_counter() - started
+
+    failures = 0
+    print(f"Catalogs loaded in {load_seconds * 1000:.1f} ms")
+    print(f"{'Case':<14}{'Result':<8}{'Engine ms':>11}{'Legacy ms':>11}{'Peak KiB':>10}")
+    for case in cases:
+        tracemalloc.start()
+        case_started = time.perf_counter()
+        outputs = run_engines(case, catalog, formation)
+        seconds = time.perf_counter() - case_started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        changed = (changes or {}).get(case['name'], {})
+        expected = {key: changed[key][1] if key in changed else case['golden'][key] for key in outputs}
+        differences = compare(expected, outputs)
+        failures += bool(differences)
+        result = 'FAIL' if differences else 'ok*' if changed else 'ok'
+        print(f"{case['name']:<14}{result:<8}{seconds * 1000:>11.2f}"
+              f"{case.get('legacy_seconds', 0) * 1000:>11.1f}{peak / 1024:>10.1f}")
+        for difference in differences[:10]:
+            print(f"    {difference}")
+    requests = sorted({request for name in (changes or {}) for request, _ in changes[name].values()})
+    if requests:
+        print(f"ok* cases are checked against the documented changes of {', '.join(requests)}")
+    print(f"{len(cases) - failures}/{len(cases)} cases agree")
+    return failures == 0
+
+
+def verify_recording(previous, cases):
+    # Differences that stop a recording from replacing the previous goldens: every
+    # previous case must be recorded again from the same inputs with the same outputs.
+    recorded = {case['name']: case for case in cases}
+    differences = []
+    for old in previous:
+        new = recorded.get(old['name'])
+        if new is None:
+            differences.append(f"{old['name']}: not recorded again")
+        elif (old['casing'], old['data_input']) != (new['casing'], new['data_input']):
+            differences.append(f"{old['name']}: inputs changed (different --variants, --seed or saved data)")
+        else:
+            differences.extend(f"{old['name']}{difference}" for difference in compare(old['golden'], new['golden']))
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden-case regression and performance harness.")
+    parser.add_argument("command", choices=["record", "check"])
+    parser.add_argument("--variants", type=int, default=30, help="Generated variants when recording")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--golden", default=GOLDEN_FILE)
+    parser.add_argument("--changes", default=CHANGES_FILE, help="Documented changes to the legacy outputs")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        cases = record_legacy(args.variants, args.seed)
+        if os.path.exists(args.golden):
+            with open(args.golden, encoding='utf-8') as f:
+                differences = verify_recording(json.load(f)['cases'], cases)
+            if differences:
+                print(f"Not overwriting {args.golden}; the new recording disagrees with it:")
+                for difference in differences[:20]:
+                    print(f"    {difference}")
+                print("Record to a new --golden file once the change is understood.")
+                raise SystemExit(1)
+        with open(args.golden, 'w', encoding='utf-8') as f:
+            json.dump({'cases': cases}, f, ensure_ascii=False, indent=1)
+        print(f"Recorded {len(cases)} golden cases to {args.golden}")
+    else:
+        with open(args.golden, encoding='utf-8') as f:
+            cases = json.load(f)['cases']
+        raise SystemExit(0 if check(cases, load_changes(args.changes)) else 1)
+
+
+if __name__ == "__main__":
+    main()
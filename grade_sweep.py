@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+from had_engine import METAL_TYPES, evaluate_string
+from design_factors import DEFAULT_FACTORS
+
+
+def evaluate_grade(catalog, section_name, at_head, depth, metal_type, factors=None):
+    index = catalog.had_index_for(factors)
+    group = index.group(at_head, metal_type)
+    result = {
+        'section': section_name,
+        'metal_type': metal_type,
+        'at_head': at_head,
+        'depth': depth,
+        'rows': 0 if group is None else len(group.rows),
+        'feasible': False,
+        'reached': False,
+        'had': None,
+        'had_margin': float('-inf'),
+        'string_weight': float('inf'),
+        'tensile_margin': 0.0
+    }
+    candidates, reached = index.candidate_records(at_head, metal_type, depth)
+    string = evaluate_string(candidates, reached, depth, factors or DEFAULT_FACTORS)
+    if string is not None:
+        result.update(string)
+        if not result['feasible']:
+            result['string_weight'] = float('inf')
+    return result
+
+
+def _objectives(design):
+    return (design['string_weight'], -design['had_margin'], -design['tensile_margin'])
+
+
+def pareto_front(designs):
+    # Lightest string first; a design survives unless an earlier (no heavier) design
+    # is at least as good on both margins.
+    front = []
+    for design in sorted(designs, key=_objectives):
+        objectives = _objectives(design)
+        if not any(all(a <= b for a, b in zip(_objectives(kept), objectives)) for kept in front):
+            front.append(design)
+    return front
+
+
+def rank_results(results):
+    # Feasible grades front by front: the Pareto front over string weight, HAD margin
+    # and tensile margin first, then the front of what is left, and so on, lightest
+    # first inside a front. Infeasible grades follow, closest HAD first.
+    remaining = [result for result in results if result['feasible']]
+    ranked = []
+    front_number = 0
+    while remaining:
+        front_number += 1
+        front = pareto_front(remaining)
+        # Grades with the same objectives as a front member share its front.
+        tied = {_objectives(result) for result in front}
+        front = sorted((result for result in remaining if _objectives(result) in tied), key=_objectives)
+        for result in front:
+            result['front'] = front_number
+        ranked.extend(front)
+        kept = {id(result) for result in front}
+        remaining = [result for result in remaining if id(result) not in kept]
+    infeasible = sorted((result for result in results if not result['feasible']), key=lambda r: -r['had_margin'])
+    for result in infeasible:
+        result['front'] = None
+    return ranked + infeasible
+
+
+def evaluate_all_grades(catalog, sections, metal_types=METAL_TYPES, max_workers=None, factors=None):
+    # sections is a list of (section_name, at_head, depth); every (section, grade)
+    # pair is independent, so they all run concurrently against the same catalog.
+    jobs = [(section_name, at_head, depth, metal_type)
+            for section_name, at_head, depth in sections
+            for metal_type in metal_types]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda job: evaluate_grade(catalog, *job, factors), jobs))
+
+    ranked = []
+    for section_name, _, _ in sections:
+        section_results = rank_results([r for r in results if r['section'] == section_name])
+        for rank, result in enumerate(section_results, 1):
+            result['rank'] = rank
+        ranked.extend(section_results)
+    return ranked
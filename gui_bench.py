@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+CASING_TABLE = "FinalCasingTable.xlsx"
+ROW_COUNTS = [10, 100, 1000, 10000]
+# A scenario is not run at a size where it would take longer than this, assuming the
+# worst growth seen in the repo's renderers (quadratic in the row count).
+TIME_BUDGET = 30.0
+
+
+def peak_rss_kib():
+    # ru_maxrss is KiB on Linux and bytes on macOS; not available on Windows.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def had_rows(count):
+    from catalog import load_catalog
+    candidates, _ = load_catalog(CASING_TABLE).had_index.candidates(194.5, 'N-80', 3000)
+    rows = []
+    for k in range(count):
+        row = dict(candidates[k % len(candidates)])
+        row['l_value'] = 100.0 + k
+        rows.append(row)
+    return rows
+
+
+def grade_results(count):
+    return [{
+        'section': f"Section {k % 10 + 1}", 'rank': k + 1, 'metal_type': 'N-80', 'feasible': k % 3 != 0,
+        'had': 3000.0 + k, 'had_margin': float(k), 'string_weight': 50000.0 + k,
+        'tensile_margin': 1.5, 'rows': 4
+    } for k in range(count)]
+
+
+def render_casing_rows(workspace, count):
+    casing_tab = workspace.casing_tab
+    casing_tab.file_entry.setText(CASING_TABLE)
+    casing_tab.section_results = []
+    for k in range(count):
+        casing_tab.display_results(k + 1, f"Section {k + 1}", 1.1, 'N-80', "177.8", 215.9, 215.9, 200.0)
+    casing_tab.result_text.grab()
+
+
+def render_had_rows(workspace, rows):
+    had = workspace.casing_tab.had_calculator
+    had.had_text.clear()
+    had.format_and_display_had_section("Production Section", rows)
+    had.had_text.grab()
+
+
+def render_grade_table(workspace, results):
+    workspace.casing_tab.display_grade_results(results)
+    workspace.casing_tab.grade_table.grab()
+
+
+def render_interval_table(workspace, count):
+    workspace.data_input_tab.set_interval_count(count)
+    workspace.data_input_tab.interval_table.grab()
+
+
+def run(row_counts, budget):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    results = []
+
+    def record(name, rows, seconds):
+        results.append({'name': name, 'rows': rows, 'seconds': seconds, 'peak_rss_kib': peak_rss_kib()})
+        rss = results[-1]['peak_rss_kib']
+        print(f"{name:<18}{'' if rows is None else rows:>7}{seconds * 1000:>12.1f}{'-' if rss is None else rss:>14}")
+
+    print(f"{'Scenario':<18}{'Rows':>7}{'Wall ms':>12}{'Peak RSS KiB':>14}")
+    started = time.perf_counter()
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+    app = QApplication.instance() or QApplication([])
+    QMessageBox.critical = QMessageBox.information = QMessageBox.warning = lambda *args: None
+    from main import MainWindow
+    from Test import WellDataApp
+    record("startup", None, time.perf_counter() - started)
+
+    window = None
+
+    def construct():
+        nonlocal window
+        window = MainWindow()
+        window.show()
+        app.processEvents()
+    record("window", None, timed(construct))
+    record("new well", None, timed(lambda: (window.add_well(), app.processEvents())))
+    record("stylesheet", None, timed(lambda: (window.setStyleSheet(""), window.setStyleSheet(WellDataApp.STYLE_SHEET),
+                                               window.grab())))
+
+    workspace = window.wells[0]
+    scenarios = [
+        ("casing results", lambda count: render_casing_rows(workspace, count), lambda count: count),
+        ("HAD table", lambda rows: render_had_rows(workspace, rows), had_rows),
+        ("grade table", lambda rows: render_grade_table(workspace, rows), grade_results),
+        ("interval table", lambda count: render_interval_table(workspace, count), lambda count: count)
+    ]
+    for name, render, make_input in scenarios:
+        previous = None
+        for count in row_counts:
+            if previous is not None and previous[1] * (count / previous[0]) ** 2 > budget:
+                print(f"{name:<18}{count:>7}{'skipped':>12}  (projected over {budget:.0f} s)")
+                continue
+            data = make_input(count)
+            seconds = timed(lambda: render(data))
+            app.processEvents()
+            record(name, count, seconds)
+            previous = (count, seconds)
+
+    window.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offscreen timing of window construction and result rendering.")
+    parser.add_argument("--rows", type=int, nargs='+', default=ROW_COUNTS, help="Result table sizes to render")
+    parser.add_argument("--budget", type=float, default=TIME_BUDGET,
+                        help="Skip sizes projected to take longer than this many seconds")
+    parser.add_argument("--json", help="Also write the measurements to this file")
+    args = parser.parse_args()
+
+    results = run(sorted(args.rows), args.budget)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'results': results}, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
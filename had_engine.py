@@ -0,0 +1,214 @@
+import numpy as np
+from records import catalog_records, sort_by_had, to_dicts
+from design_factors import DEFAULT_FACTORS
+
+METAL_TYPES = ['K-55', 'L-80', 'N-80', 'P-110', 'Q-125', 'T-95', 'C-90']
+
+
+def had_value(external_pressure, metal_type, factors=DEFAULT_FACTORS):
+    s = factors.s_value(metal_type)
+    return (100 * float(external_pressure)) / (s * factors.had_divisor)
+
+
+def had_column(external_pressure, metal_types, factors=DEFAULT_FACTORS):
+    s = np.array([factors.s_value(str(metal_type)) for metal_type in metal_types], dtype=float)
+    return (100 * np.asarray(external_pressure, dtype=float)) / (s * factors.had_divisor)
+
+
+class HadGroup:
+    # Rows of one (at-head, metal type) pair in catalog order. HAD values are also
+    # kept sorted, with the smallest catalog position of every sorted suffix, so
+    # "first row in catalog order whose HAD reaches the depth" is one searchsorted.
+    def __init__(self, rows, had, records):
+        self.rows = rows
+        self.had = had
+        self.records = records
+        valid = np.flatnonzero(~np.isnan(had))
+        order = valid[np.argsort(had[valid], kind='stable')]
+        self.sorted_had = had[order]
+        self.first_position = np.minimum.accumulate(order[::-1])[::-1] if order.size else order
+
+    def first_reaching(self, depths):
+        depths = np.atleast_1d(np.asarray(depths, dtype=float))
+        index = np.searchsorted(self.sorted_had, depths, side='left')
+        positions = np.full(len(depths), -1)
+        found = index < len(self.sorted_had)
+        positions[found] = self.first_position[index[found]]
+        return positions
+
+    def candidate_count(self, depth):
+        position = self.first_reaching(depth)[0]
+        if position < 0:
+            return len(self.rows), False
+        return int(position) + 1, True
+
+
+class HadIndex:
+    def __init__(self, catalog, factors=DEFAULT_FACTORS):
+        self.catalog = catalog
+        self.had = had_column(catalog.external_pressure, catalog.metal_type, factors)
+        self.records = catalog_records(catalog, self.had)
+        self.groups = {}
+        valid_rows = np.flatnonzero(~np.isnan(catalog.at_head))
+        keys = {}
+        for row in valid_rows:
+            keys.setdefault((float(catalog.at_head[row]), str(catalog.metal_type[row])), []).append(row)
+        for key, rows in keys.items():
+            rows = np.array(rows)
+            self.groups[key] = HadGroup(rows, self.had[rows], self.records[rows])
+        self.at_heads = np.unique(catalog.at_head[valid_rows])
+
+    def group(self, at_head_value, metal_type):
+        matches = self.at_heads[np.abs(self.at_heads - float(at_head_value)) < 0.01]
+        if len(matches) == 1:
+            return self.groups.get((float(matches[0]), metal_type))
+        rows = self.catalog.matching_row_indices(at_head_value, metal_type)
+        return HadGroup(rows, self.had[rows], self.records[rows]) if rows.size else None
+
+    def first_reaching(self, at_head_value, metal_type, depths):
+        # Catalog row of the first qualifying candidate for every depth, -1 if none.
+        depths = np.atleast_1d(np.asarray(depths, dtype=float))
+        rows = np.full(len(depths), -1)
+        group = self.group(at_head_value, metal_type)
+        if group is None:
+            return rows
+        positions = group.first_reaching(depths)
+        found = positions >= 0
+        rows[found] = group.rows[positions[found]]
+        return rows
+
+    def candidate_records(self, at_head_value, metal_type, depth):
+        # Rows in catalog order up to the first one whose HAD reaches the depth, as a
+        # slice of the group's records.
+        group = self.group(at_head_value, metal_type)
+        if group is None:
+            return self.records[:0], False
+        count, reached = group.candidate_count(depth)
+        return group.records[:count], reached
+
+    def candidates(self, at_head_value, metal_type, depth):
+        records, reached = self.candidate_records(at_head_value, metal_type, depth)
+        return to_dicts(records), reached
+
+
+def select_had_candidates(matching_rows, depth, factors=DEFAULT_FACTORS):
+    # Same scan as DbCalculator.calculate_had: rows are taken in catalog order up to
+    # and including the first one whose HAD reaches the depth.
+    candidates = []
+    for at_head, external_pressure, metal_type, tensile_strength, unit_weight in matching_rows:
+        had = had_value(external_pressure, metal_type, factors)
+        candidates.append({
+            'had': had,
+            'external_pressure': external_pressure,
+            'metal_type': metal_type,
+            'tensile_strength': tensile_strength,
+            'unit_weight': unit_weight
+        })
+        if had >= depth:
+            return candidates, True
+    return candidates, False
+
+
+def sort_candidates(candidates):
+    if isinstance(candidates, np.ndarray):
+        return sort_by_had(candidates)
+    return sorted(candidates, key=lambda x: x['had'], reverse=True)
+
+
+def calculate_l_values(data_list, depth, factors=DEFAULT_FACTORS):
+    had_row_2 = data_list[1]['had']
+    had_row_3 = data_list[2]['had']
+    tensile_strength_row_2 = float(data_list[1]['tensile_strength'])
+    tensile_strength_row_3 = float(data_list[2]['tensile_strength'])
+    unit_weight_row_1 = float(data_list[0]['unit_weight'])
+    unit_weight_row_2 = float(data_list[1]['unit_weight'])
+    unit_weight_row_3 = float(data_list[2]['unit_weight'])
+
+    w, t = factors.weight_factor, factors.tension_factor
+    l1 = find_best_l1(depth, had_row_2, tensile_strength_row_2, unit_weight_row_1, w)
+    l2 = find_best_l2(depth, l1, had_row_3, tensile_strength_row_3, unit_weight_row_1, unit_weight_row_2, w)
+    l3 = ((tensile_strength_row_3 * 1000 / t) - (l1 * unit_weight_row_1 * w + l2 * unit_weight_row_2 * w)) / (unit_weight_row_3 * w)
+
+    result = {'l1': l1, 'l2': l2, 'l3': l3}
+    if l1 + l2 + l3 < depth and len(data_list) > 3:
+        tensile_strength_row_4 = float(data_list[3]['tensile_strength'])
+        unit_weight_row_4 = float(data_list[3]['unit_weight'])
+        if tensile_strength_row_4 and unit_weight_row_4:
+            result['l4'] = ((tensile_strength_row_4 * 1000 / t) - (l1 * unit_weight_row_1 * w + l2 * unit_weight_row_2 * w + l3 * unit_weight_row_3 * w)) / (unit_weight_row_4 * w)
+    return result
+
+
+def find_best_l1(depth, had_row_2, tensile_strength_row_2, unit_weight_row_1,
+                 weight_factor=DEFAULT_FACTORS.weight_factor):
+    l1 = np.arange(1, int(depth), dtype=float)
+    y1 = (depth - l1) / had_row_2
+    z1 = (l1 * unit_weight_row_1 * weight_factor) / (tensile_strength_row_2 * 1000)
+    return _best_length(np.abs(y1**2 + z1**2 + y1*z1 - 1.00))
+
+
+def find_best_l2(depth, l1, had_row_3, tensile_strength_row_3, unit_weight_row_1, unit_weight_row_2,
+                 weight_factor=DEFAULT_FACTORS.weight_factor):
+    l2 = np.arange(1, int(depth - l1), dtype=float)
+    y2 = (depth - (l1 + l2)) / had_row_3
+    z2 = (l2 * unit_weight_row_1 + l2 * unit_weight_row_2) * weight_factor / (tensile_strength_row_3 * 1000)
+    return _best_length(np.abs(y2**2 + z2**2 + y2*z2 - 1.00))
+
+
+def _best_length(difference):
+    # Lengths start at 1 m; the scan stops at the first length within tolerance and
+    # otherwise keeps the first minimum, exactly like the HADCalculator loops.
+    if difference.size == 0 or np.all(np.isnan(difference)):
+        return 0
+    hits = np.flatnonzero(difference < 0.0001)
+    if hits.size:
+        return int(hits[0]) + 1
+    return int(np.nanargmin(difference)) + 1
+
+
+def string_sections(sorted_data, l_values, depth):
+    # Lengths of the designed string from the shoe upwards, clipped at surface.
+    if l_values:
+        lengths = [l_values[f'l{i + 1}'] for i in range(len(sorted_data)) if f'l{i + 1}' in l_values]
+    else:
+        lengths = [depth]
+    sections = []
+    remaining = depth
+    for row, length in zip(sorted_data, lengths):
+        length = max(0.0, min(float(length), remaining))
+        sections.append((row, length))
+        remaining -= length
+    return sections
+
+
+def evaluate_string(candidates, reached, depth, factors=DEFAULT_FACTORS):
+    if not len(candidates):
+        return None
+
+    sorted_data = sort_candidates(candidates)
+    l_values = calculate_l_values(sorted_data, depth, factors) if len(sorted_data) >= 3 else {}
+    sections = string_sections(sorted_data, l_values, depth) if reached else []
+
+    string_weight = 0.0
+    tensile_margin = float('inf')
+    for row, length in sections:
+        string_weight += length * float(row['unit_weight']) * factors.weight_factor
+        if string_weight > 0:
+            tensile_margin = min(tensile_margin, float(row['tensile_strength']) * 1000 / string_weight)
+    covered_length = sum(length for _, length in sections)
+
+    if reached:
+        had_margin = float(candidates[-1]['had']) - depth
+    else:
+        had_margin = float(sorted_data[0]['had']) - depth
+
+    return {
+        'feasible': reached and covered_length >= depth - 1e-6,
+        'reached': reached,
+        'had': float(candidates[-1]['had']),
+        'had_margin': had_margin,
+        'string_weight': string_weight,
+        'tensile_margin': tensile_margin,
+        'covered_length': covered_length,
+        'candidates': sorted_data,
+        'l_values': l_values
+    }
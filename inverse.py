@@ -0,0 +1,113 @@
+import numpy as np
+from drill_pipe import evaluate_intervals
+from design_factors import DEFAULT_FACTORS
+
+SOLVE_FOR = ['WOB', 'n']
+# Smallest value tried; n = 0 would divide by zero in the torque term.
+LOWER_BOUND = 1e-6
+# Largest values worth considering (kgf of WOB, rpm); past these the equations
+# still answer but no rig delivers them.
+UPPER_BOUNDS = {'WOB': 50000.0, 'n': 300.0}
+# Checked in this order; the first one an input violates is reported as binding.
+CONSTRAINTS = ["Lmax ≥ H", "C_new ≤ SegmaC", "Lp ≥ 0"]
+UPPER_BOUND = "upper bound"
+MAX_DOUBLINGS = 60
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+
+def max_input(table, inputs, variable, grades=None, target=None, tolerance=TOLERANCE,
+              max_iterations=MAX_ITERATIONS, upper_bound=None, factors=DEFAULT_FACTORS):
+    # Largest WOB or n, up to upper_bound, for which Lmax stays at or above the target
+    # length (each interval's H by default), the grade carries C_new and the collars
+    # leave a non-negative drill pipe length, for every interval and grade at once.
+    # All three only get worse as either input grows, so every (interval, grade) pair
+    # is bracketed by doubling and then bisected; each step is one evaluate_intervals
+    # call over all pairs. 'binding' names the constraint that stops each pair.
+    if variable not in SOLVE_FOR:
+        raise ValueError(f"Can only solve for {', '.join(SOLVE_FOR)}, not {variable}")
+    upper_bound = UPPER_BOUNDS[variable] if upper_bound is None else float(upper_bound)
+    count = len(np.atleast_1d(inputs['WOB']))
+    if grades is None:
+        grades = [grade for grade, _ in table.grade_strengths()]
+    columns = {name: np.broadcast_to(np.asarray(value, dtype=float), (count,)) for name, value in inputs.items()}
+    target = columns['H'] if target is None else np.broadcast_to(np.asarray(target, dtype=float), (count,))
+
+    # One row per (interval, grade), intervals outermost.
+    size = count * len(grades)
+    batch = {name: np.repeat(column, len(grades)) for name, column in columns.items()}
+    row_grades = list(grades) * count
+    required = np.repeat(target, len(grades))
+
+    def margins(values):
+        # One row of margins per constraint; negative means violated.
+        batch[variable] = values
+        results = evaluate_intervals(table, grades=row_grades, factors=factors, **batch)
+        with np.errstate(invalid='ignore'):
+            rows = np.array([results['Lmax'] - required, results['SegmaC'] - results['C_new'], results['Lp']])
+        # A domain error (NaN) means the pipe cannot carry the load at all.
+        return np.where(np.isnan(rows), -np.inf, rows), results
+
+    def binding(rows):
+        return [CONSTRAINTS[int(np.argmax(column < 0))] for column in rows.T]
+
+    low = np.full(size, min(LOWER_BOUND, upper_bound))
+    low_margins, results = margins(low)
+    errors = [error if error is not None and error != "math domain error" else None for error in results['error']]
+    active = np.all(low_margins >= 0, axis=0) & np.array([error is None for error in errors])
+
+    high = np.clip(batch[variable].copy(), min(1.0, upper_bound), upper_bound)
+    capped = np.zeros(size, dtype=bool)
+    for _ in range(MAX_DOUBLINGS + 1):
+        high_margins, _ = margins(high)
+        growing = active & np.all(high_margins >= 0, axis=0)
+        capped = growing & (high >= upper_bound)
+        growing &= ~capped
+        if not growing.any():
+            break
+        high = np.where(growing, np.minimum(high * 2, upper_bound), high)
+
+    searching = active & ~capped
+    for _ in range(max_iterations):
+        if not searching.any() or np.all((high - low)[searching] <= tolerance * high[searching]):
+            break
+        middle = np.where(searching, (low + high) / 2, low)
+        middle_margins, _ = margins(middle)
+        holds = np.all(middle_margins >= 0, axis=0)
+        low = np.where(searching & holds, middle, low)
+        high = np.where(searching & ~holds, middle, high)
+
+    high_margins, _ = margins(high)
+    limits = binding(high_margins)
+    first_limits = binding(low_margins)
+    low = np.where(capped, upper_bound, low)
+    _, results = margins(low)
+    status = []
+    limit = []
+    for row in range(size):
+        if errors[row] is not None:
+            status.append(errors[row])
+            limit.append(None)
+        elif not active[row]:
+            status.append("infeasible")
+            limit.append(first_limits[row])
+        elif capped[row]:
+            status.append("ok")
+            limit.append(UPPER_BOUND)
+        else:
+            status.append("ok")
+            limit.append(limits[row])
+    value = np.where(active, low, np.nan)
+    shape = (count, len(grades))
+    return {
+        'variable': variable,
+        'grades': list(grades),
+        'target': np.array(target),
+        'upper_bound': upper_bound,
+        'value': value.reshape(shape),
+        'Lmax': np.where(active, results['Lmax'], np.nan).reshape(shape),
+        'C_new': np.where(active, results['C_new'], np.nan).reshape(shape),
+        'Lp': np.where(active, results['Lp'], np.nan).reshape(shape),
+        'status': [status[row * len(grades):(row + 1) * len(grades)] for row in range(count)],
+        'binding': [limit[row * len(grades):(row + 1) * len(grades)] for row in range(count)]
+    }
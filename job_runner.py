@@ -0,0 +1,305 @@
+import os
+import json
+import time
+import signal
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from catalog import load_catalog
+from drill_pipe import load_formation
+from had_engine import METAL_TYPES
+from well_engine import calculate_well
+from design_search import search_from_dcsg, pareto_front, parse_options
+from results_store import ResultsStore, TEXT, RESULT_SCHEMA, report_rows
+from shared_catalog import SharedTables, attach
+from design_factors import DEFAULT_FACTORS, DesignFactors
+
+CHECKPOINT = "checkpoint.json"
+RESULTS = "results"
+# A unit should take long enough that dispatching and checkpointing it stays
+# under OVERHEAD_SHARE of its run time, but no longer than the checkpoint interval.
+MIN_UNIT_SECONDS = 0.2
+CHECKPOINT_SECONDS = 5.0
+OVERHEAD_SHARE = 0.02
+MAX_UNIT_ITEMS = 4096
+SMOOTHING = 0.3
+SEARCH_SCHEMA = [
+    ('dcsg', TEXT),
+    ('sections', TEXT),
+    ('string_weight', 'f8'),
+    ('had_margin', 'f8'),
+    ('tensile_margin', 'f8')
+]
+
+_worker_state = {}
+
+
+def _init_worker(manifest):
+    # Ctrl-C is for the runner; workers finish or get dropped with their unit.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_state['catalog'], _worker_state['formation'] = attach(manifest)
+
+
+def run_unit(kind, items, settings):
+    started = time.perf_counter()
+    rows = UNIT_HANDLERS[kind](items, settings)
+    return rows, time.perf_counter() - started
+
+
+def batch_unit(cases, settings):
+    factors = DesignFactors(settings['factors']) if settings.get('factors') else DEFAULT_FACTORS
+    rows = []
+    for case in cases:
+        report = calculate_well(_worker_state['catalog'], _worker_state['formation'], case, factors=factors)
+        rows.extend(report_rows(report))
+    return rows
+
+
+def search_unit(dcsg_values, settings):
+    rows = []
+    for dcsg in dcsg_values:
+        designs, _ = search_from_dcsg(_worker_state['catalog'], dcsg, settings['depths'],
+                                      settings['multiplier_options'], settings['grade_options'])
+        for design in designs:
+            rows.append({
+                'dcsg': design['dcsg'],
+                'sections': ", ".join(f"{s['metal_type']} x{s['multiplier']}" for s in design['sections']),
+                'string_weight': design['string_weight'],
+                'had_margin': design['had_margin'],
+                'tensile_margin': design['tensile_margin']
+            })
+    return rows
+
+
+UNIT_HANDLERS = {
+    'batch': batch_unit,
+    'search': search_unit
+}
+SCHEMAS = {
+    'batch': RESULT_SCHEMA,
+    'search': SEARCH_SCHEMA
+}
+
+
+class JobRunner:
+    # Runs items (wells or Dcsg values) in work units on a process pool and appends
+    # their rows to a results store in item order. After every unit the store is
+    # flushed and checkpoint.json records how many items are done and how many
+    # chunks hold their rows; a restarted job rolls the store back to that and
+    # carries on, so the store ends up with the same rows as an uninterrupted run.
+    def __init__(self, path, kind, items, settings, catalog, formation=None, max_workers=None,
+                 checkpoint_seconds=CHECKPOINT_SECONDS):
+        self.path = path
+        self.kind = kind
+        self.items = items
+        self.settings = settings
+        self.catalog = catalog
+        self.formation = formation
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.checkpoint_seconds = checkpoint_seconds
+        self.signature = hashlib.sha1(json.dumps([kind, items, settings], sort_keys=True).encode()).hexdigest()
+
+        os.makedirs(path, exist_ok=True)
+        self.done = 0
+        self.elapsed = 0.0
+        chunks = 0
+        checkpoint = self.load_checkpoint()
+        if checkpoint is not None:
+            if checkpoint['signature'] != self.signature:
+                raise ValueError(f"{path} holds a different job; resume it with the same inputs or use a new directory")
+            self.done = checkpoint['done']
+            self.elapsed = checkpoint['seconds']
+            chunks = checkpoint['chunks']
+        self.store = ResultsStore(os.path.join(path, RESULTS), SCHEMAS[kind])
+        self.store.rollback(chunks)
+
+        self.item_seconds = None
+        self.overhead = 0.0
+
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.path, CHECKPOINT)
+
+    @property
+    def total(self):
+        return len(self.items)
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def commit(self, done, seconds):
+        # The store is flushed first, so a checkpoint never names rows that are
+        # not on disk; rows written after it are rolled back on resume.
+        self.store.flush()
+        self.done = done
+        self.elapsed += seconds
+        checkpoint = {
+            'signature': self.signature,
+            'kind': self.kind,
+            'done': done,
+            'total': self.total,
+            'chunks': len(self.store.manifest['chunks']),
+            'rows': self.store.row_count,
+            'seconds': self.elapsed
+        }
+        temporary = self.checkpoint_path + ".tmp"
+        with open(temporary, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    def unit_size(self):
+        # The first unit is a single item to measure the rate.
+        if self.item_seconds is None:
+            return 1
+        target = min(self.checkpoint_seconds, max(MIN_UNIT_SECONDS, self.overhead / OVERHEAD_SHARE))
+        return int(max(1, min(MAX_UNIT_ITEMS, round(target / max(self.item_seconds, 1e-6)))))
+
+    def observe(self, items, seconds, overhead):
+        per_item = seconds / items
+        if self.item_seconds is None:
+            self.item_seconds, self.overhead = per_item, overhead
+            return
+        self.item_seconds += SMOOTHING * (per_item - self.item_seconds)
+        self.overhead += SMOOTHING * (overhead - self.overhead)
+
+    def run(self, progress=None):
+        # Returns True when every item is done and False when interrupted with Ctrl-C;
+        # either way the checkpoint matches the store.
+        if self.done >= self.total:
+            return True
+        next_item = self.done
+        pending = deque()
+        last = time.perf_counter()
+        # Throughput is measured from the first finished unit, past the pool start-up.
+        mark = None
+        with SharedTables(self.catalog, self.formation) as shared:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker,
+                                           initargs=(shared.manifest,))
+            try:
+                while self.done < self.total:
+                    # Two units per worker keep the pool busy while results are received.
+                    while next_item < self.total and len(pending) < 2 * self.max_workers:
+                        submitted = time.perf_counter()
+                        # Near the end units shrink so the last items are spread over every worker.
+                        share = -(-(self.total - next_item) // self.max_workers)
+                        stop = next_item + min(self.unit_size(), share)
+                        future = executor.submit(run_unit, self.kind, self.items[next_item:stop], self.settings)
+                        pending.append((next_item, stop, future, time.perf_counter() - submitted))
+                        next_item = stop
+                        if self.item_seconds is None:
+                            break
+
+                    start, stop, future, dispatch = pending.popleft()
+                    rows, seconds = future.result()
+                    received = time.perf_counter()
+                    self.store.append(rows)
+                    self.commit(stop, received - last)
+                    last = time.perf_counter()
+                    self.observe(stop - start, seconds, dispatch + last - received)
+                    if mark is None:
+                        mark = (self.done, last)
+                    if progress is not None:
+                        progress(self.status(self.done - mark[0], last - mark[1]))
+            except KeyboardInterrupt:
+                return False
+            finally:
+                # Queued units are dropped; running ones finish, their rows unused.
+                executor.shutdown(wait=True, cancel_futures=True)
+        return True
+
+    def status(self, items, seconds):
+        rate = items / seconds if seconds > 0 else 0.0
+        remaining = self.total - self.done
+        return {
+            'done': self.done,
+            'total': self.total,
+            'rows': self.store.row_count,
+            'items_per_second': rate,
+            'unit_items': self.unit_size(),
+            'eta_seconds': remaining / rate if rate > 0 else None
+        }
+
+
+def format_status(status):
+    eta = status['eta_seconds']
+    eta_text = "--:--:--" if eta is None else time.strftime("%H:%M:%S", time.gmtime(eta))
+    return (f"{status['done']}/{status['total']} items  {status['rows']} rows  "
+            f"{status['items_per_second']:.1f} items/s  unit {status['unit_items']}  ETA {eta_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a well batch or design search with checkpoints; "
+                                                 "run the same command again to resume.")
+    parser.add_argument("job", help="Job directory for the checkpoint and the results store")
+    parser.add_argument("--catalog", required=True, help="Casing table (.xlsx)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint-seconds", type=float, default=CHECKPOINT_SECONDS,
+                        help="Longest run time of a work unit")
+    kinds = parser.add_subparsers(dest="kind", required=True)
+    batch = kinds.add_parser("batch", help="calculate_well for every case of a cases file")
+    batch.add_argument("cases", help="Wells as golden.py writes them (.json)")
+    batch.add_argument("--formation", help="Formation design table (.xlsx)")
+    batch.add_argument("--profile", help="Design-factor profile (.json)")
+    search = kinds.add_parser("search", help="design_search over Dcsg values, multipliers and grades")
+    search.add_argument("--depths", type=float, nargs='+', required=True, help="Depth per section, production first")
+    search.add_argument("--multipliers", action='append',
+                        help="Comma separated multipliers; give once for all sections or once per section")
+    search.add_argument("--grades", default=",".join(METAL_TYPES), help="Comma separated metal types")
+    search.add_argument("--dcsg", help="Comma separated initial Dcsg values (default: every At body value)")
+    search.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog)
+    formation = None
+    settings = {'catalog': os.path.abspath(args.catalog)}
+    if args.kind == "batch":
+        with open(args.cases) as f:
+            items = json.load(f)
+        if isinstance(items, dict):
+            items = items['cases']
+        if args.formation:
+            formation = load_formation(args.formation)
+            settings['formation'] = os.path.abspath(args.formation)
+        if args.profile:
+            settings['factors'] = DesignFactors.load(args.profile).profile
+    else:
+        section_count = len(args.depths)
+        multipliers = args.multipliers or ["1.05,1.1,1.15,1.2,1.25,1.3,1.35,1.4"]
+        if len(multipliers) == 1:
+            settings['multiplier_options'] = parse_options(multipliers[0], section_count, float)
+        else:
+            settings['multiplier_options'] = [parse_options(text, 1, float)[0] for text in multipliers]
+        settings['grade_options'] = parse_options(args.grades, section_count)
+        settings['depths'] = args.depths
+        items = args.dcsg.split(',') if args.dcsg else catalog.dcsg_candidates()
+
+    try:
+        runner = JobRunner(args.job, args.kind, items, settings, catalog, formation, args.workers,
+                           args.checkpoint_seconds)
+    except ValueError as e:
+        parser.error(str(e))
+    if runner.done:
+        print(f"Resuming at {runner.done} of {runner.total} items")
+    if not runner.run(lambda status: print(format_status(status), flush=True)):
+        print(f"Interrupted after {runner.done} of {runner.total} items; run the same command to resume")
+        raise SystemExit(130)
+    print(f"Done: {runner.total} items, {runner.store.row_count} rows in {runner.elapsed:.1f} s "
+          f"({os.path.join(args.job, RESULTS)})")
+
+    if args.kind == "search":
+        rows = runner.store.read()
+        designs = [{name: rows[name][row] for name in rows} for row in range(len(rows['dcsg']))]
+        front = pareto_front(designs)
+        print(f"{'Dcsg':<10}{'Weight (kg)':<15}{'HAD Margin':<13}{'Tensile SF':<12}Sections")
+        for design in front[:args.top]:
+            print(f"{design['dcsg']:<10}{design['string_weight']:<15.1f}{design['had_margin']:<13.1f}"
+                  f"{design['tensile_margin']:<12.2f}{design['sections']}")
+
+
+if __name__ == "__main__":
+    main()
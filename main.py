@@ -1,44 +1,237 @@
+import os
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget
+import json
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout,
+                             QHBoxLayout, QPushButton, QFileDialog, QMessageBox, QCheckBox)
 from PyQt5.QtGui import QIcon
 from Test import WellDataApp
 from casing import DbCalculator
 from Datainput import DataInputTab
+from report_export import collect_well_report, export_xlsx, export_docx
+from catalog_watcher import CatalogWatcher
+from calc_logging import setup_logging
+from catalog import prefetch_catalog, supported_source, split_sources
+from drill_pipe import prefetch_formation
+from design_factors import DesignFactors
+
+class WellWorkspace(QTabWidget):
+    def __init__(self, well_name, casing_file='casing_data.json', data_file='saved_data.json', catalog_watcher=None,
+                 equations_file='equations_data.json'):
+        super().__init__()
+        self.well_name = well_name
+        self.setupTabs(casing_file, data_file, catalog_watcher, equations_file)
+
+    def setupTabs(self, casing_file, data_file, catalog_watcher=None, equations_file='equations_data.json'):
+        self.data_input_tab = DataInputTab(data_file)
+        self.casing_tab = DbCalculator(casing_file)
+        self.equations_tab = WellDataApp(self.casing_tab, self.data_input_tab, self.well_name, equations_file)
+        self.casing_tab.data_input_tab = self.data_input_tab
+        self.casing_tab.catalog_watcher = catalog_watcher
+        self.equations_tab.catalog_watcher = catalog_watcher
+        self.equations_tab.factors = self.casing_tab.factors
+        self.casing_tab.update_section_rows(len(self.casing_tab.section_inputs))
+
+        self.addTab(self.equations_tab, QIcon("icons/equations.png"), "Equations")
+        self.addTab(self.data_input_tab, QIcon("icons/datainput.png"), "Data Input")
+        self.addTab(self.casing_tab, QIcon("icons/casing.png"), "Casing")
+
+    def report(self):
+        return collect_well_report(self.well_name, self.casing_tab, self.equations_tab)
+
+    def catalog_reloaded(self, path, catalog, live):
+        if self.casing_tab.swap_catalog(path, catalog) and live:
+            self.rerun(casing=True)
+
+    def formation_reloaded(self, path, formation, live):
+        if self.equations_tab.swap_formation(path, formation) and live:
+            self.rerun(casing=False)
+
+    def use_factors(self, factors):
+        self.casing_tab.use_factors(factors)
+        self.equations_tab.factors = factors
+
+    def rerun(self, casing):
+        # Repeats whichever calculations were already shown, in the order a user runs them.
+        if casing and self.casing_tab.section_results:
+            self.casing_tab.extract_and_display()
+        if self.equations_tab.drill_collars:
+            self.equations_tab.calculate_drill_collar()
+        if self.equations_tab.interval_results:
+            self.equations_tab.calculate_and_display()
+
+    def release(self):
+        self.casing_tab.release_shared_data()
+        self.equations_tab.release_shared_data()
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.wells = []
+        self.well_count = 0
+        self.catalog_watcher = CatalogWatcher(self)
+        self.catalog_watcher.catalogReloaded.connect(self.on_catalog_reloaded)
+        self.catalog_watcher.formationReloaded.connect(self.on_formation_reloaded)
+        self.catalog_watcher.reloadFailed.connect(self.on_reload_failed)
+        self.prefetch_tables()
         self.initUI()
 
+    def prefetch_tables(self):
+        # The tables Well 1 used last session start parsing while the window is
+        # built; the first Calculate only waits for whatever is left.
+        casing_path = saved_path('casing_data.json', 'file_path')
+        if casing_path and supported_source(casing_path) and all(map(os.path.exists, split_sources(casing_path))):
+            prefetch_catalog(casing_path)
+        formation_path = saved_path('equations_data.json', 'formation_path')
+        if formation_path and os.path.exists(formation_path):
+            prefetch_formation(formation_path)
+
     def initUI(self):
         self.setWindowTitle("Well Data Analyzer Pro")
         self.setGeometry(100, 100, 1200, 800)
 
+        central = QWidget()
+        layout = QVBoxLayout(central)
+        self.setCentralWidget(central)
+
+        top_bar = QHBoxLayout()
+        new_well_btn = QPushButton("New Well")
+        new_well_btn.setIcon(QIcon("icons/add.png"))
+        new_well_btn.clicked.connect(self.add_well)
+        export_all_btn = QPushButton("Export All Wells")
+        export_all_btn.setIcon(QIcon("icons/export.png"))
+        export_all_btn.clicked.connect(self.export_all_wells)
+        factors_btn = QPushButton("Design Factors")
+        factors_btn.setToolTip("Load a design-factor profile and re-run every well with it")
+        factors_btn.clicked.connect(self.load_design_factors)
+        top_bar.addWidget(new_well_btn)
+        top_bar.addWidget(export_all_btn)
+        top_bar.addWidget(factors_btn)
+        self.live_mode = QCheckBox("Live Mode")
+        self.live_mode.setToolTip("Re-run the last calculation when a table file changes on disk")
+        top_bar.addWidget(self.live_mode)
+        top_bar.addStretch()
+        layout.addLayout(top_bar)
+
         self.tabs = QTabWidget()
-        self.setCentralWidget(self.tabs)
+        self.tabs.setTabsClosable(True)
+        self.tabs.tabCloseRequested.connect(self.close_well)
+        layout.addWidget(self.tabs)
 
-        self.setupTabs()
-        self.connectTabs()
+        self.add_well()
         self.setStyle()
 
-    def setupTabs(self):
-        self.equations_tab = WellDataApp()
-        self.data_input_tab = DataInputTab()
-        self.casing_tab = DbCalculator()
+    def add_well(self):
+        self.well_count += 1
+        if self.well_count == 1:
+            workspace = WellWorkspace("Well 1", catalog_watcher=self.catalog_watcher)
+        else:
+            workspace = WellWorkspace(f"Well {self.well_count}",
+                                      f"casing_data_well{self.well_count}.json",
+                                      f"saved_data_well{self.well_count}.json",
+                                      self.catalog_watcher,
+                                      f"equations_data_well{self.well_count}.json")
+            self.shareTables(workspace)
+        self.wells.append(workspace)
+        self.tabs.addTab(workspace, workspace.well_name)
+        self.tabs.setCurrentWidget(workspace)
+        return workspace
 
-        self.tabs.addTab(self.equations_tab, QIcon("icons/equations.png"), "Equations")
-        self.tabs.addTab(self.data_input_tab, QIcon("icons/datainput.png"), "Data Input")
-        self.tabs.addTab(self.casing_tab, QIcon("icons/casing.png"), "Casing")
+    def shareTables(self, workspace):
+        # New wells start on the tables already open, so they reuse the loaded copies.
+        source = self.tabs.currentWidget()
+        if source is None:
+            return
+        if not workspace.casing_tab.file_entry.text():
+            workspace.casing_tab.file_entry.setText(source.casing_tab.file_entry.text())
+        if workspace.casing_tab.factors.path is None:
+            workspace.use_factors(source.casing_tab.factors)
+        source.equations_tab.restore_formation()
+        if source.equations_tab.formation_path is not None:
+            workspace.equations_tab.load_drill_collar_data(source.equations_tab.formation_path)
 
-    def connectTabs(self):
-        self.equations_tab.casing_tab = self.casing_tab
-        self.equations_tab.data_input_tab = self.data_input_tab
-        self.casing_tab.data_input_tab = self.data_input_tab
+    def close_well(self, index):
+        if self.tabs.count() == 1:
+            return
+        workspace = self.tabs.widget(index)
+        self.tabs.removeTab(index)
+        self.wells.remove(workspace)
+        workspace.release()
+        workspace.deleteLater()
+
+    def on_catalog_reloaded(self, path, catalog):
+        for workspace in self.wells:
+            workspace.catalog_reloaded(path, catalog, self.live_mode.isChecked())
+
+    def on_formation_reloaded(self, path, formation):
+        for workspace in self.wells:
+            workspace.formation_reloaded(path, formation, self.live_mode.isChecked())
+
+    def on_reload_failed(self, path, error):
+        # A half-written workbook fails to parse; the wells keep the previous tables
+        # and the next save triggers another reload.
+        self.statusBar().showMessage(f"Could not reload {path}: {error}", 5000)
+
+    def load_design_factors(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Load Design Factors", "", "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            factors = DesignFactors.load(file_path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "Error", f"Failed to load design factors. Error: {e}")
+            return
+        for workspace in self.wells:
+            workspace.use_factors(factors)
+            workspace.rerun(casing=True)
+        self.statusBar().showMessage(f"Design factors: {factors.label()}", 5000)
+
+    def export_all_wells(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export All Wells", "", "Excel Files (*.xlsx);;Word Files (*.docx)")
+        if not file_path:
+            return
+
+        reports = [workspace.report() for workspace in self.wells]
+        try:
+            if file_path.lower().endswith('.docx'):
+                export_docx(file_path, reports)
+            else:
+                if not file_path.lower().endswith('.xlsx'):
+                    file_path += '.xlsx'
+                export_xlsx(file_path, reports)
+            QMessageBox.information(self, "Success", f"{len(reports)} wells exported to {file_path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export report. Error: {e}")
+
+    @property
+    def equations_tab(self):
+        return self.tabs.currentWidget().equations_tab
+
+    @property
+    def data_input_tab(self):
+        return self.tabs.currentWidget().data_input_tab
+
+    @property
+    def casing_tab(self):
+        return self.tabs.currentWidget().casing_tab
 
     def setStyle(self):
         self.setStyleSheet(WellDataApp.STYLE_SHEET)
 
+    def closeEvent(self, event):
+        self.catalog_watcher.stop()
+        for workspace in self.wells:
+            workspace.release()
+        super().closeEvent(event)
+
+def saved_path(data_file, key):
+    try:
+        with open(data_file, 'r') as f:
+            return json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+
 def main():
+    setup_logging()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
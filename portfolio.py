@@ -0,0 +1,154 @@
+import argparse
+import json
+import time
+import numpy as np
+from catalog import load_catalog
+from drill_pipe import load_formation, evaluate_intervals
+from had_engine import evaluate_string
+from well_engine import calculate_casing, drill_collars, drill_pipe_inputs
+from design_factors import DEFAULT_FACTORS, DesignFactors
+
+
+class Portfolio:
+    # The casing chain, drill collars and interval inputs of every well do not depend
+    # on the design factors, so they are worked out once. evaluate() then redoes only
+    # the factor-dependent parts: the production HAD string per well and one
+    # evaluate_intervals call over the intervals of all wells together.
+    def __init__(self, catalog, formation, cases):
+        self.catalog = catalog
+        self.formation = formation
+        self.wells = []
+        self.messages = {}
+        self.production = []
+        interval_inputs = []
+        self.interval_well = []
+        self.interval_number = []
+        self.interval_section = []
+        for case in cases:
+            name = case.get('name', f"Well {len(self.wells) + 1}")
+            casing = calculate_casing(catalog, case['casing'], DEFAULT_FACTORS)
+            self.messages[name] = [message for message in casing['messages']
+                                   if not message.startswith("Could not find a suitable HAD")]
+            if not casing['casing']:
+                continue
+            well = len(self.wells)
+            self.wells.append(name)
+            section = case['casing']['section_inputs'][0]
+            self.production.append((casing['calculated_values'][0][0], casing['casing'][0]['metal_type'],
+                                    float(section['depth'])))
+
+            if formation is None or case.get('data_input') is None:
+                continue
+            # A production HAD that falls short ends the chain there, as in the Casing tab.
+            collars, nearest_bit_sizes = drill_collars(formation, case['casing'].get('initial_dcsg', ''),
+                                                       casing['calculated_values'], casing['sections'])
+            try:
+                sections, _, inputs = drill_pipe_inputs(case['data_input'], collars, nearest_bit_sizes)
+            except (ValueError, KeyError) as e:
+                self.messages[name].append(f"Error in calculations: {e}")
+                continue
+            interval_inputs.append((len(sections), inputs))
+            self.interval_well.extend([well] * len(sections))
+            self.interval_number.extend(range(1, len(sections) + 1))
+            self.interval_section.extend(sections)
+
+        self.interval_well = np.array(self.interval_well, dtype=int)
+        self.interval_number = np.array(self.interval_number, dtype=int)
+        self.inputs = None
+        if interval_inputs:
+            # Well constants become per-interval arrays so every well goes in one batch.
+            self.inputs = {name: np.concatenate([np.broadcast_to(np.asarray(inputs[name], dtype=float), count)
+                                                 for count, inputs in interval_inputs])
+                           for name in interval_inputs[0][1]}
+
+    def evaluate(self, factors=DEFAULT_FACTORS):
+        index = self.catalog.had_index_for(factors)
+        count = len(self.wells)
+        result = {
+            'well': list(self.wells),
+            'had': np.full(count, np.nan),
+            'had_margin': np.full(count, np.nan),
+            'string_weight': np.full(count, np.nan),
+            'feasible': np.zeros(count, dtype=bool)
+        }
+        for well, (at_head, metal_type, depth) in enumerate(self.production):
+            candidates, reached = index.candidate_records(at_head, metal_type, depth)
+            string = evaluate_string(candidates, reached, depth, factors)
+            if string is None:
+                continue
+            result['had'][well] = string['had']
+            result['had_margin'][well] = string['had_margin']
+            result['string_weight'][well] = string['string_weight']
+            result['feasible'][well] = string['feasible']
+
+        if self.inputs is not None:
+            intervals = evaluate_intervals(self.formation, factors=factors, **self.inputs)
+            for name in ('metal_grade', 'C_new', 'Lmax', 'error'):
+                result[name] = intervals[name]
+        result['interval_well'] = self.interval_well
+        result['interval'] = self.interval_number
+        result['section'] = list(self.interval_section)
+        return result
+
+
+def summarize(result):
+    grades = result.get('metal_grade', [])
+    errors = result.get('error', [])
+    return {
+        'feasible': int(result['feasible'].sum()),
+        'string_weight': float(np.nansum(result['string_weight'][result['feasible']])),
+        'intervals': len(grades),
+        'failed_intervals': sum(error is not None for error in errors)
+    }
+
+
+def grade_changes(baseline, result):
+    changes = []
+    for row, (before, after) in enumerate(zip(baseline.get('metal_grade', []), result.get('metal_grade', []))):
+        if before != after:
+            well = result['well'][result['interval_well'][row]]
+            changes.append((well, int(result['interval'][row]), before, after))
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare design-factor profiles across a portfolio of wells.")
+    parser.add_argument("cases", help="Wells as golden.py writes them (.json)")
+    parser.add_argument("--catalog", required=True, help="Casing table (.xlsx)")
+    parser.add_argument("--formation", help="Formation design table (.xlsx)")
+    parser.add_argument("--profile", action='append', default=[],
+                        help="Design-factor profile (.json); give once per profile, the first is the baseline")
+    parser.add_argument("--changes", type=int, default=10, help="Grade changes to list per profile")
+    args = parser.parse_args()
+
+    with open(args.cases) as f:
+        cases = json.load(f)
+    if isinstance(cases, dict):
+        cases = cases['cases']
+    profiles = [DesignFactors.load(path) for path in args.profile] or [DEFAULT_FACTORS]
+
+    start = time.perf_counter()
+    catalog = load_catalog(args.catalog)
+    formation = load_formation(args.formation) if args.formation else None
+    portfolio = Portfolio(catalog, formation, cases)
+    print(f"Prepared {len(portfolio.wells)} wells and {len(portfolio.interval_well)} intervals "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    print(f"{'Profile':<24}{'Feasible':<10}{'Weight (kg)':<16}{'Failed int.':<13}{'Grade chg.':<12}Time (s)")
+    baseline = None
+    for factors in profiles:
+        start = time.perf_counter()
+        result = portfolio.evaluate(factors)
+        seconds = time.perf_counter() - start
+        summary = summarize(result)
+        changes = grade_changes(baseline, result) if baseline is not None else []
+        print(f"{factors.label():<24}{summary['feasible']:<10}{summary['string_weight']:<16.1f}"
+              f"{summary['failed_intervals']:<13}{len(changes):<12}{seconds:.3f}")
+        for well, interval, before, after in changes[:args.changes]:
+            print(f"    {well} interval {interval}: {before} -> {after}")
+        if baseline is None:
+            baseline = result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import numpy as np
+
+# Keys of the HAD rows the Casing tab shows and reports; HadIndex.candidates also
+# carries internal_pressure for the depth profile.
+HAD_ROW_FIELDS = ['had', 'external_pressure', 'metal_type', 'tensile_strength', 'unit_weight']
+CANDIDATE_FIELDS = HAD_ROW_FIELDS + ['internal_pressure']
+FLOAT_FIELDS = ['had', 'external_pressure', 'tensile_strength', 'unit_weight', 'internal_pressure', 'at_head']
+
+
+def candidate_dtype(metal_type_dtype='U8'):
+    # metal_type keeps the width of the catalog column so no grade name is cut.
+    return np.dtype([(name, np.float64) for name in FLOAT_FIELDS]
+                    + [('metal_type', metal_type_dtype), ('row', np.int32)])
+
+
+def catalog_records(catalog, had):
+    # One typed record per catalog row, converted from the columns once.
+    records = np.empty(catalog.row_count, dtype=candidate_dtype(catalog.metal_type.dtype))
+    records['had'] = had
+    for name in FLOAT_FIELDS[1:]:
+        records[name] = catalog.columns[name]
+    records['metal_type'] = catalog.metal_type
+    records['row'] = np.arange(catalog.row_count)
+    return records
+
+
+def sort_by_had(records):
+    # Same order as sorted(..., key=had, reverse=True): descending, ties keep their order.
+    return records[np.argsort(-records['had'], kind='stable')]
+
+
+def to_dicts(records, fields=CANDIDATE_FIELDS):
+    columns = [records[name].tolist() for name in fields]
+    return [dict(zip(fields, values)) for values in zip(*columns)]
+
+
+def field(row, name, default=np.nan):
+    # Works for both a record and the dict rows the GUI builds.
+    if isinstance(row, np.void):
+        return row[name] if name in row.dtype.names else default
+    return row.get(name, default)
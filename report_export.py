@@ -0,0 +1,158 @@
+import os
+from openpyxl import Workbook
+from docx import Document
+
+CASING_HEADERS = ["Well", "Section", "Multiplier", "Metal Type", "DCSG (mm)", "DCSG' (mm)",
+                  "Nearest Bit Size (mm)", "Internal Diameter (mm)"]
+HAD_HEADERS = ["Well", "Section", "Row", "HAD", "External Pressure (MPa)", "Metal Type",
+               "Tensile Strength (Tonf)", "Unit Weight (Lbs/ft)", "L Value"]
+DRILL_PIPE_HEADERS = ["Well", "Interval", "H", "Drill pipe Metal grade", "Tec", "tau", "Lmax"]
+
+
+def collect_well_report(well_name, casing_tab=None, equations_tab=None):
+    report = {'well': well_name, 'casing': [], 'had': [], 'drill_pipe': []}
+    if casing_tab is not None:
+        report['casing'] = list(casing_tab.section_results)
+        for section_name, rows in casing_tab.had_calculator.section_data.items():
+            report['had'].extend(dict(row, section=section_name) for row in rows)
+    if equations_tab is not None:
+        report['drill_pipe'] = list(equations_tab.interval_results)
+    return report
+
+
+def casing_rows(report):
+    for result in report['casing']:
+        yield [
+            report['well'],
+            result['section'],
+            result['multiplier'],
+            result['metal_type'],
+            _number(result['dcsg']),
+            _number(result['at_body']),
+            result['nearest_bit_size'],
+            result['internal_diameter']
+        ]
+
+
+def had_rows(report):
+    row_numbers = {}
+    for result in report['had']:
+        row_numbers[result['section']] = row_numbers.get(result['section'], 0) + 1
+        yield [
+            report['well'],
+            result['section'],
+            row_numbers[result['section']],
+            result['had'],
+            _number(result['external_pressure']),
+            result['metal_type'],
+            _number(result['tensile_strength']),
+            _number(result['unit_weight']),
+            result.get('l_value')
+        ]
+
+
+def drill_pipe_rows(report):
+    for result in report['drill_pipe']:
+        yield [
+            report['well'],
+            result['interval'],
+            result['H'],
+            result['metal_grade'],
+            result['Tec'],
+            result['tau'],
+            result['Lmax']
+        ]
+
+
+REPORT_SECTIONS = [
+    ("Casing", CASING_HEADERS, casing_rows),
+    ("HAD", HAD_HEADERS, had_rows),
+    ("Drill Pipe", DRILL_PIPE_HEADERS, drill_pipe_rows)
+]
+
+
+def export_xlsx(file_path, wells):
+    # Write-only workbooks stream every appended row to disk, so `wells` can be a
+    # generator and memory stays flat no matter how many wells are exported.
+    workbook = Workbook(write_only=True)
+    sheets = []
+    for title, headers, rows in REPORT_SECTIONS:
+        sheet = workbook.create_sheet(title)
+        sheet.append(headers)
+        sheets.append((sheet, rows))
+
+    well_count = 0
+    for report in wells:
+        for sheet, rows in sheets:
+            for row in rows(report):
+                sheet.append(row)
+        well_count += 1
+
+    workbook.save(file_path)
+    return well_count
+
+
+def export_docx(file_path, wells, wells_per_file=50):
+    # python-docx keeps the whole document in memory, so large exports are split
+    # into parts of `wells_per_file` wells: report.docx, report_part2.docx, ...
+    base, ext = os.path.splitext(file_path)
+    written_paths = []
+    document = None
+    wells_in_document = 0
+
+    for report in wells:
+        if document is None:
+            document = Document()
+            document.add_heading("Well Data Report", 0)
+            wells_in_document = 0
+
+        _add_well_to_document(document, report)
+        wells_in_document += 1
+
+        if wells_in_document >= wells_per_file:
+            written_paths.append(_save_part(document, base, ext, len(written_paths)))
+            document = None
+
+    if document is not None or not written_paths:
+        if document is None:
+            document = Document()
+            document.add_heading("Well Data Report", 0)
+        written_paths.append(_save_part(document, base, ext, len(written_paths)))
+    return written_paths
+
+
+def _save_part(document, base, ext, part_index):
+    path = f"{base}{ext}" if part_index == 0 else f"{base}_part{part_index + 1}{ext}"
+    document.save(path)
+    return path
+
+
+def _add_well_to_document(document, report):
+    document.add_heading(str(report['well']), 1)
+    for title, headers, rows in REPORT_SECTIONS:
+        table_rows = [row[1:] for row in rows(report)]
+        if not table_rows:
+            continue
+        document.add_heading(title, 2)
+        table = document.add_table(rows=1, cols=len(headers) - 1)
+        table.style = 'Table Grid'
+        for cell, header in zip(table.rows[0].cells, headers[1:]):
+            cell.text = header
+        for row in table_rows:
+            for cell, value in zip(table.add_row().cells, row):
+                cell.text = _format_cell(value)
+
+
+def _format_cell(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
@@ -0,0 +1,350 @@
+import os
+import re
+import json
+import shutil
+import argparse
+import operator
+import numpy as np
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# One row per HAD candidate or drill pipe interval of a well; columns a row kind
+# does not have stay NaN (or empty for text). Text columns are stored as int32
+# codes into a per-chunk string table kept in the manifest.
+TEXT = 'str'
+RESULT_SCHEMA = [
+    ('well', TEXT),
+    ('section', TEXT),
+    ('grade', TEXT),
+    ('had', 'f8'),
+    ('l_value', 'f8'),
+    ('L0c', 'f8'),
+    ('Lp', 'f8'),
+    ('Tec', 'f8'),
+    ('tau', 'f8'),
+    ('C_new', 'f8'),
+    ('Lmax', 'f8')
+]
+CHUNK_ROWS = 65536
+MANIFEST = "manifest.json"
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda values, options: np.isin(values, list(options))
+}
+
+
+class ResultsStore:
+    # Append-only directory of column chunks, chunk_000000/<column>.npy and so on,
+    # listed in manifest.json. A chunk is written to a temporary directory and
+    # renamed before the manifest names it, so readers only ever see whole chunks.
+    # Reads map the .npy files instead of loading them.
+    def __init__(self, path, schema=None, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(self.manifest_path):
+            self.refresh()
+            if schema is not None and [name for name, _ in schema] != self.columns:
+                raise ValueError(f"{path} holds columns {', '.join(self.columns)}")
+        else:
+            schema = RESULT_SCHEMA if schema is None else schema
+            self.manifest = {'schema': [[name, dtype if dtype == TEXT else np.dtype(dtype).str] for name, dtype in schema],
+                             'chunks': []}
+            self._write_manifest()
+        self.text = {name for name, dtype in self.manifest['schema'] if dtype == TEXT}
+        self.dtypes = {name: np.dtype(str if dtype == TEXT else dtype) for name, dtype in self.manifest['schema']}
+        self._buffer = {name: [] for name in self.columns}
+        self._buffered = 0
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.path, MANIFEST)
+
+    @property
+    def columns(self):
+        return [name for name, _ in self.manifest['schema']]
+
+    @property
+    def row_count(self):
+        return sum(chunk['rows'] for chunk in self.manifest['chunks'])
+
+    def refresh(self):
+        # Picks up chunks the writer committed since this reader opened the store.
+        with open(self.manifest_path, 'r') as f:
+            self.manifest = json.load(f)
+
+    def append(self, rows):
+        # rows is a list of dicts or a dict of equally long columns; missing
+        # columns are filled with NaN or "".
+        if isinstance(rows, dict):
+            unknown = set(rows) - set(self.columns)
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+            count = len(next(iter(rows.values()))) if rows else 0
+            columns = rows
+        else:
+            count = len(rows)
+            columns = {name: [row.get(name) for row in rows] for name in self.columns}
+        if count == 0:
+            return
+        for name in self.columns:
+            self._buffer[name].append(self._column(name, columns.get(name), count))
+        self._buffered += count
+        if self._buffered >= self.chunk_rows:
+            self._write_buffer(self._buffered - self._buffered % self.chunk_rows)
+
+    def flush(self):
+        if self._buffered:
+            self._write_buffer(self._buffered)
+
+    def rollback(self, chunk_count):
+        # Forgets everything after the first chunk_count chunks, such as chunks a
+        # job wrote after its last checkpoint, and drops any buffered rows.
+        dropped = self.manifest['chunks'][chunk_count:]
+        self.manifest['chunks'] = self.manifest['chunks'][:chunk_count]
+        self._write_manifest()
+        for chunk in dropped:
+            shutil.rmtree(os.path.join(self.path, chunk['name']), ignore_errors=True)
+        self._buffer = {name: [] for name in self.columns}
+        self._buffered = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _column(self, name, values, count):
+        dtype = self.dtypes[name]
+        if values is None:
+            return np.full(count, "" if name in self.text else np.nan, dtype=dtype)
+        if name in self.text:
+            if not isinstance(values, np.ndarray):
+                values = ["" if value is None else str(value) for value in values]
+            return np.asarray(values, dtype=str)
+        if not isinstance(values, np.ndarray):
+            values = [np.nan if value is None else value for value in values]
+        return np.asarray(values, dtype=dtype)
+
+    def _write_buffer(self, rows):
+        # Writes the first rows buffered rows in chunks of at most chunk_rows.
+        columns = {name: np.concatenate(parts) for name, parts in self._buffer.items()}
+        for start in range(0, rows, self.chunk_rows):
+            stop = min(start + self.chunk_rows, rows)
+            self._write_chunk({name: values[start:stop] for name, values in columns.items()})
+        self._buffer = {name: [values[rows:]] for name, values in columns.items()}
+        self._buffered -= rows
+
+    def _write_chunk(self, columns):
+        name = f"chunk_{len(self.manifest['chunks']):06d}"
+        temporary = os.path.join(self.path, f".{name}.tmp")
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        strings = {}
+        for column, values in columns.items():
+            if column in self.text:
+                table, values = np.unique(values, return_inverse=True)
+                strings[column] = table.tolist()
+                values = values.astype(np.int32)
+            np.save(os.path.join(temporary, f"{column}.npy"), values)
+        # A directory of this name that the manifest does not list is left over from
+        # a writer that stopped before recording it.
+        shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        os.replace(temporary, os.path.join(self.path, name))
+        rows = len(next(iter(columns.values())))
+        numeric = {column: [float(np.nanmin(values)), float(np.nanmax(values))]
+                   for column, values in columns.items()
+                   if values.dtype.kind == 'f' and not np.all(np.isnan(values))}
+        self.manifest['chunks'].append({'name': name, 'rows': rows, 'range': numeric, 'strings': strings})
+        self._write_manifest()
+
+    def _write_manifest(self):
+        temporary = self.manifest_path + ".tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(temporary, self.manifest_path)
+
+    def chunk(self, index, columns=None):
+        # Mapped arrays of one chunk; text columns come back as their codes.
+        name = self.manifest['chunks'][index]['name']
+        return {column: np.load(os.path.join(self.path, name, f"{column}.npy"), mmap_mode='r')
+                for column in (columns or self.columns)}
+
+    def scan(self, columns=None, where=None):
+        # Yields one dict of columns per chunk with the rows matching every
+        # (column, op, value) condition. Only the projected and filtered columns are
+        # mapped, and chunks whose recorded min/max rule a numeric condition out are
+        # skipped without being opened.
+        columns = list(columns or self.columns)
+        where = [self._condition(*condition) for condition in (where or [])]
+        needed = list(dict.fromkeys(columns + [column for column, _, _ in where]))
+        for index, chunk in enumerate(self.manifest['chunks']):
+            if not _may_match(chunk.get('range', {}), where):
+                continue
+            data = self.chunk(index, needed)
+            strings = chunk.get('strings', {})
+            mask = slice(None)
+            if where:
+                mask = np.ones(chunk['rows'], dtype=bool)
+                for column, op, value in where:
+                    if column in self.text:
+                        mask &= _text_mask(data[column], strings[column], op, value)
+                    else:
+                        mask &= OPERATORS[op](data[column], value)
+                if not mask.any():
+                    continue
+            yield {column: np.array(strings[column], dtype=str)[data[column][mask]] if column in self.text
+                   else data[column][mask] for column in columns}
+
+    def _condition(self, column, op, value):
+        if column not in self.dtypes:
+            raise ValueError(f"Unknown column '{column}'")
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator '{op}'")
+        cast = str if column in self.text else float
+        if op == 'in':
+            return column, op, [cast(option) for option in value]
+        return column, op, cast(value)
+
+    def read(self, columns=None, where=None, limit=None):
+        columns = list(columns or self.columns)
+        parts = {column: [] for column in columns}
+        count = 0
+        for data in self.scan(columns, where):
+            for column in columns:
+                parts[column].append(np.asarray(data[column]))
+            count += len(data[columns[0]])
+            if limit is not None and count >= limit:
+                break
+        result = {column: np.concatenate(values) if values else np.empty(0, dtype=self.dtypes[column])
+                  for column, values in parts.items()}
+        if limit is not None:
+            result = {column: values[:limit] for column, values in result.items()}
+        return result
+
+    def count(self, where=None):
+        if not where:
+            return self.row_count
+        column = where[0][0]
+        return sum(len(data[column]) for data in self.scan([column], where))
+
+    def to_parquet(self, path, columns=None, where=None):
+        # Needs pyarrow; writes one row group per matching chunk.
+        if pyarrow is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        columns = list(columns or self.columns)
+        schema = pyarrow.schema([(column, pyarrow.string() if column in self.text
+                                  else pyarrow.from_numpy_dtype(self.dtypes[column]))
+                                 for column in columns])
+        rows = 0
+        with pyarrow.parquet.ParquetWriter(path, schema) as writer:
+            for data in self.scan(columns, where):
+                writer.write_table(pyarrow.table({column: np.asarray(data[column]) for column in columns},
+                                                 schema=schema))
+                rows += len(data[columns[0]])
+        return rows
+
+
+def _text_mask(codes, strings, op, value):
+    # Equality is decided on the codes; ordering compares the decoded strings.
+    if op in ('==', '!='):
+        match = codes == strings.index(value) if value in strings else np.zeros(len(codes), dtype=bool)
+        return match if op == '==' else ~match
+    if op == 'in':
+        return np.isin(codes, [code for code, text in enumerate(strings) if text in value])
+    return OPERATORS[op](np.array(strings, dtype=str)[codes], value)
+
+
+def _may_match(ranges, where):
+    for column, op, value in where:
+        if column not in ranges or op == 'in' or not isinstance(value, float):
+            continue
+        low, high = ranges[column]
+        if (op == '==' and not low <= value <= high) or (op == '<' and low >= value) or \
+                (op == '<=' and low > value) or (op == '>' and high <= value) or (op == '>=' and high < value):
+            return False
+    return True
+
+
+def report_rows(report):
+    # Store rows of one well_engine.calculate_well report.
+    rows = []
+    for row in report.get('had', []):
+        rows.append({
+            'well': report['well'],
+            'section': row.get('section'),
+            'grade': row.get('metal_type'),
+            'had': row.get('had'),
+            'l_value': row.get('l_value')
+        })
+    for row in report.get('drill_pipe', []):
+        rows.append({
+            'well': report['well'],
+            'section': row.get('section'),
+            'grade': row.get('metal_grade'),
+            'L0c': row.get('L0c'),
+            'Lp': row.get('Lp'),
+            'Tec': row.get('Tec'),
+            'tau': row.get('tau'),
+            'C_new': row.get('C_new'),
+            'Lmax': row.get('Lmax')
+        })
+    return rows
+
+
+def parse_condition(text):
+    # "Lmax>=4000", "grade==E 75" or "section in Production,Surface".
+    match = re.match(r"\s*(\w+)\s*(==|!=|<=|>=|<|>|\sin\s)\s*(.*?)\s*$", text)
+    if not match:
+        raise ValueError(f"Cannot read condition '{text}'")
+    column, op, value = match.group(1), match.group(2).strip(), match.group(3)
+    if op == 'in':
+        return column, op, [part.strip() for part in value.split(',')]
+    return column, op, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a results store without loading it into memory.")
+    parser.add_argument("store", help="Results store directory")
+    parser.add_argument("--columns", nargs='+', help="Columns to show (default: all)")
+    parser.add_argument("--where", action='append', default=[],
+                        help="Condition such as 'Lmax>=4000' or 'grade==E 75'; repeat to combine")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--count", action='store_true', help="Only count the matching rows")
+    parser.add_argument("--parquet", help="Write the matching rows to this Parquet file")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.store, MANIFEST)):
+        parser.error(f"{args.store} is not a results store")
+    store = ResultsStore(args.store)
+    where = [parse_condition(text) for text in args.where]
+    if args.count:
+        print(f"{store.count(where)} of {store.row_count} rows")
+        return
+    if args.parquet:
+        print(f"{store.to_parquet(args.parquet, args.columns, where)} rows written to {args.parquet}")
+        return
+    result = store.read(args.columns, where, args.limit)
+    columns = list(result)
+    widths = {column: max([14, len(column) + 2] + [len(str(value)) + 2 for value in result[column]
+                                                   if result[column].dtype.kind != 'f'])
+              for column in columns}
+    print("".join(f"{column:<{widths[column]}}" for column in columns))
+    for row in range(len(result[columns[0]]) if columns else 0):
+        print("".join(f"{result[column][row]:<{widths[column]}.2f}" if result[column].dtype.kind == 'f'
+                      else f"{str(result[column][row]):<{widths[column]}}" for column in columns))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+from drill_pipe import evaluate_intervals
+from design_factors import DEFAULT_FACTORS
+
+# Inputs the report differentiates against; 'dec' is the drill collar outer diameter.
+SENSITIVITY_INPUTS = ['WOB', 'n', 'γ', 'P', 'K1', 'K2', 'K3', 'dα', 'dec']
+INPUT_LABELS = {'dec': "Collar OD (m)"}
+OUTPUTS = ['Lmax', 'Tec', 'tau']
+RELATIVE_STEP = 1e-4
+# Grade changes are looked for at this relative change of each input.
+FLIP_FRACTION = 0.05
+
+
+def sensitivity(table, inputs, parameters=SENSITIVITY_INPUTS, relative_step=RELATIVE_STEP,
+                flip_fraction=FLIP_FRACTION, factors=DEFAULT_FACTORS):
+    # inputs are evaluate_intervals keyword arguments. Every perturbation of every
+    # interval goes through one evaluate_intervals call: block 0 of the batch is the
+    # base case, then each parameter adds x-h, x+h (central difference) and x-d, x+d
+    # (grade flip), each block one row per interval. γ moves only the torque term;
+    # the formation row stays the one the base γ selects.
+    count = len(np.atleast_1d(inputs['WOB']))
+    columns = {name: np.broadcast_to(np.asarray(value, dtype=float), (count,)) for name, value in inputs.items()}
+    blocks = 1 + 4 * len(parameters)
+    batch = {name: np.tile(column, blocks) for name, column in columns.items()}
+
+    steps = {}
+    for k, name in enumerate(parameters):
+        x = columns[name]
+        scale = np.where(x != 0, np.abs(x), 1.0)
+        steps[name] = relative_step * scale
+        for j, delta in enumerate((-steps[name], steps[name], -flip_fraction * scale, flip_fraction * scale)):
+            start = (1 + 4 * k + j) * count
+            batch[name][start:start + count] = x + delta
+
+    results = evaluate_intervals(table, table_gamma=np.tile(columns['γ'], blocks), factors=factors, **batch)
+
+    def block(key, index):
+        return results[key][index * count:(index + 1) * count]
+
+    base_grades = block('metal_grade', 0)
+    report = {
+        'parameters': list(parameters),
+        'base': {key: block(key, 0) for key in OUTPUTS + ['metal_grade', 'error']},
+        'value': {},
+        'step': steps,
+        'derivative': {},
+        'elasticity': {},
+        'grade_flip': {},
+        'flip_grades': {}
+    }
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for k, name in enumerate(parameters):
+            first = 1 + 4 * k
+            report['value'][name] = np.array(columns[name])
+            report['derivative'][name] = {
+                key: (block(key, first + 1) - block(key, first)) / (2 * steps[name]) for key in OUTPUTS
+            }
+            report['elasticity'][name] = report['derivative'][name]['Lmax'] * columns[name] / report['base']['Lmax']
+            lower, upper = block('metal_grade', first + 2), block('metal_grade', first + 3)
+            nearby = zip(block('metal_grade', first), block('metal_grade', first + 1), lower, upper)
+            report['grade_flip'][name] = np.array([
+                grade is not None and any(other != grade for other in others)
+                for grade, others in zip(base_grades, nearby)
+            ])
+            report['flip_grades'][name] = (lower, upper)
+    for row, error in enumerate(report['base']['error']):
+        if error is not None:
+            for name in parameters:
+                report['elasticity'][name][row] = np.nan
+                for key in OUTPUTS:
+                    report['derivative'][name][key][row] = np.nan
+    return report
+
+
+def ranked_parameters(report, row):
+    # Parameters by how strongly Lmax responds, in relative terms.
+    def strength(name):
+        value = abs(report['elasticity'][name][row])
+        return -value if np.isfinite(value) else 0.0
+    return sorted(report['parameters'], key=strength)
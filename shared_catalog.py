@@ -0,0 +1,104 @@
+import os
+import uuid
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from catalog import CasingCatalog
+from drill_pipe import FormationTable
+
+_attached = {}
+
+
+class SharedTables:
+    # Owner side: copies the parsed tables into shared memory once. Workers only
+    # receive the manifest and map the same blocks by name.
+    def __init__(self, catalog=None, formation=None):
+        self.prefix = f"wd{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self.blocks = []
+        self.manifest = {'id': self.prefix, 'catalog': None, 'formation': None}
+        if catalog is not None:
+            self.manifest['catalog'] = self.share_catalog(catalog)
+        if formation is not None:
+            self.manifest['formation'] = self.share_formation(formation)
+
+    def share_catalog(self, catalog):
+        columns = {}
+        for name, values in catalog.columns.items():
+            if values.dtype.kind == 'U':
+                table, codes = np.unique(values, return_inverse=True)
+                columns[name] = {'strings': table.tolist(), 'codes': self.share_array(codes.astype(np.int32))}
+            else:
+                columns[name] = self.share_array(values)
+        return {'path': catalog.path, 'columns': columns}
+
+    def share_formation(self, formation):
+        columns = []
+        for name in formation.df.columns:
+            series = formation.df[name]
+            if series.dtype == np.float64:
+                columns.append({'name': name, 'array': self.share_array(series.to_numpy())})
+            else:
+                columns.append({'name': name, 'dtype': str(series.dtype), 'values': series.tolist()})
+        return {'path': formation.path, 'columns': columns}
+
+    def share_array(self, values):
+        values = np.ascontiguousarray(values)
+        block = shared_memory.SharedMemory(name=f"{self.prefix}_{len(self.blocks)}", create=True,
+                                           size=max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[...] = values
+        self.blocks.append(block)
+        return {'block': block.name, 'dtype': values.dtype.str, 'shape': values.shape}
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(manifest):
+    # Worker side; returns (catalog, formation) backed by the owner's blocks.
+    if manifest['id'] not in _attached:
+        blocks = []
+        catalog = formation = None
+        if manifest['catalog'] is not None:
+            catalog = _attach_catalog(manifest['catalog'], blocks)
+        if manifest['formation'] is not None:
+            formation = _attach_formation(manifest['formation'], blocks)
+        _attached[manifest['id']] = (catalog, formation, blocks)
+    catalog, formation, _ = _attached[manifest['id']]
+    return catalog, formation
+
+
+def _attach_catalog(spec, blocks):
+    columns = {}
+    for name, column in spec['columns'].items():
+        if 'strings' in column:
+            columns[name] = np.array(column['strings'])[_attach_array(column['codes'], blocks)]
+        else:
+            columns[name] = _attach_array(column, blocks)
+    return CasingCatalog(spec['path'], columns)
+
+
+def _attach_formation(spec, blocks):
+    data = {}
+    for column in spec['columns']:
+        if 'array' in column:
+            data[column['name']] = pd.Series(_attach_array(column['array'], blocks), copy=False)
+        else:
+            data[column['name']] = pd.Series(column['values'], dtype=column['dtype'])
+    return FormationTable(pd.DataFrame(data, copy=False), spec['path'])
+
+
+def _attach_array(spec, blocks):
+    block = shared_memory.SharedMemory(name=spec['block'])
+    blocks.append(block)
+    array = np.ndarray(tuple(spec['shape']), dtype=np.dtype(spec['dtype']), buffer=block.buf)
+    array.flags.writeable = False
+    return array
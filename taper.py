@@ -0,0 +1,122 @@
+from itertools import permutations
+from math import pi
+import numpy as np
+from design_factors import DEFAULT_FACTORS
+
+MAX_SECTIONS = 3
+
+
+def pipe_options(table):
+    # Every (pipe size, grade) pair the formation table offers.
+    options = []
+    for size in table.pipe_sizes():
+        for grade, strength in table.grade_strengths():
+            options.append(dict(size, grade=grade, strength=strength))
+    return options
+
+
+def stacks(option_count, max_sections=MAX_SECTIONS):
+    # Ordered section stacks from the bottom up, padded with -1.
+    rows = []
+    for sections in range(1, max_sections + 1):
+        for stack in permutations(range(option_count), sections):
+            rows.append(stack + (-1,) * (max_sections - sections))
+    return np.array(rows, dtype=int).reshape(-1, max_sections)
+
+
+def optimize_taper(table, inputs, max_sections=MAX_SECTIONS, factors=DEFAULT_FACTORS):
+    # Lightest tapered string for every interval. A stack is run from the top of the
+    # heavy-weight pipe upwards, each section as long as the calculate_interval
+    # criterion allows at its top, safety factor * sqrt((0.1 Tec)**2 + 4 tau**2) <= strength.
+    # Tec and tau are linear in the section length, so that length is the root of a
+    # quadratic; all (interval, stack) pairs are solved together, section by section.
+    # Intervals whose γ has no formation row keep their message in 'error'.
+    count = len(np.atleast_1d(inputs['WOB']))
+    columns = {name: np.broadcast_to(np.asarray(value, dtype=float), (count,))[:, None]
+               for name, value in inputs.items()}
+    WOB, C, qc, H, Lhw, P, γ = (columns[name] for name in ('WOB', 'C', 'qc', 'H', 'Lhw', 'P', 'γ'))
+    K = columns['K1'] * columns['K2'] * columns['K3']
+    dα, Dhw, qhw, n, dec, DB = (columns[name] for name in ('dα', 'Dhw', 'qhw', 'n', 'dec', 'DB'))
+    pipe_weight, safety = factors.pipe_weight_factor, factors.safety_factor
+
+    b = np.full((count, 1), np.nan)
+    error = [None] * count
+    for row in range(count):
+        additional_data = table.data_for_gamma(γ[row, 0])
+        if not additional_data:
+            error[row] = f"No additional data found for the given γ value: {float(γ[row, 0])}"
+            continue
+        b[row] = additional_data.get('b', 0)
+
+    options = pipe_options(table)
+    option_stacks = stacks(len(options), max_sections)
+    qp, Ap, Aip, Mp, od, strength = (np.array([option[key] for option in options], dtype=float)
+                                     for key in ('qp', 'AP', 'AIP', 'Mp', 'od', 'strength'))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        L0c = WOB / (C * qc * b)
+        Lp = H - (Lhw + L0c)
+        shape = (count, len(option_stacks))
+        remaining = np.broadcast_to(np.maximum(Lp, 0.0), shape).copy()
+        hanging = np.broadcast_to(Lhw * qhw + L0c * qc, shape).copy()
+        torque = np.broadcast_to(dα * γ * (L0c * dec**2 + Lhw * Dhw**2) * n**1.7
+                                 + 3.2 * 10**-2 * (WOB**0.5) * (DB**1.75) * n, shape).copy()
+        weight = np.zeros(shape)
+        lengths = np.zeros(shape + (max_sections,))
+        top_stress = np.full(shape + (max_sections,), np.nan)
+        rejected = np.zeros(shape, dtype=bool)
+
+        for slot in range(max_sections):
+            option = option_stacks[:, slot]
+            used = option >= 0
+            pick = np.where(used, option, 0)
+            rejected |= used & (remaining <= 0)
+            active = used & (remaining > 0)
+
+            tension_slope = K * pipe_weight * qp[pick] * b / Ap[pick]
+            tension_base = K * (hanging * b / Ap[pick] + P * Aip[pick] / Ap[pick])
+            shear = 30 * 10**3 * 10**-6 / (pi * n * Mp[pick])
+            tau_slope = shear * dα * γ * n**1.7 * od[pick]**2
+            tau_base = shear * torque
+            limit = (strength[pick] / safety)**2
+
+            A = 0.01 * tension_slope**2 + 4 * tau_slope**2
+            B = 2 * (0.01 * tension_base * tension_slope + 4 * tau_base * tau_slope)
+            C0 = 0.01 * tension_base**2 + 4 * tau_base**2 - limit
+            allowed = np.where(C0 <= 0, (-B + np.sqrt(B**2 - 4 * A * C0)) / (2 * A), 0.0)
+            rejected |= active & ~(allowed > 0)
+
+            length = np.where(active, np.minimum(allowed, remaining), 0.0)
+            lengths[..., slot] = length
+            top_tension = tension_base + tension_slope * length
+            top_tau = tau_base + tau_slope * length
+            top_stress[..., slot] = np.where(active, safety * np.sqrt((0.1 * top_tension)**2 + 4 * top_tau**2), np.nan)
+            hanging = hanging + pipe_weight * length * qp[pick]
+            torque = torque + dα * γ * n**1.7 * od[pick]**2 * length
+            weight = weight + length * qp[pick]
+            remaining = remaining - length
+
+        feasible = ~rejected & (remaining <= 1e-6 * np.maximum(Lp, 1.0)) & np.isfinite(weight)
+
+    results = []
+    for row in range(count):
+        result = {'interval': row + 1, 'Lp': float(Lp[row, 0]), 'error': error[row], 'sections': [],
+                  'weight': None, 'feasible_stacks': int(feasible[row].sum()), 'stacks': len(option_stacks)}
+        if error[row] is None and Lp[row, 0] > 0 and feasible[row].any():
+            best = int(np.flatnonzero(feasible[row])[np.argmin(weight[row, feasible[row]])])
+            result['weight'] = float(weight[row, best])
+            for slot, option in enumerate(option_stacks[best]):
+                if option < 0:
+                    break
+                result['sections'].append({
+                    'size': options[option]['label'],
+                    'qp': options[option]['qp'],
+                    'grade': options[option]['grade'],
+                    'strength': options[option]['strength'],
+                    'length': float(lengths[row, best, slot]),
+                    'top_C_new': float(top_stress[row, best, slot])
+                })
+        elif error[row] is None and Lp[row, 0] <= 0:
+            result['weight'] = 0.0
+        results.append(result)
+    return results
@@ -0,0 +1,211 @@
+import numpy as np
+from had_engine import sort_candidates, calculate_l_values
+from drill_pipe import BASIC_FIELDS, evaluate_intervals, interval_count, interval_section, section_names
+from calc_logging import get_logger, trace
+from records import to_dicts
+from design_factors import DEFAULT_FACTORS
+from depth_profile import string_profile, safety_summary
+
+logger = get_logger("engine")
+
+
+def calculate_casing(catalog, casing_inputs, factors=DEFAULT_FACTORS):
+    # Headless DbCalculator.extract_and_display on the indexed catalog.
+    result = {'casing': [], 'had': [], 'safety': None, 'calculated_values': [], 'sections': [], 'messages': []}
+    section_inputs = casing_inputs.get('section_inputs', [])
+    try:
+        iterations = int(casing_inputs.get('iterations', ''))
+    except ValueError:
+        result['messages'].append("Please enter a valid number of iterations.")
+        return result
+
+    graph = catalog.chain_graph()
+    dcsg_amount = casing_inputs.get('initial_dcsg', '')
+    at_head_value = None
+    section_count = min(iterations, len(section_inputs))
+    names = section_names(section_count)
+    result['sections'] = names
+    for i in range(section_count):
+        section = names[i]
+        inputs = section_inputs[i] if i < len(section_inputs) else {}
+        try:
+            multiplier = float(inputs.get('multiplier', ''))
+        except ValueError:
+            result['messages'].append(f"Please enter a valid multiplier for {section} section.")
+            return result
+        metal_type = inputs.get('metal_type', 'K-55')
+        try:
+            depth = float(inputs.get('depth', ''))
+        except ValueError:
+            result['messages'].append(f"Please enter a valid depth for {section} section.")
+            return result
+
+        if i == 0:
+            at_head_value = catalog.at_head_for_dcsg(dcsg_amount)
+            if at_head_value is None:
+                result['messages'].append("First iteration - At head value not found")
+                return result
+            dcsg_amount = str(at_head_value)
+
+        state = graph.state_of(at_head_value)
+        table = graph.table(multiplier)
+        db_value = float(at_head_value) * multiplier
+        if state < 0 or np.isnan(table['bit_size'][state]):
+            result['messages'].append("Bit Size and Internal Diameter columns not found or empty.")
+            break
+        nearest_bit_size = float(table['bit_size'][state])
+        internal_diameter = float(table['internal_diameter'][state])
+        next_state = table['next_state'][state]
+        new_at_head_value = float(graph.at_heads[next_state]) if next_state >= 0 else None
+
+        at_body_value = catalog.at_body_for(dcsg_amount)
+        try:
+            if at_body_value:
+                float(at_body_value)
+        except ValueError as e:
+            result['messages'].append(f"An error occurred: {str(e)}")
+            break
+
+        result['casing'].append({
+            'section': section,
+            'multiplier': multiplier,
+            'metal_type': metal_type,
+            'dcsg': dcsg_amount,
+            'at_body': at_body_value,
+            'nearest_bit_size': nearest_bit_size,
+            'internal_diameter': internal_diameter
+        })
+        result['calculated_values'].append((at_head_value, db_value, nearest_bit_size))
+
+        if i == 0:
+            candidates, reached = catalog.had_index_for(factors).candidate_records(at_head_value, metal_type, depth)
+            if not reached:
+                result['messages'].append("Could not find a suitable HAD value for the given depth in Production Section.")
+                break
+            result['had'] = had_section_rows(candidates, depth, factors)
+            result['safety'] = production_safety(catalog, at_head_value, metal_type, depth, factors)
+
+        if i < section_count - 1:
+            if new_at_head_value is None:
+                result['messages'].append("Could not find a new 'At head' value. Stopping iterations.")
+                break
+            at_head_value = new_at_head_value
+            dcsg_amount = str(new_at_head_value)
+        else:
+            result['calculated_values'].append((new_at_head_value, None, None))
+    return result
+
+
+def had_section_rows(candidates, depth, factors=DEFAULT_FACTORS):
+    sorted_data = to_dicts(sort_candidates(candidates))
+    if len(sorted_data) >= 3:
+        l_values = calculate_l_values(sorted_data, depth, factors)
+        for i in range(min(3, len(sorted_data))):
+            sorted_data[i]['l_value'] = l_values[f'l{i+1}']
+        if len(sorted_data) > 3 and 'l4' in l_values:
+            sorted_data[3]['l_value'] = l_values['l4']
+    for row in sorted_data:
+        row['section'] = "Production Section"
+    return sorted_data
+
+
+def production_safety(catalog, at_head, metal_type, depth, factors=DEFAULT_FACTORS):
+    # Lowest tension, collapse and burst safety factors down the designed production
+    # string, from its per-metre depth profile.
+    profile = string_profile(catalog, at_head, metal_type, depth, factors=factors)
+    return safety_summary(profile) if profile is not None else None
+
+
+def drill_collars(formation, initial_dcsg, calculated_values, names=None):
+    # WellDataApp.display_drill_collar_results: one collar per casing section.
+    at_head_values = [value[0] for value in calculated_values if value[0] is not None]
+    nearest_bit_sizes = [value[2] for value in calculated_values if value[2] is not None]
+    all_values = list(zip([initial_dcsg] + at_head_values, nearest_bit_sizes))
+    names = list(names or section_names(len(all_values)))
+    collars = {}
+    for section_name, (at_head, bit_size) in zip(names, all_values):
+        collars[section_name] = formation.nearest_drill_collar(2 * float(at_head) - bit_size)
+    return collars, nearest_bit_sizes
+
+
+def drill_pipe_inputs(data, collars, nearest_bit_sizes):
+    # evaluate_intervals keyword arguments of every interval, with its section and
+    # bit size; raises ValueError for an empty field like the Equations tab.
+    count = interval_count(data)
+    for field in BASIC_FIELDS:
+        for i in range(1, count + 1):
+            if not data.get(f"{field}_{i}"):
+                raise ValueError(f"Field '{field}' (Instance {i}) is empty")
+
+    inputs = {field: [float(data[f'{field}_{i}']) for i in range(1, count + 1)] for field in BASIC_FIELDS}
+    inputs.update({field: float(data[field]) for field in ['K1', 'K2', 'K3', 'dα', 'Dep', 'Dhw', 'qhw', 'n']})
+    sections = [interval_section(data, i) for i in range(1, count + 1)]
+    collar_sections = list(collars)
+    positions = [collar_sections.index(section) + 1 if section in collars else len(nearest_bit_sizes) + 1
+                 for section in sections]
+    bit_sizes = [nearest_bit_sizes[-p] if p <= len(nearest_bit_sizes) else None for p in positions]
+    inputs['dec'] = [np.nan if collars.get(section) is None else collars[section] / 1000 for section in sections]
+    inputs['DB'] = [np.nan if value is None else value / 1000 for value in bit_sizes]
+    return sections, bit_sizes, inputs
+
+
+def calculate_drill_pipe(formation, data, collars, nearest_bit_sizes, factors=DEFAULT_FACTORS):
+    # Headless WellDataApp.calculate_and_display over every interval in one pass.
+    result = {'drill_pipe': [], 'messages': []}
+    try:
+        sections, bit_sizes, inputs = drill_pipe_inputs(data, collars, nearest_bit_sizes)
+        count = len(sections)
+        results = evaluate_intervals(formation, factors=factors, **inputs)
+        for row in range(count):
+            error = results['error'][row]
+            if error is not None and error.startswith("No additional data"):
+                result['messages'].append(error)
+                continue
+            if collars.get(sections[row]) is None:
+                raise ValueError(f"No drill collar for the {sections[row]} section")
+            if bit_sizes[row] is None:
+                raise ValueError(f"No bit size for the {sections[row]} section")
+            if error is not None:
+                raise ValueError(error)
+            result['drill_pipe'].append({
+                'interval': row + 1,
+                'section': sections[row],
+                'metal_grade': results['metal_grade'][row],
+                'H': float(results['H'][row]),
+                'L0c': float(results['L0c'][row]),
+                'Lp': float(results['Lp'][row]),
+                'Tec': float(results['Tec'][row]),
+                'tau': float(results['tau'][row]),
+                'C_new': float(results['C_new'][row]),
+                'SegmaC': float(results['SegmaC'][row]),
+                'Lmax': float(results['Lmax'][row])
+            })
+    except Exception as e:
+        result['messages'].append(f"Error in calculations: {str(e)}")
+    return result
+
+
+def calculate_well(catalog, formation, case, well_name=None, factors=DEFAULT_FACTORS):
+    casing = calculate_casing(catalog, case['casing'], factors)
+    well_name = well_name or case.get('name', "Well")
+    trace(logger, "casing", well=well_name, casing=casing['casing'], messages=casing['messages'])
+    trace(logger, "HAD section", well=well_name, rows=casing['had'], safety=casing['safety'])
+    report = {
+        'well': well_name,
+        'casing': casing['casing'],
+        'had': casing['had'],
+        'safety': casing['safety'],
+        'drill_pipe': [],
+        'calculated_values': casing['calculated_values'],
+        'messages': list(casing['messages']),
+        'drill_pipe_messages': []
+    }
+    if formation is not None and case.get('data_input') is not None:
+        collars, nearest_bit_sizes = drill_collars(formation, case['casing'].get('initial_dcsg', ''),
+                                                   casing['calculated_values'], casing['sections'])
+        trace(logger, "drill collars", well=well_name, collars=collars, bit_sizes=nearest_bit_sizes)
+        drill_pipe = calculate_drill_pipe(formation, case['data_input'], collars, nearest_bit_sizes, factors)
+        report['drill_pipe'] = drill_pipe['drill_pipe']
+        report['drill_pipe_messages'] = drill_pipe['messages']
+        trace(logger, "drill pipe", well=well_name, intervals=drill_pipe['drill_pipe'], messages=drill_pipe['messages'])
+    return report